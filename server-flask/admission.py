@@ -0,0 +1,247 @@
+"""
+Control de admisión para picos de tráfico (p.ej. entregas al vencer una tarea)
+
+Tres capas, en este orden:
+
+1. Límites de tasa por usuario con Flask-Limiter (RATELIMIT_STORAGE_URI:
+   memory:// o redis://): RATELIMIT_DEFAULT para todas las rutas y límites
+   propios para el login (RATELIMIT_LOGIN) y las entregas (RATELIMIT_SUBMIT).
+2. Concurrencia máxima por ruta (@concurrency_limit) para endpoints caros
+   (IA, exportaciones, importaciones): si está llena responde 503 al momento.
+3. Un máximo de peticiones en curso por proceso (ADMISSION_MAX_CONCURRENT)
+   con una cola corta (ADMISSION_QUEUE_SIZE) ordenada por prioridad. Con la
+   cola llena, una petición de más prioridad expulsa a la de menos: las
+   lecturas (GET) son 'low' y se descartan primero; entregas y login son 'high'.
+
+Las capas 2 y 3 son por proceso: con gunicorn el total es workers × límite.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_WAIT, ADMISSION_REJECTED
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+# batch.batch: la admisión y los límites se aplican a cada subpetición del lote
+EXEMPT_ENDPOINTS = {'metrics', 'home', 'static', 'batch.batch'}
+
+
+class AdmissionRejected(Exception):
+    """La petición no se admite; el endpoint debe responder 503"""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def priority(level):
+    """Decorator: prioridad del endpoint en la cola de admisión ('high', 'normal' o 'low')"""
+    if level not in PRIORITIES:
+        raise ValueError(f'unknown priority: {level}')
+
+    def decorator(fn):
+        fn.admission_priority = level
+        return fn
+    return decorator
+
+
+def concurrency_limit(max_concurrent):
+    """Decorator: máximo de peticiones simultáneas del endpoint en cada proceso"""
+    def decorator(fn):
+        fn.concurrency_limit = max_concurrent
+        return fn
+    return decorator
+
+
+def server_busy(retry_after):
+    """Respuesta 503; Retry-After se guarda en g para que Flask-Limiter no lo sustituya por el reinicio de su ventana"""
+    g.busy_retry_after = retry_after
+    return jsonify({'msg': 'server busy, retry later'}), 503, {'Retry-After': str(retry_after)}
+
+
+def rate_limit_key():
+    """Usuario del token si lo hay; si no, la IP"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if isinstance(identity, dict) and identity.get('user_id'):
+        return f"user:{identity['user_id']}"
+    return f'ip:{get_remote_address()}'
+
+
+def login_rate_key():
+    """Intentos de login por IP y nombre de usuario"""
+    username = str((request.get_json(silent=True) or {}).get('username') or '')[:80]
+    return f'login:{get_remote_address()}:{username}'
+
+
+def login_limit():
+    return current_app.config['RATELIMIT_LOGIN']
+
+
+def submit_limit():
+    return current_app.config['RATELIMIT_SUBMIT']
+
+
+def _exempt():
+    return request.endpoint in EXEMPT_ENDPOINTS
+
+
+limiter = Limiter(key_func=rate_limit_key, default_limits_exempt_when=_exempt)
+
+
+class _Waiter:
+    __slots__ = ('rank', 'seq', 'state')
+
+    def __init__(self, rank, seq):
+        self.rank = rank
+        self.seq = seq
+        self.state = 'waiting'
+
+    def __lt__(self, other):
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class AdmissionQueue:
+    """Semáforo con cola acotada por prioridad; con la cola llena expulsa al de menor prioridad"""
+
+    def __init__(self, capacity, queue_size):
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, level, timeout):
+        rank = PRIORITIES[level]
+        with self._cond:
+            if self.active < self.capacity and not self._waiting:
+                self.active += 1
+                return
+            if len(self._waiting) >= self.queue_size:
+                worst = max(self._waiting, default=None)
+                if worst is None or worst.rank <= rank:
+                    raise AdmissionRejected('queue full')
+                self._waiting.remove(worst)
+                heapq.heapify(self._waiting)
+                worst.state = 'shed'
+                self._cond.notify_all()
+            waiter = _Waiter(rank, next(self._seq))
+            heapq.heappush(self._waiting, waiter)
+            self._cond.wait_for(lambda: waiter.state != 'waiting', timeout)
+            if waiter.state == 'admitted':
+                return
+            if waiter.state == 'waiting':
+                self._waiting.remove(waiter)
+                heapq.heapify(self._waiting)
+                raise AdmissionRejected('queue timeout')
+            raise AdmissionRejected('shed')
+
+    def release(self):
+        with self._cond:
+            if self._waiting:
+                # El hueco pasa directamente al siguiente de la cola
+                heapq.heappop(self._waiting).state = 'admitted'
+                self._cond.notify_all()
+            else:
+                self.active -= 1
+
+
+class AdmissionService:
+    def __init__(self, app=None):
+        self.queue = None
+        self.timeouts = {}
+        self._route_slots = {}
+        self._lock = threading.Lock()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar Flask-Limiter y la cola de admisión"""
+        app.config.setdefault('RATELIMIT_ENABLED', os.environ.get('RATELIMIT_ENABLED', 'true').lower() != 'false')
+        app.config.setdefault('RATELIMIT_STORAGE_URI', os.environ.get('RATELIMIT_STORAGE_URI') or 'memory://')
+        app.config.setdefault('RATELIMIT_DEFAULT', os.environ.get('RATELIMIT_DEFAULT', '600 per minute'))
+        app.config.setdefault('RATELIMIT_LOGIN', os.environ.get('RATELIMIT_LOGIN', '10 per minute'))
+        app.config.setdefault('RATELIMIT_SUBMIT', os.environ.get('RATELIMIT_SUBMIT', '20 per minute'))
+        app.config.setdefault('RATELIMIT_HEADERS_ENABLED', True)
+        app.config.setdefault('ADMISSION_MAX_CONCURRENT', int(os.environ.get('ADMISSION_MAX_CONCURRENT', 0)))
+        app.config.setdefault('ADMISSION_QUEUE_SIZE', int(os.environ.get('ADMISSION_QUEUE_SIZE', 8)))
+        app.config.setdefault('ADMISSION_QUEUE_TIMEOUT', float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 2)))
+        app.config.setdefault('ADMISSION_LOW_QUEUE_TIMEOUT', float(os.environ.get('ADMISSION_LOW_QUEUE_TIMEOUT', 0.5)))
+
+        # Registrado antes que Flask-Limiter: los after_request corren en orden inverso y este va después
+        app.after_request(self._keep_retry_after)
+        limiter.init_app(app)
+
+        capacity = app.config['ADMISSION_MAX_CONCURRENT']
+        self.queue = AdmissionQueue(capacity, app.config['ADMISSION_QUEUE_SIZE']) if capacity > 0 else None
+        self.timeouts = {
+            'high': app.config['ADMISSION_QUEUE_TIMEOUT'],
+            'normal': app.config['ADMISSION_QUEUE_TIMEOUT'],
+            'low': app.config['ADMISSION_LOW_QUEUE_TIMEOUT'],
+        }
+        self._route_slots = {}
+
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def _route_semaphore(self, endpoint, limit):
+        with self._lock:
+            if endpoint not in self._route_slots:
+                self._route_slots[endpoint] = threading.BoundedSemaphore(limit)
+            return self._route_slots[endpoint]
+
+    def _admit(self):
+        if request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        level = getattr(view, 'admission_priority', None) or ('low' if request.method in ('GET', 'HEAD') else 'normal')
+
+        if self.queue is not None:
+            start = time.perf_counter()
+            try:
+                self.queue.acquire(level, self.timeouts[level])
+            except AdmissionRejected as e:
+                ADMISSION_REJECTED.labels(priority=level, reason=e.reason).inc()
+                raise
+            ADMISSION_QUEUE_WAIT.labels(priority=level).observe(time.perf_counter() - start)
+            ADMISSION_IN_FLIGHT.inc()
+            g.admission_slot = True
+
+        limit = getattr(view, 'concurrency_limit', None)
+        if limit:
+            slots = self._route_semaphore(request.endpoint, limit)
+            if not slots.acquire(blocking=False):
+                ADMISSION_REJECTED.labels(priority=level, reason='route limit').inc()
+                raise AdmissionRejected('route limit', retry_after=5)
+            g.admission_route_slots = slots
+
+    def _keep_retry_after(self, response):
+        retry_after = g.pop('busy_retry_after', None)
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def _release(self, exc):
+        slots = g.pop('admission_route_slots', None)
+        if slots is not None:
+            slots.release()
+        if g.pop('admission_slot', False):
+            ADMISSION_IN_FLIGHT.dec()
+            self.queue.release()
+
+
+# Instancia global del servicio
+admission_service = AdmissionService()
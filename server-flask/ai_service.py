@@ -5,6 +5,29 @@ import os
 import google.generativeai as genai
 from typing import Dict, List, Any
 
+from metrics import time_ai_call
+from models import Question
+
+
+def submission_analysis_data(submission) -> Dict[str, Any]:
+    """Tarea, preguntas y respuestas de una entrega para analyze_submission (preguntas en una consulta)"""
+    answers = list(submission.answers)
+    question_ids = {answer.question_id for answer in answers}
+    questions = {q.id: q for q in Question.query.filter(Question.id.in_(question_ids))} if question_ids else {}
+    
+    pairs = [(questions[answer.question_id], answer) for answer in answers if answer.question_id in questions]
+    return {
+        'assignment_title': submission.assignment.title,
+        'assignment_description': submission.assignment.description or '',
+        'questions': [{'text': question.text, 'type': question.type, 'id': question.id} for question, _ in pairs],
+        'answers': [{
+            'question_id': answer.question_id,
+            'text_answer': answer.text_answer,
+            'selected_options': answer.selected_options,
+            'numeric_answer': float(answer.numeric_answer) if answer.numeric_answer else None
+        } for _, answer in pairs]
+    }
+
 
 class GeminiAIService:
     def __init__(self):
@@ -42,10 +65,7 @@ class GeminiAIService:
             prompt = self._build_analysis_prompt(submission_data)
             
             # Generar respuesta
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
+            response = self._generate('analyze_submission', prompt, generation_config=self.generation_config)
             
             # Procesar respuesta
             feedback_text = response.text
@@ -67,6 +87,13 @@ class GeminiAIService:
                 'error': str(e)
             }
     
+    def _generate(self, operation: str, prompt: str, **kwargs):
+        """Llamada a Gemini con métricas de latencia, errores y tokens"""
+        with time_ai_call(operation) as record_usage:
+            response = self.model.generate_content(prompt, **kwargs)
+            record_usage(response)
+            return response
+    
     def _build_analysis_prompt(self, data: Dict[str, Any]) -> str:
         """Construye el prompt para análisis de la entrega"""
         
@@ -159,7 +186,7 @@ Proporciona:
 4. Sugerencias de mejora
 """
             
-            response = self.model.generate_content(prompt)
+            response = self._generate('analyze_text_answer', prompt)
             
             return {
                 'feedback': response.text,
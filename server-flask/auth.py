@@ -0,0 +1,78 @@
+"""
+Identidad y control de acceso compartidos por todas las rutas
+
+El token generado en el login lleva username/student_id/teacher_id, de modo que
+las rutas no necesitan consultar User/Student/Teacher en cada petición. Los
+tokens emitidos antes de este cambio se completan con una caché por proceso.
+"""
+import os
+from functools import wraps
+
+from flask import g, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from cache_service import TTLCache
+from instrumentation import auth_queries
+from models import db, User, Teacher, Student
+
+PROFILE_KEYS = ('username', 'student_id', 'teacher_id')
+
+identity_cache = TTLCache(ttl=int(os.environ.get('IDENTITY_CACHE_TTL', 60)))
+
+
+def load_profile(user_id):
+    """username e ids de perfil en una sola consulta"""
+    row = db.session.query(User.username, Student.id, Teacher.id).outerjoin(
+        Student, Student.user_id == User.id
+    ).outerjoin(
+        Teacher, Teacher.user_id == User.id
+    ).filter(User.id == user_id).first()
+    if not row:
+        return None
+    return {'username': row[0], 'student_id': row[1], 'teacher_id': row[2]}
+
+
+def identity_claims(user):
+    """Identidad que se guarda en el JWT al iniciar sesión"""
+    return {'user_id': user.id, 'role': user.role, **(load_profile(user.id) or {})}
+
+
+def current_identity():
+    """Identidad del token de la petición, completada con la caché si faltan claims"""
+    if 'identity' not in g:
+        identity = dict(get_jwt_identity() or {})
+        if identity and any(key not in identity for key in PROFILE_KEYS):
+            with auth_queries():
+                profile = identity_cache.get_or_load(identity['user_id'], lambda: load_profile(identity['user_id']))
+            for key, value in (profile or {}).items():
+                identity.setdefault(key, value)
+        g.identity = identity
+    return g.identity
+
+
+def current_user_id():
+    """Id del usuario del token, sin consultar la BD"""
+    return current_identity()['user_id']
+
+
+def role_required(role_name, inject_profile=False):
+    """
+    Decorator para requerir rol específico (admin siempre pasa).
+
+    Con inject_profile=True la vista recibe '<rol>_id' (student_id / teacher_id),
+    que es None si el usuario no tiene ese perfil.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            identity = current_identity()
+            if not identity:
+                return jsonify({'msg': 'missing identity'}), 401
+            if identity.get('role') != role_name and identity.get('role') != 'admin':
+                return jsonify({'msg': f'forbidden - role required: {role_name}'}), 403
+            if inject_profile:
+                kwargs[f'{role_name}_id'] = identity.get(f'{role_name}_id')
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
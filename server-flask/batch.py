@@ -0,0 +1,89 @@
+"""
+Peticiones de lectura agrupadas: varias rutas GET en una sola llamada HTTP
+
+    POST /api/batch
+    {'requests': [{'id': 'courses', 'path': '/api/student/courses'},
+                  {'id': 'grades', 'path': '/api/student/grades', 'etag': '"..."'}]}
+
+Cada subpetición recorre la app completa (app.wsgi_app) en un contexto de app
+propio, como si hubiera llegado por HTTP con las mismas cabeceras: verificación
+del JWT y de su revocación, admisión y @concurrency_limit, límites de tasa,
+instrumentación de consultas, métricas y perfilado. Tiene su propio g y su
+propia sesión de BD; la identidad se resuelve una vez por lote gracias a la
+caché de identidades de auth.py. Con 'etag' la subpetición lleva If-None-Match
+y puede responder 304 sin cuerpo.
+
+El propio lote no ocupa plaza en la cola de admisión ni consume el límite de
+tasa (admission.EXEMPT_ENDPOINTS): lo hacen sus subpeticiones, una tras otra,
+y un lote no puede bloquearse esperando la plaza que él mismo ocupa.
+
+Respuesta: {'responses': [{'id', 'status', 'etag', 'body'}]} en el mismo orden.
+El cuerpo JSON de cada ruta se copia tal cual, sin volver a parsearlo.
+"""
+import io
+import json
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from pydantic import ValidationError
+
+from schemas import BatchRequestSchema
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api')
+
+# Cabeceras de la petición del lote que no deben pasar a las subpeticiones
+DROPPED_ENVIRON_KEYS = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IDEMPOTENCY_KEY')
+
+
+def _environ(path, etag=None):
+    """Entorno WSGI de una subpetición GET con las cabeceras (Authorization...) de la del lote"""
+    path, _, query = path.partition('?')
+    environ = {
+        key: value for key, value in request.environ.items()
+        if key not in DROPPED_ENVIRON_KEYS and not key.startswith('werkzeug.')
+    }
+    environ.update({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'wsgi.input': io.BytesIO(), 'CONTENT_LENGTH': '0'
+    })
+    if etag:
+        environ['HTTP_IF_NONE_MATCH'] = etag
+    return environ
+
+
+def _dispatch(path, etag=None):
+    """Ejecuta una subpetición por la app completa y devuelve su respuesta"""
+    app = current_app._get_current_object()
+    # Contexto de app nuevo: el RequestContext de la subpetición no reutiliza el g ni la sesión del lote
+    with app.app_context():
+        return app.response_class.from_app(app.wsgi_app, _environ(path, etag), buffered=True)
+
+
+def _entry(item_id, response):
+    """JSON de una respuesta del lote con el cuerpo de la ruta insertado sin re-serializar"""
+    meta = {'id': item_id, 'status': response.status_code, 'etag': response.get_etag()[0]}
+    if response.status_code == 304:
+        body = b'null'
+    elif response.is_json:
+        body = response.get_data() or b'null'
+    else:
+        # Errores HTML de werkzeug (404, 405...) y descargas: solo el estado
+        if response.status_code < 400:
+            meta['status'] = 406
+        message = 'only JSON responses can be batched' if meta['status'] == 406 else response.status
+        body = current_app.json.dumps({'msg': message}).encode('utf-8')
+    return current_app.json.dumps(meta)[:-1].encode('utf-8') + b',"body":' + body + b'}'
+
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    """Varias lecturas en una llamada: {'requests': [{id, path, etag}]}"""
+    try:
+        items = BatchRequestSchema.model_validate(request.get_json() or {}).requests
+    except ValidationError as e:
+        return jsonify({'msg': 'validation error', 'errors': json.loads(e.json())}), 400
+
+    entries = [_entry(item.id or item.path, _dispatch(item.path, item.etag)) for item in items]
+    body = b'{"responses":[' + b','.join(entries) + b']}'
+    return current_app.response_class(body, mimetype='application/json')
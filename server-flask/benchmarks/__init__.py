@@ -0,0 +1,5 @@
+"""
+Benchmarks del backend. Ejecutar desde server-flask/, por ejemplo:
+
+    python -m benchmarks.bench_json
+"""
@@ -0,0 +1,123 @@
+"""
+Carga del panel del estudiante por HTTP real: cuatro GET separados (en serie y
+en paralelo, como haría el navegador) frente a un POST /api/batch (batch.py)
+con las mismas cuatro rutas.
+
+La app corre en un servidor werkzeug multihilo en 127.0.0.1 y el cliente usa
+conexiones HTTP/1.1 persistentes. En loopback el viaje de ida y vuelta casi no
+cuesta; --rtt-ms añade esa espera en el cliente por cada petición para estimar
+una red real (las peticiones en paralelo la solapan).
+
+    python -m benchmarks.bench_batch [--iterations 300] [--students 500] [--rtt-ms 0]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tempfile.mkdtemp(), "batch.db")}')
+os.environ['RATELIMIT_ENABLED'] = 'false'
+os.environ.setdefault('SQL_SLOW_QUERY_MS', '5000')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from auth import identity_claims  # noqa: E402
+from benchmarks.seed import SeedScale, seed  # noqa: E402
+from benchmarks.stats import format_row, summarize  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db, User  # noqa: E402
+
+DASHBOARD = ['/api/student/courses', '/api/student/assignments/pending', '/api/student/grades', '/api/notifications']
+
+
+class KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Client:
+    """Conexión persistente por hilo; rtt_ms simula la latencia de red de cada petición"""
+
+    def __init__(self, port, rtt_ms):
+        self.port = port
+        self.rtt = rtt_ms / 1000
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        if self.rtt:
+            time.sleep(self.rtt)
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        assert response.status == 200, (path, response.status, data[:200])
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=0)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    rng = random.Random(42)
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data = seed(SeedScale(students=args.students))
+        headers = [{'Authorization': 'Bearer ' + create_access_token(identity=identity_claims(db.session.get(User, user_id)))}
+                   for user_id in data.student_user_ids]
+        print(f'{db.engine.dialect.name}: {args.students} estudiantes, {args.iterations} cargas del panel, '
+              f'rtt {args.rtt_ms:g} ms')
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = Client(server.server_port, args.rtt_ms)
+    pool = ThreadPoolExecutor(len(DASHBOARD))
+    batch_body = json.dumps({'requests': [{'path': path} for path in DASHBOARD]})
+
+    serial, parallel, batched = [], [], []
+    try:
+        for _ in range(args.iterations):
+            auth = rng.choice(headers)
+
+            start = time.perf_counter()
+            for path in DASHBOARD:
+                client.request('GET', path, auth)
+            serial.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            list(pool.map(lambda path: client.request('GET', path, auth), DASHBOARD))
+            parallel.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            body = client.request('POST', '/api/batch', {**auth, 'Content-Type': 'application/json'}, batch_body)
+            batched.append((time.perf_counter() - start) * 1000)
+            assert all(entry['status'] == 200 for entry in json.loads(body)['responses'])
+    finally:
+        pool.shutdown()
+        server.shutdown()
+
+    print(format_row('4 GET en serie', summarize(serial)))
+    print(format_row('4 GET en paralelo', summarize(parallel)))
+    print(format_row('POST /api/batch', summarize(batched)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Pico de entregas con lecturas de fondo: latencia de las entregas con y sin la
+cola de admisión por prioridad (admission.py).
+
+Hilos lectores piden /api/teacher/submissions sin parar mientras otros hilos
+entregan tareas pendientes. Con --max-concurrent 0 no hay control de admisión;
+con un valor > 0 las lecturas esperan menos y se descartan (503) antes que las
+entregas. Los límites de tasa por usuario se desactivan para medir solo la cola.
+
+    python -m benchmarks.bench_burst --max-concurrent 0
+    python -m benchmarks.bench_burst --max-concurrent 4 [--queue-size 8] [--readers 24] [--submitters 8]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+import structlog
+
+from benchmarks.seed import SeedScale, answer_payload, seed
+from benchmarks.stats import format_row, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-concurrent', type=int, default=4)
+    parser.add_argument('--queue-size', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=24)
+    parser.add_argument('--submitters', type=int, default=8)
+    parser.add_argument('--submissions', type=int, default=200)
+    parser.add_argument('--students', type=int, default=300)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(workdir, "burst.db")}')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ.setdefault('SQL_SLOW_QUERY_MS', '5000')
+    os.environ['ADMISSION_MAX_CONCURRENT'] = str(args.max_concurrent)
+    os.environ['ADMISSION_QUEUE_SIZE'] = str(args.queue_size)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    from flask_jwt_extended import create_access_token
+    from auth import identity_claims
+    from main import create_app
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data = seed(SeedScale(students=args.students))
+        token = lambda user_id: {'Authorization': 'Bearer ' + create_access_token(identity=identity_claims(db.session.get(User, user_id)))}
+        students = dict(zip(data.student_ids, map(token, data.student_user_ids)))
+        teachers = [token(user_id) for user_id in data.teacher_user_ids]
+
+    rng = random.Random(42)
+    pending = list(data.pending)
+    rng.shuffle(pending)
+    pending = pending[:args.submissions]
+    lock = threading.Lock()
+    stop = threading.Event()
+    submit_latencies = []
+    read_latencies = []
+    counts = {'read_ok': 0, 'read_503': 0, 'submit_503': 0}
+
+    def reader():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            r = client.get('/api/teacher/submissions', headers=rng.choice(teachers))
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if r.status_code == 503:
+                    counts['read_503'] += 1
+                else:
+                    counts['read_ok'] += 1
+                    read_latencies.append(elapsed)
+
+    def submitter():
+        client = app.test_client()
+        local_rng = random.Random()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                student_id, assignment_id = pending.pop()
+            answers = [answer_payload(local_rng, qid, qtype) for qid, qtype in data.questions[assignment_id]]
+            start = time.perf_counter()
+            r = client.post(f'/api/assignments/{assignment_id}/submit', json={'answers': answers},
+                            headers=students[student_id])
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if r.status_code == 503:
+                    counts['submit_503'] += 1
+                else:
+                    submit_latencies.append(elapsed)
+
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in readers:
+        t.start()
+    time.sleep(0.5)
+    submitters = [threading.Thread(target=submitter) for _ in range(args.submitters)]
+    start = time.perf_counter()
+    for t in submitters:
+        t.start()
+    for t in submitters:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in readers:
+        t.join()
+
+    mode = f'admisión {args.max_concurrent}+{args.queue_size}' if args.max_concurrent else 'sin admisión'
+    print(f'{mode}: {args.readers} lectores, {args.submitters} hilos de entrega, {len(submit_latencies)} entregas en {elapsed:.1f} s')
+    print(format_row('submit_assignment', summarize(submit_latencies)) + f'   503: {counts["submit_503"]}')
+    if read_latencies:
+        print(format_row('get_teacher_submissions', summarize(read_latencies)) + f'   503: {counts["read_503"]}')
+
+
+if __name__ == '__main__':
+    main()
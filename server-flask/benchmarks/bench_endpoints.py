@@ -0,0 +1,181 @@
+"""
+Benchmarks por escenario de los endpoints más usados sobre datos sembrados con
+benchmarks.seed: latencia p50/p95/p99 y consultas SQL por iteración.
+
+GeminiAIService se sustituye por un modelo falso (--ai-latency simula su
+retraso), así que no se hacen llamadas externas. Usa SQLite en memoria salvo que
+se defina DATABASE_URL (las tablas se borran y se recrean).
+
+    python -m benchmarks.bench_endpoints [--students 500] [--iterations 200]
+    python -m benchmarks.bench_endpoints --save-baseline baseline.json
+    python -m benchmarks.bench_endpoints --baseline baseline.json [--tolerance 0.2]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+import structlog  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from ai_service import gemini_service  # noqa: E402
+from auth import identity_claims  # noqa: E402
+from instrumentation import count_queries  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db, User  # noqa: E402
+from reminder_service import reminder_service  # noqa: E402
+from benchmarks.seed import answer_payload, scale_arguments, scale_from_args, seed  # noqa: E402
+from benchmarks.stats import compare, format_row, save_baseline, summarize  # noqa: E402
+
+
+class StubGeminiModel:
+    """Sustituto de genai.GenerativeModel con respuesta fija y latencia configurable"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate_content(self, prompt, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(
+            text='Buen trabajo en general.\nCalificación: 8/10',
+            usage_metadata=SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=12)
+        )
+
+
+class Context:
+    def __init__(self, app, data, rng):
+        self.app = app
+        self.client = app.test_client()
+        self.data = data
+        self.rng = rng
+        self.pending = list(data.pending)
+        rng.shuffle(self.pending)
+        with app.app_context():
+            self.students = dict(zip(data.student_ids, self._headers(data.student_user_ids)))
+            self.teachers = self._headers(data.teacher_user_ids)
+
+    def _headers(self, user_ids):
+        return [
+            {'Authorization': 'Bearer ' + create_access_token(identity=identity_claims(db.session.get(User, user_id)))}
+            for user_id in user_ids
+        ]
+
+    def any_student(self):
+        return self.students[self.rng.choice(self.data.student_ids)]
+
+    def any_teacher(self):
+        return self.rng.choice(self.teachers)
+
+
+def _expect(response, status):
+    assert response.status_code == status, (response.status_code, response.get_data(as_text=True)[:200])
+
+
+def submit_assignment(ctx):
+    student_id, assignment_id = ctx.pending.pop()
+    answers = [answer_payload(ctx.rng, question_id, question_type)
+               for question_id, question_type in ctx.data.questions[assignment_id]]
+    _expect(ctx.client.post(f'/api/assignments/{assignment_id}/submit', json={'answers': answers},
+                            headers=ctx.students[student_id]), 201)
+
+
+def list_assignments(ctx):
+    _expect(ctx.client.get('/api/assignments', headers=ctx.any_student()), 200)
+
+
+def get_teacher_submissions(ctx):
+    _expect(ctx.client.get('/api/teacher/submissions', headers=ctx.any_teacher()), 200)
+
+
+def get_student_grades(ctx):
+    _expect(ctx.client.get('/api/student/grades', headers=ctx.any_student()), 200)
+
+
+def check_due_dates(ctx):
+    reminder_service.check_due_dates()
+
+
+# Nombre -> (función, fracción de --iterations); check_due_dates recorre toda la BD en cada llamada
+SCENARIOS = {
+    'submit_assignment': (submit_assignment, 1),
+    'list_assignments': (list_assignments, 1),
+    'get_teacher_submissions': (get_teacher_submissions, 1),
+    'get_student_grades': (get_student_grades, 1),
+    'check_due_dates': (check_due_dates, 0.02),
+}
+
+
+def run_scenario(ctx, fn, iterations, warmup):
+    for _ in range(warmup):
+        fn(ctx)
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        with count_queries() as stats:
+            start = time.perf_counter()
+            fn(ctx)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries += stats.count
+    summary = summarize(latencies)
+    summary['queries'] = queries / iterations
+    return summary
+
+
+def main():
+    parser = scale_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='lista separada por comas')
+    parser.add_argument('--ai-latency', type=float, default=0.0, help='segundos de retraso del modelo falso')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--baseline', metavar='PATH')
+    parser.add_argument('--metric', default='p95', choices=('mean', 'p50', 'p95', 'p99'))
+    parser.add_argument('--tolerance', type=float, default=0.2, help='regresión relativa permitida (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    gemini_service.model = StubGeminiModel(args.ai_latency)
+    # Los logs de instrumentation.py (request_queries muestreado, slow_query) distorsionan la medida
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    scale = scale_from_args(args)
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        data = seed(scale)
+        dialect = db.engine.dialect.name
+        print(f'{dialect}: {len(data.student_ids)} estudiantes, {len(data.assignment_ids)} tareas, '
+              f'{data.submissions} entregas (sembrado en {time.perf_counter() - start:.1f} s)')
+
+    ctx = Context(app, data, random.Random(scale.seed))
+    results = {}
+    for name in args.scenarios.split(','):
+        fn, share = SCENARIOS[name]
+        iterations = max(3, int(args.iterations * share))
+        warmup = min(args.warmup, iterations // 3)
+        results[name] = run_scenario(ctx, fn, iterations, warmup)
+        print(format_row(name, results[name]) + f'   {results[name]["queries"]:7.1f} consultas')
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, meta={'scale': vars(scale), 'dialect': dialect})
+        print(f'línea base guardada en {args.save_baseline}')
+
+    if args.baseline:
+        regressions = 0
+        print(f'\ncomparación con {args.baseline} ({args.metric}, tolerancia {args.tolerance:.0%})')
+        for name, before, after, change, regressed in compare(args.baseline, results, args.metric, args.tolerance):
+            regressions += regressed
+            print(f'{name:<26} {before:8.2f} -> {after:8.2f} ms   {change:+7.1%}{"   REGRESIÓN" if regressed else ""}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
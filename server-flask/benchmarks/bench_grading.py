@@ -0,0 +1,80 @@
+"""
+Calificar --submissions entregas (300 por defecto) de un profesor: una petición
+por entrega (POST /api/submissions/<id>/grade) frente a un único lote
+(POST /api/submissions/grades, grading.py).
+
+    python -m benchmarks.bench_grading [--submissions 300] [--students 800]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+import structlog
+
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tempfile.mkdtemp(), "grading.db")}')
+os.environ['RATELIMIT_ENABLED'] = 'false'
+os.environ.setdefault('SQL_SLOW_QUERY_MS', '5000')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from auth import identity_claims  # noqa: E402
+from benchmarks.seed import SeedScale, seed  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db, User, Teacher, Course, CourseSubject, Assignment, Submission  # noqa: E402
+
+
+def teacher_submissions(limit):
+    """(user_id del profesor, ids de sus entregas) del profesor con más entregas"""
+    owner = (select(Teacher.user_id, Submission.id)
+             .join(Course, Course.teacher_id == Teacher.id)
+             .join(CourseSubject, CourseSubject.course_id == Course.id)
+             .join(Assignment, Assignment.course_subject_id == CourseSubject.id)
+             .join(Submission, Submission.assignment_id == Assignment.id)).subquery()
+    user_id = db.session.execute(
+        select(owner.c.user_id).group_by(owner.c.user_id).order_by(func.count().desc()).limit(1)
+    ).scalar()
+    ids = db.session.execute(select(owner.c.id).where(owner.c.user_id == user_id).limit(limit)).scalars().all()
+    return user_id, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--submissions', type=int, default=300)
+    parser.add_argument('--students', type=int, default=800)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    rng = random.Random(42)
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(SeedScale(students=args.students))
+        user_id, submission_ids = teacher_submissions(args.submissions)
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity=identity_claims(db.session.get(User, user_id)))}
+        print(f'{db.engine.dialect.name}: {len(submission_ids)} entregas de un profesor')
+
+    client = app.test_client()
+    grades = [{'submission_id': submission_id, 'final_score': round(rng.uniform(0, 100), 1),
+               'ai_feedback': f'Comentario {submission_id}'} for submission_id in submission_ids]
+
+    start = time.perf_counter()
+    for grade in grades:
+        r = client.post(f'/api/submissions/{grade["submission_id"]}/grade', json=grade, headers=headers)
+        assert r.status_code == 200, r.get_json()
+    single = time.perf_counter() - start
+    print(f'una petición por entrega: {single * 1000:.0f} ms ({single / len(grades) * 1000:.2f} ms/entrega)')
+
+    start = time.perf_counter()
+    r = client.post('/api/submissions/grades', json={'grades': grades}, headers=headers)
+    assert r.status_code == 200, r.get_json()
+    bulk = time.perf_counter() - start
+    print(f'lote único: {bulk * 1000:.0f} ms ({single / bulk:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
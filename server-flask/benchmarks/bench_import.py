@@ -0,0 +1,108 @@
+"""
+Throughput de importación masiva contra el camino de una petición por fila.
+
+Usa SQLite en memoria por defecto (DATABASE_URL para Postgres). El hash de
+contraseñas se hace con bcrypt de 4 rondas para medir la BD y no bcrypt.
+
+    python -m benchmarks.bench_import [--users 5000] [--questions 500]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from passlib.hash import bcrypt  # noqa: E402
+
+from imports import import_assignment, import_roster  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db, User, Student, Course, Subject, CourseSubject, Assignment, Question, QuestionOption  # noqa: E402
+
+fast_hash = bcrypt.using(rounds=4).hash
+
+
+def roster(prefix, n):
+    return {'users': [{
+        'username': f'{prefix}{i}',
+        'email': f'{prefix}{i}@bench.example.com',
+        'password': 'Benchmark1',
+        'role': 'student'
+    } for i in range(n)]}
+
+
+def question_bank(course_subject_id, n):
+    return {
+        'course_subject_id': course_subject_id,
+        'title': 'Banco de preguntas',
+        'type': 'exam',
+        'questions': [{
+            'text': f'Pregunta {i}',
+            'type': 'single_choice',
+            'options': [{'option_text': f'Opción {j}', 'is_correct': j == 0} for j in range(4)]
+        } for i in range(n)]
+    }
+
+
+def per_row_roster(data):
+    """Equivalente a main.register: dos commits por usuario"""
+    for u in data['users']:
+        user = User(username=u['username'], email=u['email'], password_hash=fast_hash(u['password']), role=u['role'])
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(Student(user_id=user.id))
+        db.session.commit()
+
+
+def per_row_questions(data):
+    """Equivalente a main.add_question: un commit por pregunta y otro por sus opciones"""
+    assignment = Assignment(course_subject_id=data['course_subject_id'], title=data['title'], type=data['type'])
+    db.session.add(assignment)
+    db.session.commit()
+    for q in data['questions']:
+        question = Question(assignment_id=assignment.id, text=q['text'], type=q['type'])
+        db.session.add(question)
+        db.session.commit()
+        for opt in q['options']:
+            db.session.add(QuestionOption(question_id=question.id, option_text=opt['option_text'], is_correct=opt['is_correct']))
+        db.session.commit()
+
+
+def timed(label, fn, rows):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed:8.3f} s   {rows / elapsed:10.0f} filas/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--questions', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        course = Course(name='Bench')
+        subject = Subject(name='Bench')
+        db.session.add_all([course, subject])
+        db.session.flush()
+        link = CourseSubject(course_id=course.id, subject_id=subject.id)
+        db.session.add(link)
+        db.session.commit()
+
+        print(f'roster: {args.users} usuarios')
+        timed('por fila (register)', lambda: per_row_roster(roster('row', args.users)), args.users)
+        timed('import_roster', lambda: import_roster(roster('bulk', args.users), hasher=fast_hash), args.users)
+
+        print(f'banco de preguntas: {args.questions} preguntas x 4 opciones')
+        timed('por fila (add_question)', lambda: per_row_questions(question_bank(link.id, args.questions)), args.questions)
+        timed('import_assignment', lambda: import_assignment(question_bank(link.id, args.questions)), args.questions)
+
+        assert Student.query.count() == 2 * args.users
+
+
+if __name__ == '__main__':
+    main()
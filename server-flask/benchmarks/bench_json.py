@@ -0,0 +1,93 @@
+"""
+Microbenchmark de serialización: 10k entregas con el camino antiguo
+(conversión campo a campo + json estándar) contra serializer() + FastJSONProvider.
+
+    python -m benchmarks.bench_json [--rows 10000] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider, orjson
+from models import Assignment, Student, Submission, User
+from serializers import serializer
+
+
+teacher_submission_row = serializer('id', 'student_id', 'submission_date', 'status', 'ai_score', 'final_score',
+                                    assignment_title='assignment.title', assignment_type='assignment.type',
+                                    student_name='student.user.username')
+
+
+def build_rows(n):
+    assignment = Assignment(id=1, title='Examen parcial', type='exam')
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        student = Student(id=i, user=User(id=i, username=f'student{i}'))
+        rows.append(Submission(
+            id=i, assignment=assignment, student=student, student_id=i,
+            submission_date=now - timedelta(minutes=i), status='graded',
+            ai_score=Decimal('71.5'), final_score=Decimal(i % 100)
+        ))
+    return rows
+
+
+def legacy(rows):
+    result = []
+    for sub in rows:
+        student_name = sub.student.user.username if sub.student and sub.student.user else 'Unknown'
+        result.append({
+            'id': sub.id,
+            'assignment_title': sub.assignment.title,
+            'assignment_type': sub.assignment.type,
+            'student_name': student_name,
+            'student_id': sub.student_id,
+            'submission_date': sub.submission_date.isoformat(),
+            'status': sub.status,
+            'ai_score': float(sub.ai_score) if sub.ai_score else None,
+            'final_score': float(sub.final_score) if sub.final_score else None
+        })
+    return result
+
+
+def fast(rows):
+    return [teacher_submission_row(sub) for sub in rows]
+
+
+def measure(label, app, build, rows, repeat):
+    timings = []
+    with app.app_context():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = app.json.response(build(rows)).get_data()
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f'{label:<28} median {statistics.median(timings):8.2f} ms   min {min(timings):8.2f} ms   {len(body) / 1024:.0f} KiB')
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+
+    legacy_app = Flask('legacy')
+    legacy_app.json = DefaultJSONProvider(legacy_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+
+    print(f'{args.rows} filas, {args.repeat} repeticiones, orjson={"sí" if orjson else "no"}')
+    before = measure('legacy (float/isoformat)', legacy_app, legacy, rows, args.repeat)
+    after = measure('serializer + FastJSON', fast_app, fast, rows, args.repeat)
+    print(f'speedup x{before / after:.2f}')
+
+
+if __name__ == '__main__':
+    main()
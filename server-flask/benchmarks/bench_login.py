@@ -0,0 +1,70 @@
+"""
+Carga de login concurrente: hash en el hilo de la petición contra el pool de procesos.
+
+    python -m benchmarks.bench_login [--users 50] [--concurrency 16] [--logins 200] [--rounds 10]
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from main import create_app  # noqa: E402
+from models import db  # noqa: E402
+from imports import import_roster  # noqa: E402
+from password_service import password_service  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+PASSWORD = 'Benchmark1'
+
+
+def run(app, users, concurrency, logins):
+    def login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        r = client.post('/api/auth/login', json={'username': f'login{i % users}', 'password': PASSWORD})
+        assert r.status_code == 200, r.get_json()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    return logins / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['BCRYPT_ROUNDS'] = args.rounds
+    app.config['PASSWORD_HASH_QUEUE'] = max(4, args.concurrency)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        password_service.init_app(app)
+        import_roster({'users': [{
+            'username': f'login{i}', 'email': f'login{i}@bench.example.com', 'password': PASSWORD, 'role': 'student'
+        } for i in range(args.users)]})
+
+    print(f'{args.logins} logins, concurrencia {args.concurrency}, bcrypt rounds {args.rounds}')
+    for label, workers in (('en el hilo de la petición', 0), (f'pool de {args.workers} procesos', args.workers)):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        password_service.shutdown()
+        password_service.init_app(app)
+        throughput, latencies = run(app, args.users, args.concurrency, args.logins)
+        print(f'{label:<28} {throughput:7.1f} login/s   p50 {statistics.median(latencies):7.1f} ms   '
+              f'p95 {percentile(latencies, 95):7.1f} ms   p99 {percentile(latencies, 99):7.1f} ms')
+    password_service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Detección de copias con MinHash + LSH sobre --answers respuestas de texto
+(100k por defecto) repartidas entre --questions preguntas de una tarea.
+
+Genera ensayos aleatorios y planta copias con pequeñas ediciones (--copy-rate).
+Mide el indexado (firmas + cubetas), el cálculo de los grupos y cuántas copias
+plantadas se detectan, y compara con la comparación exacta de todos los pares
+de una muestra (--brute-sample), extrapolada al total.
+
+    python -m benchmarks.bench_similarity [--answers 100000] [--questions 20] [--copy-rate 0.02]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+import structlog
+from sqlalchemy import insert
+
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tempfile.mkdtemp(), "similarity.db")}')
+os.environ.setdefault('SQL_SLOW_QUERY_MS', '60000')
+
+from main import create_app  # noqa: E402
+from models import db, User, Student, Assignment, Question, Submission, Answer  # noqa: E402
+from search import tokenize  # noqa: E402
+from similarity import SHINGLE_SIZE, similarity_service  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+def make_vocabulary(rng, size=5000):
+    syllables = ['ma', 'te', 'ri', 'so', 'lu', 'ca', 'ne', 'dor', 'pro', 'gra', 'ción', 'tra', 'es', 'vi', 'bal']
+    return list({''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(size * 2)})[:size]
+
+
+def make_essay(rng, vocabulary):
+    return ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(40, 120)))
+
+
+def make_copy(rng, text, vocabulary, edit_rate=0.05):
+    """Copia con algunas palabras cambiadas y alguna añadida al final"""
+    words = [rng.choice(vocabulary) if rng.random() < edit_rate else word for word in text.split()]
+    return ' '.join(words + [rng.choice(vocabulary) for _ in range(rng.randint(0, 3))])
+
+
+def shingle_set(text):
+    tokens = tokenize(text)
+    return {tuple(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a, b):
+    a, b = shingle_set(a), shingle_set(b)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def populate(rng, answers, questions, copy_rate):
+    """Inserta estudiantes, entregas y respuestas; devuelve (assignment_id, {copia: original})"""
+    students = answers // questions
+    vocabulary = make_vocabulary(rng)
+    assignment = Assignment(title='Ensayos', type='essay')
+    db.session.add(assignment)
+    db.session.flush()
+    question_ids = db.session.execute(insert(Question).returning(Question.id, sort_by_parameter_order=True), [
+        {'assignment_id': assignment.id, 'text': f'Pregunta {i}', 'type': 'long_answer'} for i in range(questions)
+    ]).scalars().all()
+    user_ids = db.session.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+        {'username': f'sim{i}', 'email': f'sim{i}@bench.example.com', 'password_hash': 'x', 'role': 'student'}
+        for i in range(students)
+    ]).scalars().all()
+    student_ids = db.session.execute(insert(Student).returning(Student.id, sort_by_parameter_order=True), [
+        {'user_id': user_id} for user_id in user_ids
+    ]).scalars().all()
+    submission_ids = db.session.execute(insert(Submission).returning(Submission.id, sort_by_parameter_order=True), [
+        {'assignment_id': assignment.id, 'student_id': student_id, 'status': 'pending'} for student_id in student_ids
+    ]).scalars().all()
+
+    rows = []
+    planted = {}
+    texts = {question_id: [] for question_id in question_ids}
+    for submission_id in submission_ids:
+        for question_id in question_ids:
+            previous = texts[question_id]
+            if previous and rng.random() < copy_rate:
+                source_index = rng.randrange(len(previous))
+                text = make_copy(rng, previous[source_index][1], vocabulary)
+                planted[len(rows)] = previous[source_index][0]
+            else:
+                text = make_essay(rng, vocabulary)
+            previous.append((len(rows), text))
+            rows.append({'submission_id': submission_id, 'question_id': question_id, 'text_answer': text})
+
+    answer_ids = []
+    for start in range(0, len(rows), BATCH_SIZE):
+        answer_ids.extend(db.session.execute(
+            insert(Answer).returning(Answer.id, sort_by_parameter_order=True), rows[start:start + BATCH_SIZE]
+        ).scalars().all())
+    db.session.commit()
+    planted = {answer_ids[copy]: answer_ids[source] for copy, source in planted.items()}
+    sample = [answer_ids[index] for index, _ in texts[question_ids[0]]]
+    return assignment.id, planted, {answer_ids[i]: rows[i]['text_answer'] for i in range(len(rows))}, sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--answers', type=int, default=100000)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--copy-rate', type=float, default=0.02)
+    parser.add_argument('--brute-sample', type=int, default=1500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    rng = random.Random(args.seed)
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        assignment_id, planted, texts, sample = populate(rng, args.answers, args.questions, args.copy_rate)
+        print(f'{db.engine.dialect.name}: {len(texts)} respuestas, {len(planted)} copias plantadas '
+              f'(generado en {time.perf_counter() - start:.1f} s)')
+
+        start = time.perf_counter()
+        indexed = similarity_service.ensure_indexed(assignment_id)
+        elapsed = time.perf_counter() - start
+        print(f'indexado: {indexed} firmas en {elapsed:.1f} s ({indexed / elapsed:,.0f} respuestas/s)')
+
+        start = time.perf_counter()
+        clusters = similarity_service.clusters(assignment_id)
+        elapsed = time.perf_counter() - start
+        cluster_of = {answer_id: i for i, cluster in enumerate(clusters) for answer_id in cluster['answer_ids']}
+        found = sum(1 for copy, source in planted.items() if copy in cluster_of and cluster_of.get(source) == cluster_of[copy])
+        grouped = sum(len(cluster['answer_ids']) for cluster in clusters)
+        print(f'grupos: {len(clusters)} con {grouped} respuestas en {elapsed:.2f} s; '
+              f'copias detectadas {found}/{len(planted)} ({found / max(1, len(planted)):.1%})')
+
+        # Las ediciones bajan la similitud real de algunas copias por debajo del umbral
+        threshold = similarity_service.threshold
+        similar = [copy for copy, source in planted.items() if jaccard(texts[copy], texts[source]) >= threshold]
+        found_similar = sum(1 for copy in similar if copy in cluster_of and cluster_of.get(planted[copy]) == cluster_of[copy])
+        print(f'copias con Jaccard real >= {threshold}: {found_similar}/{len(similar)} detectadas '
+              f'({found_similar / max(1, len(similar)):.1%})')
+
+    # Comparación exacta de todos los pares de una muestra de la primera pregunta
+    sample = sample[:args.brute_sample]
+    shingles = [shingle_set(texts[answer_id]) for answer_id in sample]
+    start = time.perf_counter()
+    pairs = 0
+    for i in range(len(shingles)):
+        for j in range(i + 1, len(shingles)):
+            len(shingles[i] & shingles[j]) / (len(shingles[i] | shingles[j]) or 1)
+            pairs += 1
+    elapsed = time.perf_counter() - start
+    per_question = args.answers // args.questions
+    total_pairs = args.questions * per_question * (per_question - 1) // 2
+    print(f'todos los pares: {pairs:,} en {elapsed:.1f} s; extrapolado a {total_pairs:,} pares: '
+          f'{elapsed / pairs * total_pairs / 60:.0f} min')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Subida y descarga de archivos grandes: throughput, memoria pico, reanudación,
+deduplicación y peticiones Range.
+
+Genera un archivo aleatorio de --size-mb (200 MB por defecto) en disco y lo
+sube por bloques de --chunk-mb con PATCH /api/uploads/<id>. El pico de memoria
+del proceso no debería crecer con el tamaño del archivo.
+
+    python -m benchmarks.bench_upload [--size-mb 200] [--chunk-mb 16]
+"""
+import argparse
+import logging
+import os
+import resource
+import tempfile
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+import structlog  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from auth import identity_claims  # noqa: E402
+from main import create_app  # noqa: E402
+from models import db, User  # noqa: E402
+
+MB = 1024 * 1024
+
+
+class LimitedReader:
+    """Ventana de n bytes de un archivo abierto (el cuerpo de un PATCH), sin leerla a memoria"""
+
+    def __init__(self, f, n):
+        self.f = f
+        self.start = f.tell()
+        self.length = n
+        self.remaining = n
+
+    def tell(self):
+        return self.length - self.remaining
+
+    def seek(self, offset, whence=0):
+        position = offset if whence == 0 else self.length + offset if whence == 2 else self.tell() + offset
+        self.f.seek(self.start + position)
+        self.remaining = self.length - position
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_file(path, size):
+    with open(path, 'wb') as f:
+        for _ in range(size // MB):
+            f.write(os.urandom(MB))
+        f.write(os.urandom(size % MB))
+
+
+def upload(client, headers, path, size, chunk, stop_at=None):
+    """Sube el archivo por bloques; con stop_at se interrumpe ahí y se reanuda con HEAD"""
+    r = client.post('/api/uploads', json={'filename': os.path.basename(path), 'size': size}, headers=headers)
+    upload_id = r.get_json()['id']
+    offset = 0
+    with open(path, 'rb') as f:
+        while offset < size:
+            if stop_at is not None and offset >= stop_at:
+                stop_at = None
+                offset = int(client.head(f'/api/uploads/{upload_id}', headers=headers).headers['Upload-Offset'])
+                f.seek(offset)
+            n = min(chunk, size - offset)
+            r = client.patch(f'/api/uploads/{upload_id}', input_stream=LimitedReader(f, n), headers={
+                **headers, 'Upload-Offset': str(offset),
+                'Content-Type': 'application/offset+octet-stream'
+            })
+            assert r.status_code in (200, 202), r.get_json()
+            offset = int(r.headers['Upload-Offset'])
+    return r.get_json()
+
+
+def download(client, headers, url, range_header=None):
+    if range_header:
+        headers = {**headers, 'Range': range_header}
+    r = client.get(url, headers=headers, buffered=False)
+    total = 0
+    for chunk in r.response:
+        total += len(chunk)
+    r.close()
+    return r.status_code, total
+
+
+def timed(label, fn, size=None):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    rate = f'   {size / MB / elapsed:8.1f} MB/s' if size else ''
+    print(f'{label:<30} {elapsed:8.3f} s{rate}   pico RSS {peak_rss_mb():7.1f} MB')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--chunk-mb', type=int, default=16)
+    args = parser.parse_args()
+    size = args.size_mb * MB
+    chunk = args.chunk_mb * MB
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['UPLOAD_DIR'] = os.path.join(workdir, 'store')
+        app = create_app()
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            user = User(username='uploader', email='uploader@bench.example.com', password_hash='x', role='student')
+            db.session.add(user)
+            db.session.commit()
+            headers = {'Authorization': 'Bearer ' + create_access_token(identity=identity_claims(user))}
+        client = app.test_client()
+
+        source = os.path.join(workdir, 'source.bin')
+        make_file(source, size)
+        print(f'archivo de {args.size_mb} MB, bloques de {args.chunk_mb} MB; pico RSS inicial {peak_rss_mb():.1f} MB')
+
+        result = timed('subida', lambda: upload(client, headers, source, size, chunk), size)
+        timed('subida interrumpida + reanudada', lambda: upload(client, headers, source, size, chunk, stop_at=size // 2), size)
+        objects = sum(len(files) for _, _, files in os.walk(os.path.join(workdir, 'store', 'objects')))
+        print(f'objetos almacenados tras subir dos veces el mismo contenido: {objects}')
+
+        url = result['content_url']
+        status, total = timed('descarga completa', lambda: download(client, headers, url), size)
+        assert status == 200 and total == size
+        status, total = timed('descarga Range (último MB)', lambda: download(client, headers, url, f'bytes={size - MB}-'))
+        assert status == 206 and total == MB
+
+
+if __name__ == '__main__':
+    main()
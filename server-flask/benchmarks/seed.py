@@ -0,0 +1,224 @@
+"""
+Generador de datos reproducible: profesores, estudiantes, cursos, asignaturas,
+tareas con preguntas y entregas con respuestas, a la escala indicada.
+
+Usa DATABASE_URL (SQLite o Postgres local). La semilla fija hace que dos
+ejecuciones con los mismos parámetros generen exactamente los mismos datos.
+
+    python -m benchmarks.seed --reset [--students 1000] [--courses 20] [--seed 42]
+"""
+import argparse
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from passlib.hash import bcrypt
+from sqlalchemy import insert
+
+from models import (
+    db, User, Teacher, Student, Course, Subject, CourseSubject, Assignment, Question, QuestionOption,
+    Submission, Answer
+)
+
+PASSWORD = 'Benchmark1'
+BATCH_SIZE = 1000
+QUESTION_TYPES = ('single_choice', 'multiple_choice', 'long_answer')
+TEXT_QUESTION_TYPES = ('short_answer', 'long_answer')
+
+
+@dataclass
+class SeedScale:
+    teachers: int = 10
+    students: int = 500
+    courses: int = 20
+    subjects_per_course: int = 3
+    assignments_per_subject: int = 4
+    questions_per_assignment: int = 10
+    submission_rate: float = 0.6
+    seed: int = 42
+
+
+@dataclass
+class SeedResult:
+    teacher_user_ids: list = field(default_factory=list)
+    student_user_ids: list = field(default_factory=list)
+    student_ids: list = field(default_factory=list)
+    assignment_ids: list = field(default_factory=list)
+    questions: dict = field(default_factory=dict)
+    pending: list = field(default_factory=list)
+    submissions: int = 0
+
+
+def _insert(model, rows, returning=None):
+    ids = []
+    for start in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[start:start + BATCH_SIZE]
+        if returning is None:
+            db.session.execute(insert(model), chunk)
+        else:
+            ids.extend(db.session.execute(
+                insert(model).returning(returning, sort_by_parameter_order=True), chunk
+            ).scalars().all())
+    return ids
+
+
+def _users(prefix, n, role, password_hash):
+    return [{
+        'username': f'{prefix}{i}',
+        'email': f'{prefix}{i}@bench.example.com',
+        'password_hash': password_hash,
+        'role': role
+    } for i in range(n)]
+
+
+def seed(scale=None):
+    """
+    Inserta el conjunto de datos en la BD de la app actual (requiere app context).
+
+    Returns:
+        SeedResult con los ids generados y los pares (student_id, assignment_id) sin entrega
+    """
+    scale = scale or SeedScale()
+    rng = random.Random(scale.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = bcrypt.using(rounds=4).hash(PASSWORD)
+    result = SeedResult()
+
+    result.teacher_user_ids = _insert(User, _users('teacher', scale.teachers, 'teacher', password_hash), User.id)
+    result.student_user_ids = _insert(User, _users('student', scale.students, 'student', password_hash), User.id)
+    teacher_ids = _insert(Teacher, [{'user_id': uid} for uid in result.teacher_user_ids], Teacher.id)
+    result.student_ids = _insert(Student, [{'user_id': uid} for uid in result.student_user_ids], Student.id)
+
+    course_ids = _insert(Course, [{
+        'name': f'Curso {i}',
+        'description': f'Curso de prueba {i}',
+        'teacher_id': teacher_ids[i % len(teacher_ids)]
+    } for i in range(scale.courses)], Course.id)
+    subject_ids = _insert(Subject, [{
+        'name': f'Asignatura {i}', 'description': None
+    } for i in range(scale.courses * scale.subjects_per_course)], Subject.id)
+    link_ids = _insert(CourseSubject, [{
+        'course_id': course_ids[i // scale.subjects_per_course], 'subject_id': subject_id
+    } for i, subject_id in enumerate(subject_ids)], CourseSubject.id)
+
+    # Un tercio de las tareas vence en las próximas 24 h para ejercitar check_due_dates
+    assignment_rows = []
+    for link_id in link_ids:
+        for i in range(scale.assignments_per_subject):
+            due_in = timedelta(hours=rng.randint(1, 23)) if rng.random() < 1 / 3 else timedelta(days=rng.randint(-30, 30))
+            assignment_rows.append({
+                'course_subject_id': link_id,
+                'title': f'Tarea {link_id}-{i}',
+                'description': 'Tarea generada para benchmarks',
+                'due_date': now + due_in,
+                'type': rng.choice(('task', 'exam', 'quiz')),
+                'questions_count': scale.questions_per_assignment,
+                'total_points': scale.questions_per_assignment
+            })
+    result.assignment_ids = _insert(Assignment, assignment_rows, Assignment.id)
+
+    question_rows = [{
+        'assignment_id': assignment_id,
+        'text': f'Pregunta {i}',
+        'type': QUESTION_TYPES[i % len(QUESTION_TYPES)],
+        'required': True,
+        'order_index': i,
+        'points': 1
+    } for assignment_id in result.assignment_ids for i in range(scale.questions_per_assignment)]
+    question_ids = _insert(Question, question_rows, Question.id)
+
+    option_rows = []
+    for question_id, row in zip(question_ids, question_rows):
+        result.questions.setdefault(row['assignment_id'], []).append((question_id, row['type']))
+        if row['type'] not in TEXT_QUESTION_TYPES:
+            option_rows.extend({
+                'question_id': question_id, 'option_text': f'Opción {j}', 'is_correct': j == 0, 'order_index': j
+            } for j in range(4))
+    _insert(QuestionOption, option_rows)
+
+    submission_rows = []
+    for assignment_id in result.assignment_ids:
+        for student_id in result.student_ids:
+            if rng.random() < scale.submission_rate:
+                graded = rng.random() < 0.5
+                submission_rows.append({
+                    'assignment_id': assignment_id,
+                    'student_id': student_id,
+                    'submission_date': now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                    'status': 'graded' if graded else 'pending',
+                    'final_score': rng.randint(0, 100) if graded else None
+                })
+            else:
+                result.pending.append((student_id, assignment_id))
+    submission_ids = _insert(Submission, submission_rows, Submission.id)
+    result.submissions = len(submission_ids)
+
+    answer_rows = []
+    for submission_id, row in zip(submission_ids, submission_rows):
+        for question_id, question_type in result.questions[row['assignment_id']]:
+            answer_rows.append(answer_payload(rng, question_id, question_type, submission_id=submission_id))
+    _insert(Answer, answer_rows)
+
+    db.session.commit()
+    return result
+
+
+def answer_payload(rng, question_id, question_type, **extra):
+    """Respuesta aleatoria con el formato de submit_assignment"""
+    answer = {'question_id': question_id, 'selected_options': None, 'text_answer': None, 'numeric_answer': None}
+    if question_type in TEXT_QUESTION_TYPES:
+        answer['text_answer'] = ' '.join(rng.choice(('la', 'respuesta', 'es', 'correcta', 'porque', 'sí')) for _ in range(12))
+    else:
+        answer['selected_options'] = [rng.randint(0, 3)]
+    answer.update(extra)
+    return answer
+
+
+def scale_arguments(parser):
+    """Añadir al parser los parámetros de escala de SeedScale"""
+    defaults = SeedScale()
+    parser.add_argument('--teachers', type=int, default=defaults.teachers)
+    parser.add_argument('--students', type=int, default=defaults.students)
+    parser.add_argument('--courses', type=int, default=defaults.courses)
+    parser.add_argument('--subjects-per-course', type=int, default=defaults.subjects_per_course)
+    parser.add_argument('--assignments-per-subject', type=int, default=defaults.assignments_per_subject)
+    parser.add_argument('--questions-per-assignment', type=int, default=defaults.questions_per_assignment)
+    parser.add_argument('--submission-rate', type=float, default=defaults.submission_rate)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    return parser
+
+
+def scale_from_args(args):
+    return SeedScale(
+        teachers=args.teachers,
+        students=args.students,
+        courses=args.courses,
+        subjects_per_course=args.subjects_per_course,
+        assignments_per_subject=args.assignments_per_subject,
+        questions_per_assignment=args.questions_per_assignment,
+        submission_rate=args.submission_rate,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = scale_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument('--reset', action='store_true', help='borrar y recrear todas las tablas antes de sembrar')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///bench.db')
+    from main import create_app
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        result = seed(scale_from_args(args))
+        print(f'{len(result.teacher_user_ids)} profesores, {len(result.student_ids)} estudiantes, '
+              f'{len(result.assignment_ids)} tareas, {result.submissions} entregas')
+
+
+if __name__ == '__main__':
+    main()
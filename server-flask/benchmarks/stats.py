@@ -0,0 +1,52 @@
+"""
+Percentiles de latencia y comparación con una línea base guardada en JSON
+"""
+import json
+import statistics
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(latencies):
+    """Resumen en ms de una lista de latencias en ms"""
+    return {
+        'n': len(latencies),
+        'mean': statistics.fmean(latencies),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies),
+    }
+
+
+def format_row(name, summary):
+    return (f'{name:<26} n={summary["n"]:<5} mean {summary["mean"]:8.2f}   p50 {summary["p50"]:8.2f}   '
+            f'p95 {summary["p95"]:8.2f}   p99 {summary["p99"]:8.2f} ms')
+
+
+def save_baseline(path, results, meta=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta or {}, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def compare(path, results, metric='p95', tolerance=0.2):
+    """
+    Compara con la línea base guardada en path.
+
+    Returns:
+        Lista de (escenario, base, actual, cambio relativo, es_regresión)
+    """
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    rows = []
+    for name, summary in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name][metric]
+        after = summary[metric]
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change, change > tolerance))
+    return rows
@@ -0,0 +1,132 @@
+"""
+Caché de lectura de dos niveles: LRU en proceso + Redis opcional (Flask-Caching)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """LRU en memoria, seguro entre hilos del mismo proceso"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TTLCache:
+    """Caché por proceso con expiración corta (p.ej. datos de identidad)"""
+
+    def __init__(self, ttl=60, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._data[key] = (now + self.ttl, value)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheService:
+    def __init__(self, app=None):
+        self.local = LRUCache()
+        self.remote = None
+        self.timeout = 300
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar la caché; Redis solo se usa si CACHE_REDIS_URL está definido"""
+        app.config.setdefault('CACHE_LOCAL_MAXSIZE', int(os.environ.get('CACHE_LOCAL_MAXSIZE', 256)))
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300)))
+        app.config.setdefault('CACHE_REDIS_URL', os.environ.get('CACHE_REDIS_URL'))
+
+        self.local = LRUCache(app.config['CACHE_LOCAL_MAXSIZE'])
+        self.timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+        self.remote = None
+
+        if app.config['CACHE_REDIS_URL']:
+            from flask_caching import Cache
+
+            self.remote = Cache(app, config={
+                'CACHE_TYPE': 'RedisCache',
+                'CACHE_REDIS_URL': app.config['CACHE_REDIS_URL'],
+                'CACHE_DEFAULT_TIMEOUT': self.timeout,
+                'CACHE_KEY_PREFIX': 'edu:',
+            })
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self.remote is not None:
+            value = self.remote.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.remote is not None:
+            self.remote.set(key, value, timeout=self.timeout)
+
+    def get_or_load(self, key, loader):
+        """Read-through: devuelve el valor cacheado o lo carga y lo guarda"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, prefix):
+        """Descarta las entradas locales con el prefijo (las remotas expiran por versión/TTL)"""
+        self.local.delete_prefix(prefix)
+
+
+# Instancia global del servicio
+cache_service = CacheService()
@@ -0,0 +1,51 @@
+"""
+GET condicionales: ETag a partir de tokens de versión baratos (conteo + max(updated_at))
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+from sqlalchemy import func
+
+from models import db
+
+
+def table_version(model, *criteria):
+    """Token de versión de un alcance: (filas, última modificación) sin cargar las filas"""
+    query = db.session.query(func.count(model.id), func.max(model.updated_at))
+    if criteria:
+        query = query.filter(*criteria)
+    count, last_update = query.one()
+    return count, last_update.isoformat() if last_update else None
+
+
+def make_etag(*parts):
+    """ETag estable a partir de las partes del token"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def conditional_response(etag, build):
+    """Devuelve 304 si el cliente ya tiene la versión, si no construye la respuesta con su ETag"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_get(version_fn):
+    """Decorator: calcula el token con version_fn(**kwargs) antes de ejecutar la consulta completa"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            parts = version_fn(*args, **kwargs)
+            if parts is None:
+                return fn(*args, **kwargs)
+            etag = make_etag(request.full_path, parts)
+            return conditional_response(etag, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,140 @@
+"""
+Configuración del pool de conexiones y enrutamiento de lecturas a réplicas
+
+Las réplicas se declaran en DATABASE_REPLICA_URLS (separadas por comas) y se
+registran como binds 'replica_N'. Las peticiones GET de los blueprints marcados
+con route_reads_to_replicas() leen de una réplica sana; las escrituras (flush,
+INSERT/UPDATE/DELETE) y cualquier réplica con demasiado retraso van al primario.
+
+El motor se elige una vez por petición y se guarda en g: el token de versión
+de conditional_get y el cuerpo se leen en la misma conexión de la sesión, así
+que el ETag siempre describe los datos que se devuelven.
+"""
+import itertools
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+REPLICA_PREFIX = 'replica_'
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def configure_engines(app):
+    """Opciones del pool (solo para motores con QueuePool) y binds de réplicas"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = {'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1'}
+    if not uri.startswith('sqlite'):
+        options.update(
+            pool_size=_env_int('DB_POOL_SIZE', 10),
+            max_overflow=_env_int('DB_MAX_OVERFLOW', 20),
+            pool_timeout=_env_int('DB_POOL_TIMEOUT', 30),
+            pool_recycle=_env_int('DB_POOL_RECYCLE', 1800),
+        )
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', options)
+
+    replica_urls = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, url in enumerate(replica_urls):
+        binds[f'{REPLICA_PREFIX}{i}'] = url
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.config.setdefault('DATABASE_REPLICA_MAX_LAG', float(os.environ.get('DATABASE_REPLICA_MAX_LAG', 5)))
+    app.config.setdefault('DATABASE_REPLICA_CHECK_SECONDS', float(os.environ.get('DATABASE_REPLICA_CHECK_SECONDS', 10)))
+
+    app.extensions['replica_router'] = ReplicaRouter(
+        [key for key in binds if key.startswith(REPLICA_PREFIX)],
+        max_lag=app.config['DATABASE_REPLICA_MAX_LAG'],
+        check_seconds=app.config['DATABASE_REPLICA_CHECK_SECONDS'],
+    )
+
+
+def replica_lag(engine):
+    """Segundos de retraso de la réplica (0 si está al día o el motor no lo reporta)"""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            return float(conn.execute(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )).scalar())
+        conn.execute(text('SELECT 1'))
+        return 0.0
+
+
+class ReplicaRouter:
+    """
+    Round-robin entre réplicas sanas; el estado de retraso se cachea check_seconds.
+
+    La comprobación (una consulta a la réplica) se hace fuera del lock y solo en
+    un hilo por réplica; mientras tanto los demás usan el último estado conocido.
+    """
+
+    def __init__(self, names, max_lag=5, check_seconds=10):
+        self.names = names
+        self.max_lag = max_lag
+        self.check_seconds = check_seconds
+        self._healthy = {name: (False, float('-inf')) for name in names}
+        self._checking = set()
+        self._cycle = itertools.cycle(names) if names else None
+        self._lock = threading.Lock()
+
+    def _check(self, name, engine):
+        healthy = False
+        try:
+            healthy = replica_lag(engine) <= self.max_lag
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._healthy[name] = (healthy, time.monotonic())
+                self._checking.discard(name)
+        return healthy
+
+    def pick(self, engines):
+        """Motor de una réplica sana, o None para usar el primario"""
+        if not self.names:
+            return None
+        for _ in range(len(self.names)):
+            with self._lock:
+                name = next(self._cycle)
+                healthy, checked_at = self._healthy[name]
+                stale = time.monotonic() - checked_at >= self.check_seconds and name not in self._checking
+                if stale:
+                    self._checking.add(name)
+            if stale:
+                healthy = self._check(name, engines[name])
+            if healthy:
+                return engines[name]
+        return None
+
+
+def _wants_replica():
+    return has_request_context() and g.get('read_replica', False)
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que envía SELECTs de peticiones de solo lectura a réplicas"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _wants_replica() and getattr(clause, 'is_select', False):
+            if 'read_engine' not in g:
+                # Una sola elección por petición (None = primario)
+                router = current_app.extensions.get('replica_router')
+                g.read_engine = router.pick(self._db.engines) if router else None
+            if g.read_engine is not None:
+                return g.read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def route_reads_to_replicas(blueprint):
+    """Marcar las peticiones GET/HEAD del blueprint como de solo lectura"""
+    @blueprint.before_request
+    def _mark_read_only():
+        if request.method in ('GET', 'HEAD'):
+            g.read_replica = True
+    return blueprint
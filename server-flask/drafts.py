@@ -0,0 +1,358 @@
+"""
+Autoguardado de respuestas en curso (borradores) con escrituras agrupadas
+
+Cada guardado parcial se fusiona por pregunta en un búfer (memoria del proceso
+o Redis con DRAFT_REDIS_URL) y un hilo lo vuelca a la tabla drafts cada
+DRAFT_FLUSH_SECONDS en una sola transacción, así que muchos guardados de un
+mismo estudiante cuestan una escritura. Al entregar con {"from_draft": true}
+el borrador se convierte en las respuestas de la Submission.
+
+Volcados y entregas se serializan en cada proceso: take() espera a que termine
+el volcado en curso, saca del búfer lo pendiente de su clave y lo devuelve al
+búfer si la entrega hace rollback. El volcado bloquea las filas que fusiona
+(SELECT ... FOR UPDATE) y no crea borradores de tareas ya entregadas.
+
+El búfer en memoria es de cada proceso: una entrega en otro worker no vería
+sus guardados pendientes. Con varios workers hace falta Redis (búfer
+compartido) o DRAFT_FLUSH_SECONDS=0, que escribe cada guardado directamente en
+la tabla drafts (gunicorn.conf.py elige esto último si no hay DRAFT_REDIS_URL).
+Los guardados que llegan después de entregar se rechazan con 409; si aun así
+alguno llega al volcado (carrera con la entrega) se descarta con un aviso.
+"""
+import atexit
+import json
+import os
+import threading
+
+import structlog
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from admission import priority
+from auth import role_required
+from models import db, Assignment, Draft, Submission
+from schemas import AnswerSubmitSchema
+
+logger = structlog.get_logger()
+
+drafts_bp = Blueprint('drafts', __name__, url_prefix='/api')
+
+ANSWER_FIELDS = ('selected_options', 'text_answer', 'numeric_answer')
+
+
+def _normalize(answers):
+    """Lista de respuestas validadas -> {str(question_id): answer}"""
+    normalized = {}
+    for answer in answers:
+        parsed = AnswerSubmitSchema.model_validate(answer)
+        normalized[str(parsed.question_id)] = parsed.model_dump(exclude={'question_id'})
+    return normalized
+
+
+class MemoryDraftBuffer:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, answers):
+        with self._lock:
+            self._data.setdefault(key, {}).update(answers)
+
+    def get(self, key):
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+    def drain(self):
+        with self._lock:
+            data, self._data = self._data, {}
+        return data
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, {})
+
+    def restore(self, pending):
+        """Devolver al búfer lo que no se pudo volcar, sin pisar guardados más recientes"""
+        with self._lock:
+            for key, answers in pending.items():
+                self._data[key] = {**answers, **self._data.get(key, {})}
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisDraftBuffer:
+    DIRTY = 'drafts:dirty'
+    TTL = 7 * 24 * 3600
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _name(key):
+        return f'draft:{key[0]}:{key[1]}'
+
+    @staticmethod
+    def _key(name):
+        _, student_id, assignment_id = name.decode().split(':')
+        return int(student_id), int(assignment_id)
+
+    def add(self, key, answers):
+        name = self._name(key)
+        pipe = self.redis.pipeline()
+        pipe.hset(name, mapping={qid: json.dumps(a) for qid, a in answers.items()})
+        pipe.expire(name, self.TTL)
+        pipe.sadd(self.DIRTY, name)
+        pipe.execute()
+
+    def get(self, key):
+        return {qid.decode(): json.loads(a) for qid, a in self.redis.hgetall(self._name(key)).items()}
+
+    def drain(self, batch=1000):
+        names = self.redis.spop(self.DIRTY, batch) or []
+        if not names:
+            return {}
+        pipe = self.redis.pipeline(transaction=True)
+        for name in names:
+            pipe.hgetall(name)
+            pipe.delete(name)
+        results = pipe.execute()[::2]
+        return {
+            self._key(name): {qid.decode(): json.loads(a) for qid, a in fields.items()}
+            for name, fields in zip(names, results) if fields
+        }
+
+    def pop(self, key):
+        name = self._name(key)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(name)
+        pipe.delete(name)
+        pipe.srem(self.DIRTY, name)
+        fields = pipe.execute()[0]
+        return {qid.decode(): json.loads(a) for qid, a in fields.items()}
+
+    def restore(self, pending):
+        pipe = self.redis.pipeline()
+        for key, answers in pending.items():
+            name = self._name(key)
+            for qid, answer in answers.items():
+                pipe.hsetnx(name, qid, json.dumps(answer))
+            pipe.sadd(self.DIRTY, name)
+        pipe.execute()
+
+    def discard(self, key):
+        name = self._name(key)
+        pipe = self.redis.pipeline()
+        pipe.delete(name)
+        pipe.srem(self.DIRTY, name)
+        pipe.execute()
+
+
+class DraftService:
+    def __init__(self, app=None):
+        self.app = app
+        self.buffer = MemoryDraftBuffer()
+        self.flush_seconds = 5
+        self._stop = threading.Event()
+        self._thread = None
+        # Un volcado y una entrega del mismo proceso nunca se solapan
+        self._lock = threading.Lock()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el búfer y arrancar el hilo de volcado"""
+        self.app = app
+        app.config.setdefault('DRAFT_FLUSH_SECONDS', float(os.environ.get('DRAFT_FLUSH_SECONDS', 5)))
+        app.config.setdefault('DRAFT_REDIS_URL', os.environ.get('DRAFT_REDIS_URL'))
+
+        self.flush_seconds = app.config['DRAFT_FLUSH_SECONDS']
+        self.buffer = RedisDraftBuffer(app.config['DRAFT_REDIS_URL']) if app.config['DRAFT_REDIS_URL'] else MemoryDraftBuffer()
+
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+        if self._thread is None and not self.write_through:
+            self._thread = threading.Thread(target=self._run, name='draft-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    @property
+    def write_through(self):
+        """Sin volcado periódico: cada guardado va directo a la BD (varios workers sin Redis)"""
+        return self.flush_seconds <= 0
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self._flush_in_context()
+
+    def _flush_in_context(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error('draft_flush_failed', error=str(e))
+
+    def shutdown(self):
+        self._stop.set()
+        if self.app:
+            self._flush_in_context()
+
+    def save(self, student_id, assignment_id, answers):
+        """Fusiona respuestas parciales en el búfer (o en la BD); devuelve cuántas preguntas se guardaron"""
+        normalized = _normalize(answers)
+        if not normalized:
+            return 0
+        key = (student_id, assignment_id)
+        if not self.write_through:
+            self.buffer.add(key, normalized)
+            return len(normalized)
+        try:
+            self._write({key: normalized})
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker creó la fila a la vez: se reintenta fusionando sobre ella
+            db.session.rollback()
+            self._write({key: normalized})
+            db.session.commit()
+        return len(normalized)
+
+    def get(self, student_id, assignment_id):
+        """Borrador actual: lo ya volcado más lo pendiente en el búfer"""
+        draft = Draft.query.filter_by(student_id=student_id, assignment_id=assignment_id).first()
+        return {**(draft.answers if draft else {}), **self.buffer.get((student_id, assignment_id))}
+
+    def flush(self):
+        """Vuelca todos los borradores pendientes en una transacción; devuelve cuántos se escribieron"""
+        with self._lock:
+            pending = self.buffer.drain()
+            if not pending:
+                return 0
+            try:
+                written = self._write(pending)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.buffer.restore(pending)
+                raise
+            return written
+
+    def _write(self, pending):
+        """Fusiona pending en la tabla drafts (sin commit), con las filas bloqueadas"""
+        student_ids = {key[0] for key in pending}
+        assignment_ids = {key[1] for key in pending}
+        # FOR UPDATE: dos workers que vuelcan la misma clave no se pisan la fusión
+        rows = Draft.query.filter(
+            Draft.student_id.in_(student_ids), Draft.assignment_id.in_(assignment_ids)
+        ).with_for_update().all()
+        existing = {(d.student_id, d.assignment_id): d for d in rows}
+        # Después de los bloqueos, para ver las entregas que se confirmaron mientras se esperaba
+        submitted = set(db.session.query(Submission.student_id, Submission.assignment_id).filter(
+            Submission.student_id.in_(student_ids), Submission.assignment_id.in_(assignment_ids)
+        ).all())
+
+        written = 0
+        for key, answers in pending.items():
+            if key in submitted:
+                # Guardados que llegaron después de entregar: no se recrea el borrador
+                logger.warning('draft_discarded_after_submit', student_id=key[0], assignment_id=key[1],
+                               questions=len(answers))
+                continue
+            draft = existing.get(key)
+            if draft:
+                draft.answers = {**draft.answers, **answers}
+            else:
+                db.session.add(Draft(student_id=key[0], assignment_id=key[1], answers=answers))
+            written += 1
+        return written
+
+    def take(self, student_id, assignment_id, extra_answers=None):
+        """
+        Respuestas del borrador (más extra_answers) como lista para la entrega.
+
+        Borra la fila y saca la clave del búfer en la transacción actual (sin
+        commit); si esa transacción hace rollback, lo pendiente vuelve al búfer.
+        """
+        key = (student_id, assignment_id)
+        with self._lock:
+            draft = Draft.query.filter_by(student_id=student_id, assignment_id=assignment_id).with_for_update().first()
+            buffered = self.buffer.pop(key)
+            if buffered:
+                db.session.info.setdefault('drafts_taken', {})[key] = buffered
+        answers = {**(draft.answers if draft else {}), **buffered}
+        for answer in extra_answers or []:
+            answers[str(answer.get('question_id'))] = {field: answer.get(field) for field in ANSWER_FIELDS}
+        if draft:
+            db.session.delete(draft)
+            db.session.flush()
+        return [{'question_id': int(qid), **answer} for qid, answer in answers.items()]
+
+    def _after_commit(self, session):
+        session.info.pop('drafts_taken', None)
+
+    def _after_rollback(self, session):
+        taken = session.info.pop('drafts_taken', None)
+        if taken:
+            self.buffer.restore(taken)
+
+    def discard_buffer(self, student_id, assignment_id):
+        self.buffer.discard((student_id, assignment_id))
+
+
+# Instancia global del servicio
+draft_service = DraftService()
+
+
+def _answers_list(answers):
+    return [{'question_id': int(qid), **answer} for qid, answer in sorted(answers.items(), key=lambda item: int(item[0]))]
+
+
+@drafts_bp.route('/assignments/<int:assignment_id>/draft', methods=['GET'])
+@role_required('student', inject_profile=True)
+def get_draft(assignment_id, student_id):
+    """Borrador del estudiante para la tarea (para restaurar tras cerrar el navegador)"""
+    if not student_id:
+        return jsonify({'msg': 'student profile not found'}), 404
+    answers = draft_service.get(student_id, assignment_id)
+    return jsonify({'assignment_id': assignment_id, 'answers': _answers_list(answers)}), 200
+
+
+@drafts_bp.route('/assignments/<int:assignment_id>/draft', methods=['PATCH'])
+@priority('low')
+@role_required('student', inject_profile=True)
+def save_draft(assignment_id, student_id):
+    """Guardar respuestas parciales: {'answers': [{question_id, ...}]}; se vuelcan a la BD por lotes"""
+    if not student_id:
+        return jsonify({'msg': 'student profile not found'}), 404
+    answers = (request.get_json() or {}).get('answers')
+    if not isinstance(answers, list):
+        return jsonify({'msg': 'answers list required'}), 400
+    if not db.session.get(Assignment, assignment_id):
+        return jsonify({'msg': 'assignment not found'}), 404
+    if db.session.query(Submission.id).filter_by(student_id=student_id, assignment_id=assignment_id).first():
+        return jsonify({'msg': 'assignment already submitted'}), 409
+    try:
+        saved = draft_service.save(student_id, assignment_id, answers)
+    except ValidationError as e:
+        return jsonify({'msg': 'validation error', 'errors': json.loads(e.json())}), 400
+    return jsonify({'saved': saved}), 202
+
+
+@drafts_bp.route('/assignments/<int:assignment_id>/draft', methods=['DELETE'])
+@role_required('student', inject_profile=True)
+def discard_draft(assignment_id, student_id):
+    """Descartar el borrador"""
+    if not student_id:
+        return jsonify({'msg': 'student profile not found'}), 404
+    Draft.query.filter_by(student_id=student_id, assignment_id=assignment_id).delete(synchronize_session=False)
+    db.session.commit()
+    draft_service.discard_buffer(student_id, assignment_id)
+    return jsonify({'msg': 'draft discarded'}), 200
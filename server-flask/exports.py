@@ -0,0 +1,152 @@
+"""
+Exportación de libros de calificaciones (CSV / NDJSON) en streaming
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import select
+
+from admission import concurrency_limit
+from auth import current_identity, role_required
+from db_routing import route_reads_to_replicas
+from models import db, User, Student, Course, CourseSubject, Assignment, Question, Submission, Answer
+
+exports_bp = Blueprint('exports', __name__, url_prefix='/api')
+route_reads_to_replicas(exports_bp)
+
+# Filas por lote leídas del cursor del servidor y enviadas en cada chunk
+EXPORT_BATCH_SIZE = 1000
+
+GRADEBOOK_COLUMNS = (
+    'course_id', 'assignment_id', 'assignment_title', 'submission_id', 'student_id', 'student_name',
+    'submission_date', 'status', 'ai_score', 'final_score', 'question_id', 'question_text', 'question_type',
+    'question_points', 'correct', 'selected_options', 'numeric_answer'
+)
+
+
+def gradebook_query(*criteria):
+    """Una fila por respuesta (o por entrega sin respuestas), ordenada por tarea/entrega/pregunta"""
+    return (
+        select(
+            Course.id.label('course_id'),
+            Assignment.id.label('assignment_id'),
+            Assignment.title.label('assignment_title'),
+            Submission.id.label('submission_id'),
+            Submission.student_id,
+            User.username.label('student_name'),
+            Submission.submission_date,
+            Submission.status,
+            Submission.ai_score,
+            Submission.final_score,
+            Question.id.label('question_id'),
+            Question.text.label('question_text'),
+            Question.type.label('question_type'),
+            Question.points.label('question_points'),
+            Answer.correct,
+            Answer.selected_options,
+            Answer.numeric_answer,
+        )
+        .select_from(Submission)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .join(CourseSubject, Assignment.course_subject_id == CourseSubject.id)
+        .join(Course, CourseSubject.course_id == Course.id)
+        .outerjoin(Student, Submission.student_id == Student.id)
+        .outerjoin(User, Student.user_id == User.id)
+        .outerjoin(Answer, Answer.submission_id == Submission.id)
+        .outerjoin(Question, Answer.question_id == Question.id)
+        .where(*criteria)
+        .order_by(Assignment.id, Submission.id, Question.order_index, Question.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _stream_csv(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(GRADEBOOK_COLUMNS)
+    yield buffer.getvalue()
+    for rows in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def _stream_ndjson(result):
+    dumps = current_app.json.dumps
+    for rows in result.partitions():
+        yield ''.join(dumps(dict(zip(GRADEBOOK_COLUMNS, row))) + '\n' for row in rows)
+
+
+def gradebook_response(filename, *criteria):
+    """Respuesta en streaming: memoria constante y primeros bytes antes de leer todo el resultado"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'msg': 'format must be csv or ndjson'}), 400
+
+    def generate():
+        result = db.session.execute(gradebook_query(*criteria))
+        try:
+            stream = _stream_csv if export_format == 'csv' else _stream_ndjson
+            yield from stream(result)
+        finally:
+            result.close()
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
+
+
+def _teacher_owns_course(course_id):
+    """Los administradores pueden exportar cualquier curso; los profesores solo los suyos"""
+    identity = current_identity()
+    if identity.get('role') == 'admin':
+        return True
+    return db.session.query(Course.id).filter(
+        Course.id == course_id, Course.teacher_id == identity.get('teacher_id')
+    ).first() is not None
+
+
+@exports_bp.route('/teacher/courses/<int:course_id>/gradebook', methods=['GET'])
+@concurrency_limit(2)
+@role_required('teacher')
+def export_course_gradebook(course_id):
+    """Exportar el libro de calificaciones de un curso (?format=csv|ndjson)"""
+    if not db.session.get(Course, course_id):
+        return jsonify({'msg': 'course not found'}), 404
+    if not _teacher_owns_course(course_id):
+        return jsonify({'msg': 'forbidden - not your course'}), 403
+    return gradebook_response(f'gradebook_course_{course_id}', Course.id == course_id)
+
+
+@exports_bp.route('/teacher/assignments/<int:assignment_id>/gradebook', methods=['GET'])
+@concurrency_limit(2)
+@role_required('teacher')
+def export_assignment_gradebook(assignment_id):
+    """Exportar el libro de calificaciones de una tarea (?format=csv|ndjson)"""
+    course_id = db.session.query(CourseSubject.course_id).join(
+        Assignment, Assignment.course_subject_id == CourseSubject.id
+    ).filter(Assignment.id == assignment_id).scalar()
+    if course_id is None:
+        return jsonify({'msg': 'assignment not found'}), 404
+    if not _teacher_owns_course(course_id):
+        return jsonify({'msg': 'forbidden - not your course'}), 403
+    return gradebook_response(f'gradebook_assignment_{assignment_id}', Assignment.id == assignment_id)
@@ -0,0 +1,109 @@
+"""
+Calificación masiva de entregas
+
+    POST /api/submissions/grades
+    {'grades': [{'submission_id': 1, 'final_score': 87.5, 'ai_feedback': '...'}, ...]}
+
+Cada nota se valida con schemas.GradingSchema. Todas se aplican con una sola
+sentencia UPDATE ... FROM (VALUES ...) y los avisos a los estudiantes se
+encolan en el outbox con un único INSERT, todo en la misma transacción.
+
+No hay agregados de notas guardados: la media del estudiante se calcula al leer
+y su ETag depende de max(updated_at) de sus entregas (conditional.table_version),
+así que el UPDATE actualiza updated_at y las cachés HTTP se invalidan solas.
+"""
+import json
+
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+from sqlalchemy import Integer, Numeric, Text, column, select, update, values
+
+from auth import current_identity, role_required
+from models import db, Course, CourseSubject, Assignment, Submission
+from outbox import outbox_service
+from schemas import BulkGradingSchema
+
+grading_bp = Blueprint('grading', __name__, url_prefix='/api')
+
+
+class GradingError(Exception):
+    """Lote que no se puede aplicar: entregas inexistentes, ajenas o repetidas"""
+
+    def __init__(self, message, status=400, submission_ids=None):
+        super().__init__(message)
+        self.status = status
+        self.submission_ids = submission_ids
+
+
+def _grades_source(grades):
+    """Tabla VALUES (id, final_score, ai_feedback) con las notas del lote"""
+    source = values(
+        column('id', Integer), column('final_score', Numeric), column('ai_feedback', Text), name='grades'
+    ).data([(grade.submission_id, grade.final_score, grade.ai_feedback) for grade in grades])
+    if db.engine.dialect.name != 'postgresql':
+        # SQLite no admite alias con lista de columnas en FROM: la misma tabla como CTE
+        source = source.cte('grades')
+    return source
+
+
+def grade_many(data, identity):
+    """
+    Valida y aplica un lote de notas en una sola transacción.
+
+    Args:
+        data: {'grades': [{submission_id, final_score, ai_feedback}, ...]}
+        identity: identidad del profesor (los admin pueden calificar cualquier entrega)
+
+    Returns:
+        Dict con el número de entregas calificadas
+    """
+    grades = BulkGradingSchema.model_validate(data).grades
+    submission_ids = [grade.submission_id for grade in grades]
+    if len(set(submission_ids)) != len(submission_ids):
+        raise GradingError('duplicate submission_id in grades')
+
+    rows = db.session.execute(
+        select(Submission.id, Course.teacher_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .outerjoin(CourseSubject, CourseSubject.id == Assignment.course_subject_id)
+        .outerjoin(Course, Course.id == CourseSubject.course_id)
+        .where(Submission.id.in_(submission_ids))
+    ).all()
+    found = {row.id for row in rows}
+    missing = [submission_id for submission_id in submission_ids if submission_id not in found]
+    if missing:
+        raise GradingError('submission not found', 404, missing)
+    if identity.get('role') != 'admin':
+        foreign = [row.id for row in rows if row.teacher_id != identity.get('teacher_id')]
+        if foreign:
+            raise GradingError('forbidden - not your submission', 403, sorted(foreign))
+
+    try:
+        source = _grades_source(grades)
+        db.session.execute(
+            update(Submission.__table__)
+            .where(Submission.id == source.c.id)
+            .values(final_score=source.c.final_score, ai_feedback=source.c.ai_feedback, status='graded')
+        )
+        outbox_service.enqueue_many('submission.graded', [{'submission_id': submission_id} for submission_id in submission_ids])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {'graded': len(submission_ids)}
+
+
+@grading_bp.route('/submissions/grades', methods=['POST'])
+@role_required('teacher')
+def grade_submissions():
+    """Calificar varias entregas: {'grades': [{submission_id, final_score, ai_feedback}]}"""
+    try:
+        return jsonify(grade_many(request.get_json() or {}, current_identity())), 200
+    except ValidationError as e:
+        return jsonify({'msg': 'validation error', 'errors': json.loads(e.json())}), 400
+    except GradingError as e:
+        body = {'msg': str(e)}
+        if e.submission_ids:
+            body['submission_ids'] = e.submission_ids
+        return jsonify(body), e.status
@@ -0,0 +1,45 @@
+"""
+Configuración de gunicorn: gunicorn -c gunicorn.conf.py "main:create_app()"
+
+Con PROMETHEUS_MULTIPROC_DIR definido, las métricas de cada worker se agregan
+en /metrics; al terminar un worker se eliminan sus gauges "live".
+
+Cada worker arranca su despachador del outbox tras cargar la app
+(OUTBOX_DISPATCHER_ENABLED=false si corre aparte con manage.py dispatch_outbox).
+
+El búfer de borradores en memoria es de cada proceso: con varios workers y sin
+DRAFT_REDIS_URL los guardados se escriben directamente en la BD
+(DRAFT_FLUSH_SECONDS=0), y el arranque falla si algo lo impide.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+if workers > 1 and not os.environ.get('DRAFT_REDIS_URL'):
+    os.environ['DRAFT_FLUSH_SECONDS'] = '0'
+# Hilos por worker: deben cubrir ADMISSION_MAX_CONCURRENT + ADMISSION_QUEUE_SIZE
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+
+def on_starting(server):
+    # -w en la línea de comandos puede cambiar el número de workers después de leer este fichero
+    buffered = float(os.environ.get('DRAFT_FLUSH_SECONDS', 5)) > 0
+    if server.cfg.workers > 1 and buffered and not os.environ.get('DRAFT_REDIS_URL'):
+        raise RuntimeError('DRAFT_REDIS_URL or DRAFT_FLUSH_SECONDS=0 is required with more than one worker')
+
+
+def post_worker_init(worker):
+    from outbox import outbox_service
+
+    outbox_service.start()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,210 @@
+"""
+Importación masiva: rosters de usuarios y tareas completas con su banco de preguntas
+"""
+import json
+from datetime import timezone
+
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+
+from models import db, User, Teacher, Student, CourseSubject, Assignment, Question, QuestionOption, QuestionScale
+from password_service import password_service
+from outbox import outbox_service
+from reminder_service import reminder_service
+from admission import concurrency_limit
+from auth import role_required
+from schemas import RosterImportSchema, AssignmentCreateSchema
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/api')
+
+# Filas por sentencia INSERT (executemany / insertmanyvalues)
+IMPORT_BATCH_SIZE = 1000
+
+
+class ImportConflict(Exception):
+    """Datos válidos que no se pueden insertar (duplicados, referencias inexistentes)"""
+
+
+def _chunks(items, size=IMPORT_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def import_roster(data, hasher=None):
+    """
+    Valida e inserta un roster completo en una sola transacción.
+
+    Args:
+        data: {'users': [{username, email, password, role}, ...]}
+        hasher: función para el hash de contraseñas (por defecto el pool de password_service)
+
+    Returns:
+        Dict con el número de usuarios, estudiantes y profesores creados
+    """
+    roster = RosterImportSchema.model_validate(data)
+    users = roster.users
+
+    usernames = [u.username for u in users]
+    emails = [u.email for u in users]
+    if len(set(usernames)) != len(usernames) or len(set(emails)) != len(emails):
+        raise ImportConflict('duplicate username or email in roster')
+
+    for names, mails in zip(_chunks(usernames), _chunks(emails)):
+        existing = db.session.query(User.username).filter(
+            or_(User.username.in_(names), User.email.in_(mails))
+        ).first()
+        if existing:
+            raise ImportConflict(f'user exists: {existing.username}')
+
+    if hasher is None:
+        hashes = password_service.hash_many([u.password for u in users])
+    else:
+        hashes = [hasher(u.password) for u in users]
+    rows = [{
+        'username': u.username,
+        'email': u.email,
+        'password_hash': password_hash,
+        'role': u.role.value
+    } for u, password_hash in zip(users, hashes)]
+
+    try:
+        created = []
+        for chunk in _chunks(rows):
+            created.extend(db.session.execute(
+                insert(User).returning(User.id, User.role, sort_by_parameter_order=True), chunk
+            ).all())
+
+        students = [{'user_id': user_id} for user_id, role in created if role == 'student']
+        teachers = [{'user_id': user_id} for user_id, role in created if role == 'teacher']
+        for chunk in _chunks(students):
+            db.session.execute(insert(Student), chunk)
+        for chunk in _chunks(teachers):
+            db.session.execute(insert(Teacher), chunk)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {'created': len(created), 'students': len(students), 'teachers': len(teachers)}
+
+
+def import_assignment(data):
+    """
+    Valida e inserta una tarea con todas sus preguntas, opciones y escalas en una transacción.
+
+    Args:
+        data: payload con la forma de schemas.AssignmentCreateSchema
+
+    Returns:
+        Dict con el id de la tarea y los conteos insertados
+    """
+    payload = AssignmentCreateSchema.model_validate(data)
+    if not db.session.get(CourseSubject, payload.course_subject_id):
+        raise ImportConflict('course_subject not found')
+
+    # Como main.parse_due_date: las fechas se guardan en UTC sin zona
+    due_date = payload.due_date
+    if due_date is not None and due_date.tzinfo:
+        due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    try:
+        assignment = Assignment(
+            course_subject_id=payload.course_subject_id,
+            title=payload.title,
+            description=payload.description,
+            due_date=due_date,
+            type=payload.type.value,
+            questions_count=len(payload.questions),
+            total_points=sum(q.points for q in payload.questions)
+        )
+        db.session.add(assignment)
+        db.session.flush()
+
+        question_rows = [{
+            'assignment_id': assignment.id,
+            'text': q.text,
+            'type': q.type.value,
+            'required': q.required,
+            'order_index': q.order_index or position,
+            'points': q.points
+        } for position, q in enumerate(payload.questions)]
+
+        question_ids = []
+        for chunk in _chunks(question_rows):
+            question_ids.extend(db.session.execute(
+                insert(Question).returning(Question.id, sort_by_parameter_order=True), chunk
+            ).scalars().all())
+
+        option_rows = []
+        scale_rows = []
+        for question_id, q in zip(question_ids, payload.questions):
+            for position, opt in enumerate(q.options or []):
+                option_rows.append({
+                    'question_id': question_id,
+                    'option_text': opt.option_text,
+                    'is_correct': opt.is_correct,
+                    'order_index': opt.order_index or position
+                })
+            if q.scale:
+                scale_rows.append({
+                    'question_id': question_id,
+                    'scale_min': q.scale.scale_min,
+                    'scale_max': q.scale.scale_max,
+                    'scale_labels': q.scale.scale_labels
+                })
+
+        for chunk in _chunks(option_rows):
+            db.session.execute(insert(QuestionOption), chunk)
+        for chunk in _chunks(scale_rows):
+            db.session.execute(insert(QuestionScale), chunk)
+
+        # Aviso de nueva tarea en la misma transacción (lo entrega el despachador del outbox)
+        outbox_service.enqueue('assignment.created', {'assignment_id': assignment.id},
+                               dedupe_key=f'assignment.created:{assignment.id}')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'assignment_id': assignment.id,
+        'due_date': assignment.due_date,
+        'questions': len(question_ids),
+        'options': len(option_rows),
+        'scales': len(scale_rows)
+    }
+
+
+def publish_assignment(result):
+    """Temporizadores de recordatorio tras import_assignment (el aviso de nueva tarea va por el outbox)"""
+    reminder_service.schedule_reminders(result['assignment_id'], result['due_date'])
+
+
+def _import_response(importer, data, on_success=None):
+    try:
+        result = importer(data)
+        if on_success:
+            on_success(result)
+        return jsonify(result), 201
+    except ValidationError as e:
+        return jsonify({'msg': 'validation error', 'errors': json.loads(e.json())}), 400
+    except ImportConflict as e:
+        return jsonify({'msg': str(e)}), 409
+
+
+@imports_bp.route('/users/import', methods=['POST'])
+@concurrency_limit(2)
+@role_required('admin')
+def import_users():
+    """Importar un roster de usuarios: {'users': [{username, email, password, role}]}"""
+    return _import_response(import_roster, request.get_json() or {})
+
+
+@imports_bp.route('/assignments/import', methods=['POST'])
+@concurrency_limit(2)
+@role_required('teacher')
+def import_assignment_endpoint():
+    """Importar una tarea completa con sus preguntas (AssignmentCreateSchema)"""
+    return _import_response(import_assignment, request.get_json() or {}, on_success=publish_assignment)
@@ -0,0 +1,182 @@
+"""
+Instrumentación de SQL por petición: número de consultas, tiempo total en BD y consulta más lenta
+
+Se engancha a los eventos de cursor de SQLAlchemy. Emite un log estructurado
+por petición (request_queries, muestreado con SQL_QUERY_LOG_SAMPLE_RATE), en
+modo debug añade las cabeceras X-DB-* y, con SQL_QUERY_BUDGET_STRICT
+(activo en testing), falla la petición cuando un endpoint supera su
+presupuesto de consultas (@query_budget o SQL_QUERY_BUDGET).
+
+Las consultas de la autenticación (sincronización de revocaciones, perfil que
+falta en la caché) se marcan con auth_queries(): cuentan en los totales pero
+no en el presupuesto, que solo mide el trabajo del endpoint.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import structlog
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = structlog.get_logger()
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un endpoint o bloque ejecutó más consultas de las permitidas"""
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.auth_count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    @property
+    def budgeted(self):
+        """Consultas que cuentan para el presupuesto (sin las de autenticación)"""
+        return self.count - self.auth_count
+
+    def record(self, statement, elapsed_ms, auth=False):
+        self.count += 1
+        if auth:
+            self.auth_count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+
+def _collectors():
+    collectors = list(getattr(_local, 'collectors', ()))
+    if has_app_context() and 'query_stats' in g:
+        collectors.append(g.query_stats)
+    return collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    auth = getattr(_local, 'auth_depth', 0) > 0
+    for stats in _collectors():
+        stats.record(statement, elapsed_ms, auth)
+    if has_app_context() and elapsed_ms >= current_app.config.get('SQL_SLOW_QUERY_MS', 200):
+        logger.warning('slow_query', elapsed_ms=round(elapsed_ms, 2), statement=statement[:500])
+
+
+def query_budget(max_queries):
+    """Decorator: máximo de consultas permitido para el endpoint"""
+    def decorator(fn):
+        fn.query_budget = max_queries
+        return fn
+    return decorator
+
+
+@contextmanager
+def auth_queries():
+    """Marca las consultas del bloque como de autenticación (fuera del presupuesto del endpoint)"""
+    _local.auth_depth = getattr(_local, 'auth_depth', 0) + 1
+    try:
+        yield
+    finally:
+        _local.auth_depth -= 1
+
+
+@contextmanager
+def count_queries():
+    """Cuenta las consultas del bloque (útil en tests y benchmarks)"""
+    stats = QueryStats()
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """Falla si el bloque ejecuta más de max_queries consultas (sin contar las de autenticación)"""
+    with count_queries() as stats:
+        yield stats
+    if stats.budgeted > max_queries:
+        raise QueryBudgetExceeded(f'{stats.budgeted} queries executed, budget {max_queries}')
+
+
+class QueryInstrumentation:
+    def __init__(self, app=None):
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registrar los listeners en todos los motores (primario y réplicas) y los hooks de petición"""
+        app.config.setdefault('SQL_SLOW_QUERY_MS', float(os.environ.get('SQL_SLOW_QUERY_MS', 200)))
+        app.config.setdefault('SQL_QUERY_BUDGET', int(os.environ.get('SQL_QUERY_BUDGET', 0)))
+        app.config.setdefault('SQL_QUERY_HEADERS', os.environ.get('SQL_QUERY_HEADERS', os.environ.get('FLASK_DEBUG', '0')) == '1')
+        app.config.setdefault('SQL_QUERY_LOG_SAMPLE_RATE', float(os.environ.get('SQL_QUERY_LOG_SAMPLE_RATE', 0.1)))
+
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g.query_stats = QueryStats()
+
+    def _budget(self):
+        view = current_app.view_functions.get(request.endpoint)
+        return getattr(view, 'query_budget', None) or current_app.config['SQL_QUERY_BUDGET']
+
+    def _finish(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        if current_app.config['SQL_QUERY_HEADERS']:
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-ms'] = f'{stats.total_ms:.2f}'
+            response.headers['X-DB-Slowest-ms'] = f'{stats.slowest_ms:.2f}'
+
+        sample_rate = current_app.config['SQL_QUERY_LOG_SAMPLE_RATE']
+        if sample_rate > 0 and random.random() < sample_rate:
+            logger.info(
+                'request_queries',
+                endpoint=request.endpoint,
+                method=request.method,
+                status=response.status_code,
+                query_count=stats.count,
+                auth_query_count=stats.auth_count,
+                db_time_ms=round(stats.total_ms, 2),
+                slowest_ms=round(stats.slowest_ms, 2),
+                slowest_statement=(stats.slowest_statement or '')[:200] or None,
+                sample_rate=sample_rate,
+            )
+
+        budget = self._budget()
+        if budget and stats.budgeted > budget:
+            logger.warning('query_budget_exceeded', endpoint=request.endpoint, query_count=stats.budgeted,
+                           auth_query_count=stats.auth_count, budget=budget)
+            if current_app.config.get('SQL_QUERY_BUDGET_STRICT', current_app.testing):
+                raise QueryBudgetExceeded(f'{request.endpoint}: {stats.budgeted} queries executed, budget {budget}')
+        return response
+
+
+# Instancia global del servicio
+query_instrumentation = QueryInstrumentation()
@@ -1,6 +1,12 @@
+import csv
+import json
+
+import click
 from flask.cli import FlaskGroup
 from main import create_app
 from models import db
+from imports import import_roster, import_assignment, publish_assignment
+from outbox import outbox_service
 
 cli = FlaskGroup(create_app=create_app)
 
@@ -10,5 +16,36 @@ def create_db():
     db.create_all()
     db.session.commit()
 
+@cli.command("import_roster")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_roster_command(path):
+    """Importar usuarios desde JSON ({"users": [...]}) o CSV (username,email,password,role)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            data = {"users": list(csv.DictReader(f))}
+        else:
+            data = json.load(f)
+    if isinstance(data, list):
+        data = {"users": data}
+    click.echo(import_roster(data))
+
+@cli.command("import_assignment")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_assignment_command(path):
+    """Importar una tarea con sus preguntas desde JSON (AssignmentCreateSchema)"""
+    with open(path, encoding="utf-8") as f:
+        result = import_assignment(json.load(f))
+    publish_assignment(result)
+    click.echo(result)
+
+@cli.command("dispatch_outbox")
+@click.option("--loop", is_flag=True, help="Seguir despachando hasta Ctrl+C (worker dedicado)")
+def dispatch_outbox_command(loop):
+    """Despachar los eventos pendientes del outbox (con --loop, como proceso aparte de la web)"""
+    if loop:
+        outbox_service.serve()
+    else:
+        click.echo(outbox_service.drain())
+
 if __name__ == "__main__":
-    cli()
\ No newline at end of file
+    cli()
@@ -0,0 +1,161 @@
+"""
+Métricas en formato Prometheus: latencia por ruta, pool de la BD, recordatorios, llamadas a IA, admisión y outbox
+
+Con varios workers de gunicorn hay que definir PROMETHEUS_MULTIPROC_DIR (un
+directorio vacío por despliegue) antes de arrancar: cada proceso escribe sus
+contadores en ficheros mmap y /metrics los agrega. gunicorn.conf.py limpia los
+ficheros de los workers que terminan.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+from models import db
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_POOL_SIZE = Gauge('db_pool_size', 'Tamaño configurado del pool', ['bind'], multiprocess_mode='livesum')
+DB_POOL_IN_USE = Gauge('db_pool_connections_in_use', 'Conexiones prestadas por el pool', ['bind'], multiprocess_mode='livesum')
+DB_POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Conexiones obtenidas del pool', ['bind'])
+
+JOB_DURATION = Histogram('reminder_job_duration_seconds', 'Duración de los jobs de ReminderService', ['job'])
+JOB_ERRORS = Counter('reminder_job_errors_total', 'Jobs de ReminderService que fallaron', ['job'])
+NOTIFICATIONS_CREATED = Counter('notifications_created_total', 'Notificaciones generadas', ['kind'])
+
+AI_LATENCY = Histogram(
+    'ai_request_duration_seconds', 'Latencia de las llamadas a Gemini', ['operation'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32)
+)
+AI_ERRORS = Counter('ai_request_errors_total', 'Llamadas a Gemini con error', ['operation'])
+AI_TOKENS = Counter('ai_tokens_total', 'Tokens consumidos en Gemini', ['operation', 'kind'])
+
+ADMISSION_IN_FLIGHT = Gauge('admission_requests_in_flight', 'Peticiones admitidas en curso', multiprocess_mode='livesum')
+ADMISSION_QUEUE_WAIT = Histogram(
+    'admission_queue_wait_seconds', 'Espera en la cola de admisión', ['priority'],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2)
+)
+ADMISSION_REJECTED = Counter('admission_rejected_total', 'Peticiones rechazadas por el control de admisión', ['priority', 'reason'])
+
+OUTBOX_DISPATCHED = Counter('outbox_events_dispatched_total', 'Eventos del outbox entregados', ['topic'])
+OUTBOX_FAILED = Counter('outbox_events_failed_total', 'Entregas de eventos del outbox que fallaron (se reintentan)', ['topic'])
+OUTBOX_DEAD = Counter('outbox_events_dead_total', 'Eventos del outbox que agotaron OUTBOX_MAX_ATTEMPTS', ['topic'])
+OUTBOX_LAG = Histogram(
+    'outbox_dispatch_lag_seconds', 'Tiempo desde que se escribe un evento hasta que se entrega', ['topic'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 30, 120)
+)
+
+
+@contextmanager
+def time_job(job):
+    """Medir la duración (y los fallos) de un job programado"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        JOB_ERRORS.labels(job=job).inc()
+        raise
+    finally:
+        JOB_DURATION.labels(job=job).observe(time.perf_counter() - start)
+
+
+def record_notifications(kind, count):
+    if count:
+        NOTIFICATIONS_CREATED.labels(kind=kind).inc(count)
+
+
+@contextmanager
+def time_ai_call(operation):
+    """Medir una llamada a Gemini; el bloque recibe una función para registrar la respuesta"""
+    start = time.perf_counter()
+
+    def record_usage(response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        AI_TOKENS.labels(operation=operation, kind='prompt').inc(getattr(usage, 'prompt_token_count', 0) or 0)
+        AI_TOKENS.labels(operation=operation, kind='completion').inc(getattr(usage, 'candidates_token_count', 0) or 0)
+
+    try:
+        yield record_usage
+    except Exception:
+        AI_ERRORS.labels(operation=operation).inc()
+        raise
+    finally:
+        AI_LATENCY.labels(operation=operation).observe(time.perf_counter() - start)
+
+
+def _watch_pool(bind, engine):
+    pool_size = getattr(engine.pool, 'size', None)
+    if callable(pool_size):
+        DB_POOL_SIZE.labels(bind=bind).set(pool_size())
+
+    in_use = DB_POOL_IN_USE.labels(bind=bind)
+    checkouts = DB_POOL_CHECKOUTS.labels(bind=bind)
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        in_use.inc()
+        checkouts.inc()
+
+    @event.listens_for(engine, 'checkin')
+    def _checkin(dbapi_connection, connection_record):
+        in_use.dec()
+
+
+class MetricsService:
+    def __init__(self, app=None):
+        self.app = app
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registrar hooks de latencia, listeners del pool y el endpoint /metrics"""
+        self.app = app
+        app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN'))
+
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                _watch_pool(bind or 'default', engine)
+
+        app.before_request(self._start)
+        app.after_request(self._observe)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view, methods=['GET'])
+
+    def _start(self):
+        g.request_started = time.perf_counter()
+
+    def _observe(self, response):
+        started = g.pop('request_started', None)
+        if started is not None and request.endpoint != 'metrics':
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(
+                method=request.method, route=route, status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+    def metrics_view(self):
+        """Exposición en formato texto de Prometheus (agregada entre workers si aplica)"""
+        token = current_app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('forbidden\n', status=403, mimetype='text/plain')
+
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+# Instancia global del servicio
+metrics_service = MetricsService()
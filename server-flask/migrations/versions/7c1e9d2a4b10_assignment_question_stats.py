@@ -0,0 +1,41 @@
+"""assignment question stats
+
+Revision ID: 7c1e9d2a4b10
+Revises: 4200ae2556df
+Create Date: 2026-10-19 09:12:04.218311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9d2a4b10'
+down_revision = '4200ae2556df'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('points', sa.Numeric(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('questions_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_points', sa.Numeric(), server_default='0', nullable=False))
+
+    # Backfill de los contadores a partir de las preguntas existentes
+    op.execute("""
+        UPDATE assignments SET
+            questions_count = (SELECT COUNT(*) FROM questions q WHERE q.assignment_id = assignments.id),
+            total_points = (SELECT COALESCE(SUM(q.points), 0) FROM questions q WHERE q.assignment_id = assignments.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_column('total_points')
+        batch_op.drop_column('questions_count')
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_column('points')
@@ -0,0 +1,67 @@
+"""unique submissions per student and idempotency keys
+
+Revision ID: 9a3e6c1f7d20
+Revises: 2d8c61f4a9e5
+Create Date: 2026-10-19 13:05:12.481977
+
+"""
+import logging
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e6c1f7d20'
+down_revision = '2d8c61f4a9e5'
+branch_labels = None
+depends_on = None
+
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Con MIGRATION_DEDUPE_SUBMISSIONS=1 se conserva una entrega por (assignment_id, student_id):
+# la calificada, luego la que tiene nota y, a igualdad, la más reciente
+RANKED = (
+    'SELECT id, ROW_NUMBER() OVER (PARTITION BY assignment_id, student_id ORDER BY '
+    "CASE WHEN status = 'graded' THEN 0 ELSE 1 END, "
+    'CASE WHEN final_score IS NOT NULL THEN 0 ELSE 1 END, id DESC) AS position '
+    'FROM submissions'
+)
+DISCARDED = f'SELECT id FROM ({RANKED}) ranked WHERE position > 1'
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT assignment_id, student_id, COUNT(*) AS copies FROM submissions '
+        'GROUP BY assignment_id, student_id HAVING COUNT(*) > 1 ORDER BY assignment_id, student_id'
+    )).all()
+    if duplicates:
+        report = '\n'.join(
+            f'  assignment_id={assignment_id} student_id={student_id}: {copies} entregas'
+            for assignment_id, student_id, copies in duplicates
+        )
+        if os.environ.get('MIGRATION_DEDUPE_SUBMISSIONS') != '1':
+            # Borrar entregas es irreversible: se decide a mano antes de crear la restricción única
+            raise RuntimeError(
+                f'{len(duplicates)} pares (assignment_id, student_id) tienen varias entregas:\n{report}\n'
+                'Resuélvelos a mano o vuelve a ejecutar con MIGRATION_DEDUPE_SUBMISSIONS=1 para conservar '
+                'la calificada o la más reciente de cada par (las demás y sus respuestas se borran).'
+            )
+        discarded = [row[0] for row in op.get_bind().execute(sa.text(DISCARDED))]
+        logger.warning('Borrando %d entregas duplicadas (ids %s):\n%s', len(discarded), discarded, report)
+        op.execute(f'DELETE FROM answers WHERE submission_id IN ({DISCARDED})')
+        op.execute(f'DELETE FROM submissions WHERE id IN ({DISCARDED})')
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_submissions_assignment_student', ['assignment_id', 'student_id'])
+        batch_op.create_unique_constraint('uq_submissions_student_idempotency_key', ['student_id', 'idempotency_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_submissions_student_idempotency_key', type_='unique')
+        batch_op.drop_constraint('uq_submissions_assignment_student', type_='unique')
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,32 @@
+"""notification dedupe key
+
+Revision ID: a6d2f8c41e93
+Revises: f3a81c6d9e27
+Create Date: 2026-10-19 18:12:07.415902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2f8c41e93'
+down_revision = 'f3a81c6d9e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('assignment_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('kind', sa.String(length=32), nullable=True))
+        batch_op.create_foreign_key('fk_notifications_assignment_id', 'assignments', ['assignment_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_unique_constraint('uq_notifications_user_assignment_kind', ['user_id', 'assignment_id', 'kind'])
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_notifications_user_assignment_kind', type_='unique')
+        batch_op.drop_constraint('fk_notifications_assignment_id', type_='foreignkey')
+        batch_op.drop_column('kind')
+        batch_op.drop_column('assignment_id')
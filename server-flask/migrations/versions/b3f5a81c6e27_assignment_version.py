@@ -0,0 +1,26 @@
+"""assignment version
+
+Revision ID: b3f5a81c6e27
+Revises: 7c1e9d2a4b10
+Create Date: 2026-10-19 10:03:47.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f5a81c6e27'
+down_revision = '7c1e9d2a4b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_column('version')
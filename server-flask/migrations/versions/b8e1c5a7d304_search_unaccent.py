@@ -0,0 +1,60 @@
+"""accent-insensitive full-text search (PostgreSQL only)
+
+Revision ID: b8e1c5a7d304
+Revises: a6d2f8c41e93
+Create Date: 2026-10-19 18:40:13.928417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1c5a7d304'
+down_revision = 'a6d2f8c41e93'
+branch_labels = None
+depends_on = None
+
+
+# Misma expresión que search.tsvector_sql: si cambia allí hay que cambiarla aquí
+def _tsvector(config, *fields):
+    return ' || '.join(
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')" for column, weight in fields
+    )
+
+
+FIELDS = {
+    'ix_courses_search': ('courses', (('name', 'A'), ('description', 'B'))),
+    'ix_subjects_search': ('subjects', (('name', 'A'), ('description', 'B'))),
+    'ix_assignments_search': ('assignments', (('title', 'A'), ('description', 'B'))),
+    'ix_questions_search': ('questions', (('text', 'A'),)),
+}
+
+
+def _create_indexes(config):
+    for name, (table, fields) in FIELDS.items():
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+        op.execute(f'CREATE INDEX {name} ON {table} USING gin (({_tsvector(config, *fields)}))')
+
+
+def upgrade():
+    # En otros motores la búsqueda usa el índice en memoria de search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Configuración 'spanish' que quita las tildes antes de aplicar el stemmer, así
+    # 'álgebra' y 'algebra' producen el mismo lexema en el índice y en la consulta
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute('CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish)')
+    op.execute(
+        'ALTER TEXT SEARCH CONFIGURATION spanish_unaccent '
+        'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem'
+    )
+    _create_indexes('spanish_unaccent')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _create_indexes('spanish')
+    # La extensión unaccent se deja instalada: puede usarla otra cosa en la BD
+    op.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent')
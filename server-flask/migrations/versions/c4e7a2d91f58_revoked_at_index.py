@@ -0,0 +1,28 @@
+"""revoked_tokens revoked_at index
+
+Revision ID: c4e7a2d91f58
+Revises: b8e1c5a7d304
+Create Date: 2026-10-19 21:04:33.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a2d91f58'
+down_revision = 'b8e1c5a7d304'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La sincronización incremental de revocaciones filtra por revoked_at
+    op.execute(sa.text('UPDATE revoked_tokens SET revoked_at = CURRENT_TIMESTAMP WHERE revoked_at IS NULL'))
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_revoked_at'))
@@ -0,0 +1,34 @@
+"""autosave drafts
+
+Revision ID: c81d4e2a9b36
+Revises: 5f2b8d0e3c71
+Create Date: 2026-10-19 13:58:03.914562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81d4e2a9b36'
+down_revision = '5f2b8d0e3c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('drafts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('assignment_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('answers', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('assignment_id', 'student_id', name='uq_drafts_assignment_student')
+    )
+
+
+def downgrade():
+    op.drop_table('drafts')
@@ -0,0 +1,46 @@
+"""full-text search GIN indexes (PostgreSQL only)
+
+Revision ID: d7a4f19e2b58
+Revises: c81d4e2a9b36
+Create Date: 2026-10-19 14:32:47.105938
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4f19e2b58'
+down_revision = 'c81d4e2a9b36'
+branch_labels = None
+depends_on = None
+
+
+# Misma expresión que search.tsvector_sql: si cambia allí hay que cambiarla aquí
+def _tsvector(*fields):
+    return ' || '.join(
+        f"setweight(to_tsvector('spanish'::regconfig, coalesce({column}, '')), '{weight}')" for column, weight in fields
+    )
+
+
+INDEXES = {
+    'ix_courses_search': ('courses', _tsvector(('name', 'A'), ('description', 'B'))),
+    'ix_subjects_search': ('subjects', _tsvector(('name', 'A'), ('description', 'B'))),
+    'ix_assignments_search': ('assignments', _tsvector(('title', 'A'), ('description', 'B'))),
+    'ix_questions_search': ('questions', _tsvector(('text', 'A'))),
+}
+
+
+def upgrade():
+    # En otros motores la búsqueda usa el índice en memoria de search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, (table, expression) in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON {table} USING gin (({expression}))')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,27 @@
+"""questions.updated_at for the search index version token
+
+Revision ID: d9b2f7e4c615
+Revises: c4e7a2d91f58
+Create Date: 2026-10-19 21:37:52.204613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b2f7e4c615'
+down_revision = 'c4e7a2d91f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+    op.execute(sa.text('UPDATE questions SET updated_at = created_at WHERE created_at IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,30 @@
+"""updated_at columns for conditional GET
+
+Revision ID: e4a27b9f0c53
+Revises: b3f5a81c6e27
+Create Date: 2026-10-19 11:26:10.840317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a27b9f0c53'
+down_revision = 'b3f5a81c6e27'
+branch_labels = None
+depends_on = None
+
+TABLES = ('courses', 'subjects', 'course_subjects', 'assignments', 'submissions', 'notifications')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
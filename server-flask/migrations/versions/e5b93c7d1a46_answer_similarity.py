@@ -0,0 +1,48 @@
+"""answer fingerprints and LSH buckets for near-duplicate detection
+
+Revision ID: e5b93c7d1a46
+Revises: d7a4f19e2b58
+Create Date: 2026-10-19 15:06:12.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b93c7d1a46'
+down_revision = 'd7a4f19e2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('answer_fingerprints',
+    sa.Column('answer_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['answer_id'], ['answers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('answer_id')
+    )
+    with op.batch_alter_table('answer_fingerprints', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_answer_fingerprints_question_id'), ['question_id'], unique=False)
+
+    op.create_table('answer_lsh_buckets',
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('band', sa.SmallInteger(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.Column('answer_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['answer_id'], ['answers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('question_id', 'band', 'bucket', 'answer_id')
+    )
+
+
+def downgrade():
+    op.drop_table('answer_lsh_buckets')
+    with op.batch_alter_table('answer_fingerprints', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_answer_fingerprints_question_id'))
+
+    op.drop_table('answer_fingerprints')
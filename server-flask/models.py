@@ -1,7 +1,10 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 
-db = SQLAlchemy()
+from db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -41,6 +44,7 @@ class Course(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id', ondelete='SET NULL'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     teacher = db.relationship('Teacher', back_populates='courses')
     course_subjects = db.relationship('CourseSubject', back_populates='course', cascade='all,delete')
 
@@ -50,6 +54,7 @@ class Subject(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     course_subjects = db.relationship('CourseSubject', back_populates='subject', cascade='all,delete')
 
 
@@ -58,6 +63,7 @@ class CourseSubject(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'))
     subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id', ondelete='CASCADE'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     __table_args__ = (db.UniqueConstraint('course_id', 'subject_id', name='uix_course_subject'),)
     course = db.relationship('Course', back_populates='course_subjects')
     subject = db.relationship('Subject', back_populates='course_subjects')
@@ -74,10 +80,29 @@ class Assignment(db.Model):
     type = db.Column(db.String(20))
     file_url = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Contadores desnormalizados: se mantienen al agregar preguntas para no leer la tabla questions al listar
+    questions_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_points = db.Column(db.Numeric, nullable=False, default=0, server_default='0')
+    # Versión del contenido (preguntas/opciones); invalida la caché de detalle y su ETag
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     course_subject = db.relationship('CourseSubject', back_populates='assignments')
     questions = db.relationship('Question', back_populates='assignment', cascade='all,delete')
     submissions = db.relationship('Submission', back_populates='assignment')
 
+    @classmethod
+    def increment_question_stats(cls, assignment_id, count, points):
+        """Actualiza questions_count/total_points y la versión en la transacción actual (sin commit)"""
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id == assignment_id)
+            .values(
+                questions_count=cls.questions_count + count,
+                total_points=cls.total_points + points,
+                version=cls.version + 1,
+            )
+        )
+
 
 class Question(db.Model):
     __tablename__ = 'questions'
@@ -87,7 +112,9 @@ class Question(db.Model):
     type = db.Column(db.String(30), nullable=False)
     required = db.Column(db.Boolean, default=True)
     order_index = db.Column(db.Integer, default=0)
+    points = db.Column(db.Numeric, nullable=False, default=1, server_default='1')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     assignment = db.relationship('Assignment', back_populates='questions')
     options = db.relationship('QuestionOption', back_populates='question', cascade='all,delete')
     scale = db.relationship('QuestionScale', back_populates='question', uselist=False, cascade='all,delete')
@@ -115,6 +142,10 @@ class QuestionScale(db.Model):
 
 class Submission(db.Model):
     __tablename__ = 'submissions'
+    __table_args__ = (
+        db.UniqueConstraint('assignment_id', 'student_id', name='uq_submissions_assignment_student'),
+        db.UniqueConstraint('student_id', 'idempotency_key', name='uq_submissions_student_idempotency_key'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'))
     student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'))
@@ -124,10 +155,35 @@ class Submission(db.Model):
     ai_score = db.Column(db.Numeric)
     final_score = db.Column(db.Numeric)
     status = db.Column(db.String(20), default='pending')
+    idempotency_key = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     assignment = db.relationship('Assignment', back_populates='submissions')
     student = db.relationship('Student', back_populates='submissions')
     answers = db.relationship('Answer', back_populates='submission', cascade='all,delete')
 
+    @classmethod
+    def insert_once(cls, **values):
+        """
+        INSERT ... ON CONFLICT DO NOTHING en la transacción actual (sin commit).
+
+        Devuelve el id de la nueva entrega, o None si ya existía una para
+        (assignment_id, student_id) o para (student_id, idempotency_key).
+        """
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            try:
+                with db.session.begin_nested():
+                    return db.session.execute(db.insert(cls).values(**values).returning(cls.id)).scalar()
+            except IntegrityError:
+                return None
+        return db.session.execute(
+            insert(cls).values(**values).on_conflict_do_nothing().returning(cls.id)
+        ).scalar()
+
 
 class Answer(db.Model):
     __tablename__ = 'answers'
@@ -144,9 +200,98 @@ class Answer(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    # Avisos automáticos (recordatorios, nueva tarea): uno por usuario, tarea y tipo
+    __table_args__ = (db.UniqueConstraint('user_id', 'assignment_id', 'kind', name='uq_notifications_user_assignment_kind'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
     message = db.Column(db.Text, nullable=False)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'))
+    kind = db.Column(db.String(32))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user = db.relationship('User', back_populates='notifications')
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class StoredFile(db.Model):
+    """Contenido almacenado una sola vez, direccionado por su SHA-256"""
+    __tablename__ = 'stored_files'
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Upload(db.Model):
+    """Subida reanudable de un usuario; al completarse apunta a un StoredFile"""
+    __tablename__ = 'uploads'
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100))
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    sha256 = db.Column(db.String(64), db.ForeignKey('stored_files.sha256'))
+    status = db.Column(db.String(20), nullable=False, default='pending', server_default='pending')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    stored_file = db.relationship('StoredFile')
+
+
+class Draft(db.Model):
+    """Respuestas en curso de un estudiante (autosave), por pregunta: {question_id: answer}"""
+    __tablename__ = 'drafts'
+    __table_args__ = (
+        db.UniqueConstraint('assignment_id', 'student_id', name='uq_drafts_assignment_student'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    answers = db.Column(db.JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AnswerFingerprint(db.Model):
+    """Firma MinHash de una respuesta de texto (similarity.py); None si es demasiado corta"""
+    __tablename__ = 'answer_fingerprints'
+    answer_id = db.Column(db.Integer, db.ForeignKey('answers.id', ondelete='CASCADE'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
+    signature = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AnswerLSHBucket(db.Model):
+    """Cubeta LSH (banda de la firma) de una respuesta: las que coinciden son candidatas a copia"""
+    __tablename__ = 'answer_lsh_buckets'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    answer_id = db.Column(db.Integer, db.ForeignKey('answers.id', ondelete='CASCADE'), primary_key=True)
+
+
+class OutboxEvent(db.Model):
+    """Efecto secundario pendiente, escrito en la misma transacción que el cambio que lo origina (outbox.py)"""
+    __tablename__ = 'outbox_events'
+    __table_args__ = (
+        db.Index('ix_outbox_events_pending', 'available_at',
+                 postgresql_where=db.text('dispatched_at IS NULL'), sqlite_where=db.text('dispatched_at IS NULL')),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    dedupe_key = db.Column(db.String(128), unique=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    dispatched_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,389 @@
+"""
+Outbox transaccional para notificaciones y otros efectos secundarios
+
+La petición solo escribe un evento en outbox_events dentro de su misma
+transacción (enqueue), así que el efecto queda registrado si y solo si el cambio
+se confirma. Un hilo despachador por proceso reclama lotes de eventos
+pendientes y los entrega por tema: crea las notificaciones con un INSERT por
+lote (o INSERT ... SELECT para el aviso de nueva tarea), las pasa a los
+canales push registrados y encola los jobs en segundo plano (indexado de
+similitud, retroalimentación de IA con AI_AUTO_FEEDBACK).
+
+Entrega al menos una vez:
+- El reclamo mueve available_at a now + OUTBOX_LEASE_SECONDS. Si el proceso
+  muere, otro worker vuelve a reclamar el evento al vencer el plazo.
+- Las notificaciones y la marca dispatched_at van en la misma transacción, así
+  que un reintento no las duplica. Los canales push reciben el id del evento
+  para descartar repetidos.
+- dedupe_key (única) hace que encolar dos veces el mismo efecto no cree un
+  segundo evento.
+
+Con varios workers de gunicorn el reclamo es atómico (UPDATE ... RETURNING
+condicionado, y FOR UPDATE SKIP LOCKED en PostgreSQL).
+
+El hilo no arranca con create_app (CLI, benchmarks, pruebas): lo arrancan
+gunicorn.conf.py (post_worker_init) y el servidor de desarrollo con start(), o
+se ejecuta aparte con `python manage.py dispatch_outbox --loop`. Los eventos que
+agotan OUTBOX_MAX_ATTEMPTS quedan como letra muerta (con last_error) y se
+borran, igual que los entregados, pasadas OUTBOX_RETENTION_HOURS.
+"""
+import atexit
+import os
+import threading
+from datetime import datetime, timedelta
+
+import structlog
+from sqlalchemy import and_, delete, event, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from ai_service import gemini_service, submission_analysis_data
+from metrics import OUTBOX_DEAD, OUTBOX_DISPATCHED, OUTBOX_FAILED, OUTBOX_LAG, record_notifications
+from models import db, User, Teacher, Student, Course, CourseSubject, Assignment, Submission, Notification, OutboxEvent
+from reminder_service import reminder_service
+from similarity import similarity_service
+
+logger = structlog.get_logger()
+
+# Reintentos: 5 s, 10 s, 20 s... hasta 10 minutos
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 600
+
+
+def _insert_ignoring_duplicates():
+    """INSERT que omite los eventos con un dedupe_key ya usado"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(OutboxEvent.__table__)
+    return dialect_insert(OutboxEvent.__table__).on_conflict_do_nothing(index_elements=['dedupe_key'])
+
+
+class OutboxService:
+    def __init__(self, app=None):
+        self.app = app
+        self.handlers = {}
+        self.channels = []
+        self.enabled = True
+        self.poll_seconds = 1
+        self.batch_size = 500
+        self.lease_seconds = 60
+        self.max_attempts = 10
+        self.retention = timedelta(hours=24)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._purged_at = None
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el despachador (el hilo se arranca aparte con start())"""
+        self.app = app
+        app.config.setdefault('OUTBOX_DISPATCHER_ENABLED', os.environ.get('OUTBOX_DISPATCHER_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('OUTBOX_POLL_SECONDS', float(os.environ.get('OUTBOX_POLL_SECONDS', 1)))
+        app.config.setdefault('OUTBOX_BATCH_SIZE', int(os.environ.get('OUTBOX_BATCH_SIZE', 500)))
+        app.config.setdefault('OUTBOX_LEASE_SECONDS', int(os.environ.get('OUTBOX_LEASE_SECONDS', 60)))
+        app.config.setdefault('OUTBOX_MAX_ATTEMPTS', int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 10)))
+        app.config.setdefault('OUTBOX_RETENTION_HOURS', float(os.environ.get('OUTBOX_RETENTION_HOURS', 24)))
+        app.config.setdefault('AI_AUTO_FEEDBACK', os.environ.get('AI_AUTO_FEEDBACK', 'false').lower() == 'true')
+
+        self.enabled = app.config['OUTBOX_DISPATCHER_ENABLED']
+        self.poll_seconds = app.config['OUTBOX_POLL_SECONDS']
+        self.batch_size = app.config['OUTBOX_BATCH_SIZE']
+        self.lease_seconds = app.config['OUTBOX_LEASE_SECONDS']
+        self.max_attempts = app.config['OUTBOX_MAX_ATTEMPTS']
+        self.retention = timedelta(hours=app.config['OUTBOX_RETENTION_HOURS'])
+
+        # Despertar al hilo en cuanto se confirma una transacción con eventos
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def start(self):
+        """Arrancar el hilo despachador en este proceso (una vez; nunca con app.testing)"""
+        if not self.app or not self.enabled or self.app.testing or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self.serve, name='outbox-dispatcher', daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+        return True
+
+    # --- Productores ---
+
+    def enqueue(self, topic, payload, dedupe_key=None):
+        """Registrar un evento en la transacción actual (sin commit)"""
+        self.enqueue_many(topic, [payload], [dedupe_key])
+
+    def enqueue_many(self, topic, payloads, dedupe_keys=None):
+        """Registrar varios eventos del mismo tema con un solo INSERT (sin commit)"""
+        if not payloads:
+            return
+        dedupe_keys = dedupe_keys or [None] * len(payloads)
+        now = datetime.utcnow()
+        db.session.execute(_insert_ignoring_duplicates(), [{
+            'topic': topic, 'payload': payload, 'dedupe_key': dedupe_key,
+            'attempts': 0, 'available_at': now, 'created_at': now
+        } for payload, dedupe_key in zip(payloads, dedupe_keys)])
+        db.session.info['outbox_pending'] = True
+
+    def _after_commit(self, session):
+        if session.info.pop('outbox_pending', False):
+            self._wake.set()
+
+    def _after_rollback(self, session):
+        session.info.pop('outbox_pending', None)
+
+    # --- Consumidores ---
+
+    def handler(self, topic):
+        """Decorador: fn(events) entrega un lote del tema en la transacción actual (sin commit)"""
+        def decorator(fn):
+            self.handlers[topic] = fn
+            return fn
+        return decorator
+
+    def register_channel(self, channel):
+        """
+        Canal push: channel(notifications) con [{'event_id', 'user_id', 'message'}].
+
+        Se llama antes de confirmar el lote; si lanza una excepción el lote se
+        reintenta, así que puede recibir el mismo event_id más de una vez.
+        """
+        self.channels.append(channel)
+
+    def deliver_notifications(self, rows, kind):
+        """Insertar las notificaciones de un lote y pasarlas a los canales push"""
+        if not rows:
+            return
+        db.session.execute(insert(Notification), [{'user_id': row['user_id'], 'message': row['message']} for row in rows])
+        for channel in self.channels:
+            channel(rows)
+        record_notifications(kind, len(rows))
+
+    # --- Despachador ---
+
+    def serve(self):
+        """Bucle del despachador: drena al recibir aviso o cada OUTBOX_POLL_SECONDS"""
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self._drain_in_context()
+
+    def _drain_in_context(self):
+        with self.app.app_context():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error('outbox_dispatch_failed', error=str(e))
+                db.session.rollback()
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+
+    def drain(self):
+        """Despachar lotes hasta vaciar la cola de eventos disponibles; devuelve cuántos se entregaron"""
+        dispatched = 0
+        while True:
+            claimed, delivered = self.dispatch()
+            dispatched += delivered
+            if claimed < self.batch_size:
+                break
+        self._purge()
+        return dispatched
+
+    def dispatch(self):
+        """
+        Reclamar y entregar un lote.
+
+        Returns:
+            (eventos reclamados, eventos entregados)
+        """
+        events = self._claim()
+        # Un grupo por tema, en el orden en que se escribió su primer evento
+        groups = {}
+        for e in events:
+            groups.setdefault(e.topic, []).append(e)
+        delivered = 0
+        for topic, group in groups.items():
+            delivered += self._deliver(topic, group)
+        return len(events), delivered
+
+    def _claim(self):
+        now = datetime.utcnow()
+        pending = (OutboxEvent.dispatched_at.is_(None), OutboxEvent.available_at <= now,
+                   OutboxEvent.attempts < self.max_attempts)
+        candidates = select(OutboxEvent.id).where(*pending).order_by(OutboxEvent.id).limit(self.batch_size)
+        if db.engine.dialect.name == 'postgresql':
+            candidates = candidates.with_for_update(skip_locked=True)
+        try:
+            ids = db.session.execute(candidates).scalars().all()
+            if not ids:
+                db.session.rollback()
+                return []
+            # Condicionado de nuevo: en SQLite no hay SKIP LOCKED y otro proceso pudo reclamarlos
+            events = db.session.execute(
+                update(OutboxEvent.__table__).where(OutboxEvent.id.in_(ids), *pending).values(
+                    available_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=OutboxEvent.attempts + 1
+                ).returning(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload,
+                            OutboxEvent.attempts, OutboxEvent.created_at)
+            ).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return sorted(events, key=lambda e: e.id)
+
+    def _deliver(self, topic, events):
+        ids = [e.id for e in events]
+        try:
+            handler = self.handlers.get(topic)
+            if handler is None:
+                raise LookupError(f'no handler for topic {topic}')
+            handler(events)
+            now = datetime.utcnow()
+            db.session.execute(
+                update(OutboxEvent.__table__).where(OutboxEvent.id.in_(ids)).values(dispatched_at=now, last_error=None)
+            )
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            OUTBOX_FAILED.labels(topic=topic).inc(len(events))
+            retry = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (max(entry.attempts for entry in events) - 1))
+            db.session.execute(update(OutboxEvent.__table__).where(OutboxEvent.id.in_(ids)).values(
+                available_at=datetime.utcnow() + timedelta(seconds=retry), last_error=f'{type(exc).__name__}: {exc}'[:1000]
+            ))
+            db.session.commit()
+            dead = [entry.id for entry in events if entry.attempts >= self.max_attempts]
+            if dead:
+                OUTBOX_DEAD.labels(topic=topic).inc(len(dead))
+                logger.error('outbox_events_dead', topic=topic, event_ids=dead, error=str(exc))
+            else:
+                logger.warning('outbox_delivery_failed', topic=topic, events=len(events), retry_seconds=retry, error=str(exc))
+            return 0
+
+        OUTBOX_DISPATCHED.labels(topic=topic).inc(len(events))
+        for entry in events:
+            if entry.created_at:
+                OUTBOX_LAG.labels(topic=topic).observe((now - entry.created_at).total_seconds())
+        return len(events)
+
+    def _purge(self):
+        """Borrar los eventos entregados o muertos hace más de OUTBOX_RETENTION_HOURS (como mucho una vez por hora)"""
+        now = datetime.utcnow()
+        if self._purged_at and now - self._purged_at < timedelta(hours=1):
+            return
+        self._purged_at = now
+        try:
+            cutoff = now - self.retention
+            db.session.execute(delete(OutboxEvent).where(or_(
+                OutboxEvent.dispatched_at < cutoff,
+                and_(OutboxEvent.dispatched_at.is_(None), OutboxEvent.attempts >= self.max_attempts,
+                     OutboxEvent.available_at < cutoff)
+            )))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+# Instancia global del servicio
+outbox_service = OutboxService()
+
+
+def _submission_rows(events):
+    """Entrega, estudiante, tarea y profesor de cada evento con payload {'submission_id'}"""
+    student_user = User.__table__.alias('student_user')
+    return db.session.execute(
+        select(Submission.id, Student.user_id.label('student_user_id'), student_user.c.username,
+               Assignment.title, Teacher.user_id.label('teacher_user_id'))
+        .join(Student, Student.id == Submission.student_id)
+        .join(student_user, student_user.c.id == Student.user_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .outerjoin(CourseSubject, CourseSubject.id == Assignment.course_subject_id)
+        .outerjoin(Course, Course.id == CourseSubject.course_id)
+        .outerjoin(Teacher, Teacher.id == Course.teacher_id)
+        .where(Submission.id.in_({e.payload['submission_id'] for e in events}))
+    ).all()
+
+
+@outbox_service.handler('submission.received')
+def deliver_submission_received(events):
+    """CU-13: confirmación al estudiante, aviso al profesor e indexado de similitud"""
+    found = {row.id: row for row in _submission_rows(events)}
+    notifications = []
+    for e in events:
+        row = found.get(e.payload['submission_id'])
+        if row is None:
+            continue
+        notifications.append({
+            'event_id': e.id, 'user_id': row.student_user_id,
+            'message': f'Tu entrega para "{row.title}" ha sido recibida exitosamente'
+        })
+        if row.teacher_user_id:
+            notifications.append({
+                'event_id': e.id, 'user_id': row.teacher_user_id,
+                'message': f'Nueva entrega de {row.username} para "{row.title}"'
+            })
+    outbox_service.deliver_notifications(notifications, 'submission')
+    if found:
+        # Firmas MinHash de las respuestas de texto para la detección de copias
+        similarity_service.schedule_submissions(list(found))
+
+
+@outbox_service.handler('submission.graded')
+def deliver_submission_graded(events):
+    found = {row.id: row for row in _submission_rows(events)}
+    notifications = []
+    for e in events:
+        row = found.get(e.payload['submission_id'])
+        if row is not None:
+            notifications.append({
+                'event_id': e.id, 'user_id': row.student_user_id,
+                'message': f'Tu entrega para "{row.title}" ha sido calificada'
+            })
+    outbox_service.deliver_notifications(notifications, 'graded')
+
+
+@outbox_service.handler('assignment.created')
+def deliver_assignment_created(events):
+    """Aviso de nueva tarea a los estudiantes (INSERT ... SELECT por bloques, idempotente)"""
+    for assignment_id in sorted({e.payload['assignment_id'] for e in events}):
+        reminder_service.insert_assignment_notifications(assignment_id)
+
+
+def analyze_submissions(submission_ids):
+    """Job en segundo plano: retroalimentación de IA de las entregas que aún no la tienen"""
+    with outbox_service.app.app_context():
+        for submission_id in submission_ids:
+            submission = db.session.get(Submission, submission_id)
+            if submission is None or submission.ai_feedback:
+                continue
+            result = gemini_service.analyze_submission(submission_analysis_data(submission))
+            if not result.get('analysis_complete'):
+                logger.warning('ai_analysis_failed', submission_id=submission_id, error=result.get('error'))
+                db.session.rollback()
+                continue
+            submission.ai_feedback = result['feedback']
+            submission.ai_score = result.get('suggested_score')
+            db.session.commit()
+
+
+@outbox_service.handler('submission.ai_analysis')
+def enqueue_ai_analysis(events):
+    """CU-07: encolar el análisis con Gemini fuera del despachador (cada llamada tarda segundos)"""
+    submission_ids = sorted({e.payload['submission_id'] for e in events})
+    reminder_service.scheduler.add_job(
+        func=analyze_submissions,
+        args=[submission_ids],
+        id=f'ai_analysis_{submission_ids[0]}_{submission_ids[-1]}',
+        jobstore='memory',
+        replace_existing=True
+    )
@@ -0,0 +1,152 @@
+"""
+Hash de contraseñas con costo configurable en un pool de procesos acotado
+"""
+import atexit
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+# Contraseñas por trabajo del pool en hash_many
+HASH_MANY_CHUNK = 4
+
+
+@lru_cache(maxsize=4)
+def _context(rounds):
+    return CryptContext(schemes=['bcrypt'], bcrypt__rounds=rounds)
+
+
+def _hash(password, rounds):
+    return _context(rounds).hash(password)
+
+
+def _hash_chunk(passwords, rounds):
+    return [_hash(password, rounds) for password in passwords]
+
+
+def _verify_and_update(password, password_hash, rounds):
+    try:
+        return _context(rounds).verify_and_update(password, password_hash)
+    except ValueError:
+        # hash con formato inválido o irreconocible
+        return False, None
+
+
+class PasswordServiceBusy(Exception):
+    """El pool está saturado; el endpoint debe responder 503"""
+
+
+class PasswordService:
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.timeout = 10
+        self._pool = None
+        self._pool_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar costo (BCRYPT_ROUNDS) y tamaño del pool (PASSWORD_HASH_WORKERS, 0 = en el hilo)"""
+        app.config.setdefault('BCRYPT_ROUNDS', int(os.environ.get('BCRYPT_ROUNDS', 12)))
+        app.config.setdefault('PASSWORD_HASH_WORKERS', int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2)))
+        app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.environ.get('PASSWORD_HASH_QUEUE', 4)))
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10)))
+
+        self.rounds = app.config['BCRYPT_ROUNDS']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        # Trabajos admitidos a la vez (ejecutándose + en cola) antes de rechazar
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) * app.config['PASSWORD_HASH_QUEUE'])
+
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _executor(self):
+        """Pool creado de forma perezosa por proceso (seguro con fork de gunicorn)"""
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _submit(self, fn, *args):
+        """Encola un trabajo si hay plaza en el semáforo; la plaza se libera al terminar el trabajo"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordServiceBusy('password hashing pool saturated')
+        try:
+            future = self._executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordServiceBusy('password hashing timed out')
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._result(self._submit(fn, *args))
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """
+        Hash en paralelo para importaciones masivas, con la misma admisión que hash().
+
+        Cada bloque de HASH_MANY_CHUNK contraseñas ocupa una plaza del semáforo y
+        hay como mucho `workers` bloques en vuelo, así que la importación deja
+        sitio en la cola para los logins. PasswordServiceBusy si no hay plaza o
+        un bloque supera PASSWORD_HASH_TIMEOUT.
+        """
+        passwords = list(passwords)
+        if not self.workers:
+            return [_hash(p, self.rounds) for p in passwords]
+        hashes = []
+        in_flight = deque()
+        try:
+            for start in range(0, len(passwords), HASH_MANY_CHUNK):
+                if len(in_flight) >= self.workers:
+                    hashes.extend(self._result(in_flight.popleft()))
+                in_flight.append(self._submit(_hash_chunk, passwords[start:start + HASH_MANY_CHUNK], self.rounds))
+            while in_flight:
+                hashes.extend(self._result(in_flight.popleft()))
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return hashes
+
+    def verify_and_update(self, password, password_hash):
+        """
+        Verifica la contraseña y, si el hash usa un costo distinto al configurado,
+        devuelve también el hash nuevo para guardarlo.
+
+        Returns:
+            Tupla (válida, hash_nuevo o None)
+        """
+        return self._run(_verify_and_update, password, password_hash, self.rounds)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Instancia global del servicio
+password_service = PasswordService()
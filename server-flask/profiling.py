@@ -0,0 +1,229 @@
+"""
+Perfilado por muestreo de peticiones individuales, bajo demanda
+
+Una petición se perfila si trae la cabecera X-Profile con el valor de
+PROFILING_TOKEN o si sale elegida por PROFILING_SAMPLE_RATE. Un hilo muestrea
+la pila del hilo de la petición cada PROFILING_INTERVAL_MS y acumula pilas
+"plegadas" (formato de flamegraph.pl / speedscope). Si ambos disparadores están
+desactivados no se registra ningún hook.
+
+Los perfiles se guardan en memoria por proceso y se consultan en /api/admin/profiles.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+from auth import role_required
+
+profiling_bp = Blueprint('profiling', __name__, url_prefix='/api/admin/profiles')
+
+MAX_STACK_DEPTH = 128
+
+
+def fold_stack(frame):
+    """Pila del frame como 'raíz;...;hoja'"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def folded_text(samples):
+    return ''.join(f'{stack} {count}\n' for stack, count in samples.most_common())
+
+
+class RequestProfile:
+    _ids = itertools.count(1)
+
+    def __init__(self, method, path, endpoint, trigger):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.trigger = trigger
+        self.started_at = datetime.utcnow()
+        self.duration_ms = None
+        self.status = None
+        self.samples = Counter()
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'trigger': self.trigger,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'samples': sum(self.samples.values()),
+        }
+
+
+class Sampler:
+    """Hilo único que muestrea las pilas de los hilos con un perfil activo"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, profile):
+        with self._lock:
+            self._active[threading.get_ident()] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self):
+        """Tras volver, el hilo de muestreo ya no toca el perfil: se puede agregar sin copiarlo"""
+        with self._lock:
+            return self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wakeup.clear()
+                    continue
+            frames = sys._current_frames()
+            stacks = [(ident, profile, fold_stack(frames[ident])) for ident, profile in active.items() if ident in frames]
+            del frames
+            # Solo los perfiles que siguen activos: stop() los retira bajo el mismo lock
+            with self._lock:
+                for ident, profile, stack in stacks:
+                    if self._active.get(ident) is profile:
+                        profile.samples[stack] += 1
+            time.sleep(self.interval)
+
+
+class ProfilingService:
+    def __init__(self, app=None):
+        self.sampler = Sampler(0.005)
+        self.profiles = deque(maxlen=100)
+        self.aggregate = {}
+        self._lock = threading.Lock()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registrar los hooks solo si hay algún disparador configurado"""
+        app.config.setdefault('PROFILING_TOKEN', os.environ.get('PROFILING_TOKEN'))
+        app.config.setdefault('PROFILING_SAMPLE_RATE', float(os.environ.get('PROFILING_SAMPLE_RATE', 0)))
+        app.config.setdefault('PROFILING_INTERVAL_MS', float(os.environ.get('PROFILING_INTERVAL_MS', 5)))
+        app.config.setdefault('PROFILING_MAX_PROFILES', int(os.environ.get('PROFILING_MAX_PROFILES', 100)))
+
+        self.sampler = Sampler(app.config['PROFILING_INTERVAL_MS'] / 1000)
+        self.profiles = deque(maxlen=app.config['PROFILING_MAX_PROFILES'])
+        self.aggregate = {}
+
+        if app.config['PROFILING_TOKEN'] or app.config['PROFILING_SAMPLE_RATE'] > 0:
+            app.before_request(self._start)
+            app.after_request(self._tag_response)
+            app.teardown_request(self._stop)
+
+    def _trigger(self):
+        token = current_app.config['PROFILING_TOKEN']
+        if token and request.headers.get('X-Profile') == token:
+            return 'header'
+        rate = current_app.config['PROFILING_SAMPLE_RATE']
+        if rate > 0 and random.random() < rate:
+            return 'sample'
+        return None
+
+    def _start(self):
+        if request.blueprint == profiling_bp.name:
+            return
+        trigger = self._trigger()
+        if trigger:
+            g.request_profile = RequestProfile(request.method, request.path, request.endpoint, trigger)
+            g.request_profile_started = time.perf_counter()
+            self.sampler.start(g.request_profile)
+
+    def _tag_response(self, response):
+        profile = g.get('request_profile')
+        if profile is not None:
+            profile.status = response.status_code
+            response.headers['X-Profile-Id'] = str(profile.id)
+        return response
+
+    def _stop(self, exc):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return
+        self.sampler.stop()
+        profile.duration_ms = round((time.perf_counter() - g.pop('request_profile_started')) * 1000, 2)
+        with self._lock:
+            self.profiles.append(profile)
+            self.aggregate.setdefault(profile.endpoint or profile.path, Counter()).update(profile.samples)
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self.profiles if p.id == profile_id), None)
+
+    def flamegraph(self, endpoint=None):
+        with self._lock:
+            if endpoint:
+                return Counter(self.aggregate.get(endpoint, {}))
+            total = Counter()
+            for samples in self.aggregate.values():
+                total.update(samples)
+            return total
+
+    def clear(self):
+        with self._lock:
+            self.profiles.clear()
+            self.aggregate.clear()
+
+
+# Instancia global del servicio
+profiling_service = ProfilingService()
+
+
+@profiling_bp.route('', methods=['GET'])
+@role_required('admin')
+def list_profiles():
+    """Perfiles recientes de este proceso (más recientes primero)"""
+    return jsonify([p.summary() for p in reversed(profiling_service.profiles)]), 200
+
+
+@profiling_bp.route('/<int:profile_id>', methods=['GET'])
+@role_required('admin')
+def get_profile(profile_id):
+    """Un perfil; ?format=folded devuelve las pilas en texto para flamegraph.pl / speedscope"""
+    profile = profiling_service.get(profile_id)
+    if not profile:
+        return jsonify({'msg': 'profile not found'}), 404
+    if request.args.get('format') == 'folded':
+        return Response(folded_text(profile.samples), mimetype='text/plain')
+    return jsonify({**profile.summary(), 'stacks': dict(profile.samples.most_common())}), 200
+
+
+@profiling_bp.route('/flamegraph', methods=['GET'])
+@role_required('admin')
+def get_flamegraph():
+    """Pilas agregadas de todos los perfiles (o de ?endpoint=) en formato plegado"""
+    samples = profiling_service.flamegraph(request.args.get('endpoint'))
+    return Response(folded_text(samples), mimetype='text/plain')
+
+
+@profiling_bp.route('', methods=['DELETE'])
+@role_required('admin')
+def clear_profiles():
+    profiling_service.clear()
+    return jsonify({'msg': 'cleared'}), 200
@@ -1,16 +1,62 @@
 """
 Sistema de recordatorios automáticos para tareas
+
+Cada tarea con due_date registra un temporizador por offset (REMINDER_OFFSETS_HOURS,
+por defecto 24 y 1 horas) en un job store persistente de APScheduler, así que los
+recordatorios salen a su hora, sobreviven a reinicios y no hay escaneo periódico.
+
+El job store lo comparten los schedulers de todos los workers de gunicorn, así
+que un mismo temporizador puede dispararse en varios procesos: los avisos se
+insertan con ON CONFLICT DO NOTHING sobre (user_id, assignment_id, kind) y cada
+estudiante recibe uno solo.
 """
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from models import db, Assignment, Notification, Submission, Student
+from sqlalchemy import exists, func, insert, literal, select
 import atexit
+import os
+
+from metrics import record_notifications, time_job
+
+# Estudiantes por sentencia INSERT ... SELECT en el aviso de nuevas tareas
+FANOUT_CHUNK_SIZE = 5000
+
+NOTIFICATION_COLUMNS = ['user_id', 'message', 'assignment_id', 'kind', 'created_at', 'read', 'updated_at']
+
+
+def reminder_job_id(assignment_id, offset_hours):
+    return f'reminder_{assignment_id}_{offset_hours}h'
+
+
+def reminder_kind(offset_hours):
+    return f'reminder_{offset_hours}h'
+
+
+def _insert_notifications():
+    """INSERT que omite los avisos ya creados para (user_id, assignment_id, kind)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(Notification)
+    return dialect_insert(Notification).on_conflict_do_nothing(index_elements=['user_id', 'assignment_id', 'kind'])
+
+
+def send_reminder_job(assignment_id, offset_hours):
+    """Punto de entrada de los jobs persistidos (referencia textual estable)"""
+    return reminder_service.send_reminder(assignment_id, offset_hours)
 
 
 class ReminderService:
     def __init__(self, app=None):
         self.scheduler = BackgroundScheduler()
         self.app = app
+        self.offsets = (24, 1)
         
         if app:
             self.init_app(app)
@@ -18,91 +64,190 @@ class ReminderService:
     def init_app(self, app):
         """Inicializar el servicio con la app Flask"""
         self.app = app
+        app.config.setdefault('REMINDER_OFFSETS_HOURS', os.environ.get('REMINDER_OFFSETS_HOURS', '24,1'))
+        app.config.setdefault('REMINDER_JOBSTORE_URL', os.environ.get('REMINDER_JOBSTORE_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+        self.offsets = tuple(sorted(
+            (int(h) for h in str(app.config['REMINDER_OFFSETS_HOURS']).split(',') if h.strip()), reverse=True
+        ))
         
-        # Configurar tareas programadas
-        # Verificar recordatorios cada hora
-        self.scheduler.add_job(
-            func=self.check_due_dates,
-            trigger="interval",
-            hours=1,
-            id='check_due_dates'
-        )
+        # Temporizadores de recordatorio en la BD; jobs puntuales (similitud, IA) solo en memoria
+        jobstore_url = app.config['REMINDER_JOBSTORE_URL']
+        if jobstore_url in ('sqlite://', 'sqlite:///:memory:'):
+            self.scheduler.add_jobstore(MemoryJobStore(), 'default')
+        else:
+            self.scheduler.add_jobstore(SQLAlchemyJobStore(url=jobstore_url, tablename='apscheduler_jobs'), 'default')
+        self.scheduler.add_jobstore(MemoryJobStore(), 'memory')
         
-        # Iniciar scheduler
+        # Iniciar scheduler (recarga los temporizadores pendientes del job store)
         self.scheduler.start()
         
+        # Registrar temporizadores de tareas creadas mientras el scheduler no corría
+        self.scheduler.add_job(func=self.sync_reminders, id='sync_reminders', jobstore='memory')
+        
         # Asegurar que el scheduler se cierre al salir
         atexit.register(lambda: self.scheduler.shutdown())
     
-    def check_due_dates(self):
-        """Verificar tareas próximas a vencer y enviar recordatorios"""
+    def schedule_reminders(self, assignment_id, due_date):
+        """
+        Registrar (o reemplazar) los temporizadores de una tarea; sin due_date se eliminan.
+        
+        De los offsets cuyo momento ya pasó solo se envía el menor, de inmediato.
+        """
+        now = datetime.utcnow()
+        if due_date is not None and due_date.tzinfo:
+            due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+        passed = [offset for offset in self.offsets if due_date and due_date - timedelta(hours=offset) <= now]
+        for offset in self.offsets:
+            job_id = reminder_job_id(assignment_id, offset)
+            if not due_date or due_date <= now or (offset in passed and offset != min(passed)):
+                if self.scheduler.get_job(job_id):
+                    self.scheduler.remove_job(job_id)
+                continue
+            self.scheduler.add_job(
+                func='reminder_service:send_reminder_job',
+                trigger='date',
+                run_date=max(due_date - timedelta(hours=offset), now),
+                args=[assignment_id, offset],
+                id=job_id,
+                replace_existing=True,
+                coalesce=True,
+                misfire_grace_time=None
+            )
+    
+    def sync_reminders(self):
+        """Crear los temporizadores que falten para las tareas con vencimiento futuro"""
         if not self.app:
             return
         
         with self.app.app_context():
             try:
-                now = datetime.utcnow()
-                
-                # Buscar tareas que vencen en las próximas 24 horas
-                upcoming = Assignment.query.filter(
-                    Assignment.due_date.between(now, now + timedelta(hours=24))
-                ).all()
-                
-                for assignment in upcoming:
-                    # Obtener estudiantes que no han entregado
-                    submitted_student_ids = [s.student_id for s in Submission.query.filter_by(assignment_id=assignment.id).all()]
-                    
-                    # Obtener todos los estudiantes (TODO: filtrar por curso cuando se implemente matrícula)
-                    students = Student.query.filter(~Student.id.in_(submitted_student_ids) if submitted_student_ids else True).all()
-                    
-                    for student in students:
-                        # Verificar si ya se envió recordatorio
-                        existing = Notification.query.filter_by(
-                            user_id=student.user_id,
-                            message=f'Recordatorio: La tarea "{assignment.title}" vence pronto'
-                        ).first()
-                        
-                        if not existing:
-                            # Crear notificación
-                            hours_left = int((assignment.due_date - now).total_seconds() / 3600)
-                            notification = Notification(
-                                user_id=student.user_id,
-                                message=f'Recordatorio: La tarea "{assignment.title}" vence en {hours_left} horas'
-                            )
-                            db.session.add(notification)
-                
-                db.session.commit()
-                print(f"[ReminderService] Checked due dates at {now}")
-                
+                with time_job('sync_reminders'):
+                    existing = {job.id for job in self.scheduler.get_jobs(jobstore='default')}
+                    upcoming = db.session.query(Assignment.id, Assignment.due_date).filter(
+                        Assignment.due_date > datetime.utcnow()
+                    ).all()
+                    for assignment_id, due_date in upcoming:
+                        if any(reminder_job_id(assignment_id, offset) not in existing for offset in self.offsets):
+                            self.schedule_reminders(assignment_id, due_date)
             except Exception as e:
-                print(f"[ReminderService] Error checking due dates: {e}")
+                print(f"[ReminderService] Error syncing reminders: {e}")
                 db.session.rollback()
     
-    def send_assignment_notification(self, assignment_id, student_ids):
-        """Enviar notificación de nueva tarea a estudiantes específicos"""
+    def send_reminder(self, assignment_id, offset_hours):
+        """Recordatorio de una tarea a los estudiantes que no han entregado (un INSERT ... SELECT)"""
+        if not self.app:
+            return 0
+        
+        with self.app.app_context():
+            try:
+                with time_job('send_reminder'):
+                    assignment = db.session.query(Assignment.title, Assignment.due_date).filter_by(id=assignment_id).first()
+                    if not assignment or not assignment.due_date or assignment.due_date <= datetime.utcnow():
+                        return 0
+                    created = self._insert_reminders(assignment_id, assignment.title, offset_hours)
+                    db.session.commit()
+                    record_notifications('reminder', created)
+                    return created
+            except Exception as e:
+                print(f"[ReminderService] Error sending reminder: {e}")
+                db.session.rollback()
+                return 0
+    
+    def _insert_reminders(self, assignment_id, title, offset_hours):
+        """Sin commit; omite a quien ya entregó o ya tiene este recordatorio (idempotente entre workers)"""
+        now = datetime.utcnow()
+        kind = reminder_kind(offset_hours)
+        message = f'Recordatorio: La tarea "{title}" vence en menos de {offset_hours} hora{"" if offset_hours == 1 else "s"}'
+        submitted = exists().where(Submission.assignment_id == assignment_id, Submission.student_id == Student.id)
+        notified = exists().where(
+            Notification.user_id == Student.user_id, Notification.assignment_id == assignment_id, Notification.kind == kind
+        )
+        # TODO: filtrar por curso cuando se implemente matrícula
+        # NOT EXISTS evita el trabajo; la restricción única resuelve las carreras entre workers
+        result = db.session.execute(_insert_notifications().from_select(
+            NOTIFICATION_COLUMNS,
+            select(
+                Student.user_id, literal(message), literal(assignment_id), literal(kind), literal(now), literal(False), literal(now)
+            ).where(~submitted, ~notified)
+        ))
+        return result.rowcount
+    
+    def check_due_dates(self):
+        """
+        Barrido manual de respaldo: envía los recordatorios cuyo momento ya pasó
+        para las tareas que vencen en las próximas 24 horas. No está programado;
+        los temporizadores por tarea lo hacen innecesario.
+        """
         if not self.app:
             return
         
         with self.app.app_context():
             try:
-                assignment = Assignment.query.get(assignment_id)
-                if not assignment:
-                    return
-                
-                for student_id in student_ids:
-                    student = Student.query.get(student_id)
-                    if student:
-                        notification = Notification(
-                            user_id=student.user_id,
-                            message=f'Nueva tarea asignada: "{assignment.title}"'
-                        )
-                        db.session.add(notification)
-                
-                db.session.commit()
+                with time_job('check_due_dates'):
+                    now = datetime.utcnow()
+                    upcoming = db.session.query(Assignment.id, Assignment.title, Assignment.due_date).filter(
+                        Assignment.due_date.between(now, now + timedelta(hours=max(self.offsets)))
+                    ).all()
+                    
+                    created = 0
+                    for assignment_id, title, due_date in upcoming:
+                        for offset in self.offsets:
+                            if due_date - timedelta(hours=offset) <= now:
+                                created += self._insert_reminders(assignment_id, title, offset)
+                    
+                    db.session.commit()
+                    record_notifications('reminder', created)
+                    print(f"[ReminderService] Checked due dates at {now}")
                 
             except Exception as e:
-                print(f"[ReminderService] Error sending notification: {e}")
+                print(f"[ReminderService] Error checking due dates: {e}")
                 db.session.rollback()
+    
+    def insert_assignment_notifications(self, assignment_id, student_ids=None):
+        """
+        Aviso de nueva tarea con INSERT ... SELECT por bloques de ids de estudiante (sin commit).
+        
+        Lo llama el handler 'assignment.created' del outbox dentro de su transacción;
+        repetirlo no duplica avisos (ON CONFLICT sobre user_id, assignment_id, kind).
+        
+        Args:
+            assignment_id: tarea publicada
+            student_ids: destinatarios; None = todos los estudiantes del curso
+                (TODO: filtrar por matrícula cuando se implemente)
+        
+        Returns:
+            Número de notificaciones creadas
+        """
+        with time_job('send_assignment_notification'):
+            title = db.session.query(Assignment.title).filter_by(id=assignment_id).scalar()
+            if title is None:
+                return 0
+            
+            now = datetime.utcnow()
+            values = [
+                literal(f'Nueva tarea asignada: "{title}"'), literal(assignment_id), literal('new_assignment'),
+                literal(now), literal(False), literal(now)
+            ]
+            
+            if student_ids is None:
+                low, high = db.session.query(func.min(Student.id), func.max(Student.id)).one()
+                chunks = [] if low is None else [
+                    (Student.id >= start, Student.id < start + FANOUT_CHUNK_SIZE)
+                    for start in range(low, high + 1, FANOUT_CHUNK_SIZE)
+                ]
+            else:
+                ids = list(student_ids)
+                chunks = [(Student.id.in_(ids[i:i + FANOUT_CHUNK_SIZE]),) for i in range(0, len(ids), FANOUT_CHUNK_SIZE)]
+            
+            created = 0
+            for criteria in chunks:
+                result = db.session.execute(
+                    _insert_notifications().from_select(NOTIFICATION_COLUMNS, select(Student.user_id, *values).where(*criteria))
+                )
+                created += result.rowcount
+            
+            record_notifications('new_assignment', created)
+            return created
 
 
 # Instancia global del servicio
@@ -0,0 +1,186 @@
+"""
+Lista de tokens revocados: filtro de Bloom en proceso + tabla revoked_tokens (y Redis opcional)
+
+El hook de blocklist de JWTManager solo consulta el almacén cuando el filtro de
+Bloom da positivo, así que los tokens válidos (la inmensa mayoría) no añaden un
+viaje a la BD. Cada proceso sincroniza de forma incremental las revocaciones de
+otros workers cada JWT_REVOCATION_SYNC_SECONDS.
+
+La sincronización incremental lee por revoked_at y no por id: los ids se
+asignan antes del commit, así que una revocación con id bajo puede confirmarse
+después de que otro worker haya leído ids más altos. Cada lectura se solapa
+JWT_REVOCATION_SYNC_OVERLAP_SECONDS con la anterior (transacciones lentas,
+relojes desfasados entre hosts) y los jti ya vistos en esa ventana se omiten.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import delete, insert
+
+from instrumentation import auth_queries
+from models import db, RevokedToken
+
+logger = structlog.get_logger()
+
+
+def _insert_ignoring_duplicates():
+    """INSERT que omite los jti ya revocados (logout repetido con el mismo token)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(RevokedToken)
+    return dialect_insert(RevokedToken).on_conflict_do_nothing(index_elements=['jti'])
+
+
+class BloomFilter:
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationService:
+    def __init__(self, app=None, jwt=None):
+        self.app = app
+        self.bloom = BloomFilter()
+        self.redis = None
+        self.capacity = 100000
+        self.sync_seconds = 5
+        self.sync_overlap = timedelta(seconds=60)
+        self.rebuild_seconds = 3600
+        self._synced_at = None
+        self._recent = {}
+        self._next_sync = 0
+        self._next_rebuild = 0
+        self._lock = threading.Lock()
+
+        if app and jwt:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        """Configurar el servicio y registrar el hook de blocklist en JWTManager"""
+        self.app = app
+        app.config.setdefault('JWT_REVOCATION_CAPACITY', int(os.environ.get('JWT_REVOCATION_CAPACITY', 100000)))
+        app.config.setdefault('JWT_REVOCATION_SYNC_SECONDS', float(os.environ.get('JWT_REVOCATION_SYNC_SECONDS', 5)))
+        app.config.setdefault('JWT_REVOCATION_SYNC_OVERLAP_SECONDS', float(os.environ.get('JWT_REVOCATION_SYNC_OVERLAP_SECONDS', 60)))
+        app.config.setdefault('JWT_REVOCATION_REDIS_URL', os.environ.get('JWT_REVOCATION_REDIS_URL'))
+
+        self.capacity = app.config['JWT_REVOCATION_CAPACITY']
+        self.sync_seconds = app.config['JWT_REVOCATION_SYNC_SECONDS']
+        self.sync_overlap = timedelta(seconds=app.config['JWT_REVOCATION_SYNC_OVERLAP_SECONDS'])
+        self.bloom = BloomFilter(self.capacity)
+        self._synced_at = None
+        self._recent = {}
+        self._next_sync = 0
+        self._next_rebuild = 0
+
+        self.redis = None
+        if app.config['JWT_REVOCATION_REDIS_URL']:
+            import redis
+
+            self.redis = redis.Redis.from_url(app.config['JWT_REVOCATION_REDIS_URL'])
+
+        @jwt.token_in_blocklist_loader
+        def check_if_token_revoked(jwt_header, jwt_payload):
+            return self.is_revoked(jwt_payload['jti'])
+
+    def revoke(self, jwt_payload):
+        """Revocar el token descrito por su payload (access o refresh); repetirlo no falla"""
+        jti = jwt_payload['jti']
+        expires_at = datetime.fromtimestamp(jwt_payload['exp'], tz=timezone.utc).replace(tzinfo=None)
+        identity = jwt_payload.get(self.app.config.get('JWT_IDENTITY_CLAIM', 'sub')) or {}
+
+        db.session.execute(_insert_ignoring_duplicates().values(
+            jti=jti,
+            token_type=jwt_payload.get('type', 'access'),
+            user_id=identity.get('user_id') if isinstance(identity, dict) else None,
+            expires_at=expires_at,
+            revoked_at=datetime.utcnow()
+        ))
+        db.session.commit()
+
+        with self._lock:
+            self.bloom.add(jti)
+        if self.redis is not None:
+            ttl = max(1, int(jwt_payload['exp'] - time.time()))
+            self.redis.set(f'revoked:{jti}', 1, ex=ttl)
+
+    def is_revoked(self, jti):
+        with auth_queries():
+            self._maybe_sync()
+            if jti not in self.bloom:
+                return False
+            # Positivo (real o falso): confirmar en el almacén
+            if self.redis is not None:
+                return bool(self.redis.exists(f'revoked:{jti}'))
+            return db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if now < self._next_sync:
+                return
+            if now >= self._next_rebuild or self._synced_at is None:
+                self._rebuild()
+                self._next_rebuild = now + self.rebuild_seconds
+            else:
+                self._load(RevokedToken.revoked_at > self._synced_at - self.sync_overlap)
+            self._next_sync = now + self.sync_seconds
+
+    def _load(self, *criteria):
+        started = datetime.utcnow()
+        rows = db.session.query(RevokedToken.jti, RevokedToken.revoked_at).filter(
+            RevokedToken.expires_at > started, *criteria
+        ).all()
+        # jti vistos dentro de la ventana de solape: la siguiente lectura los vuelve a traer
+        horizon = started - self.sync_overlap
+        recent = {jti: revoked_at for jti, revoked_at in self._recent.items() if revoked_at > horizon}
+        for jti, revoked_at in rows:
+            if jti in recent:
+                continue
+            self.bloom.add(jti)
+            if revoked_at is not None and revoked_at > horizon:
+                recent[jti] = revoked_at
+        self._recent = recent
+        self._synced_at = started
+
+    def _rebuild(self):
+        """Los filtros de Bloom no permiten borrar: se reconstruyen sin los tokens ya expirados"""
+        # Conexión y transacción propias: corre dentro del hook de JWT y no debe
+        # confirmar (ni deshacer) lo que la petición tenga pendiente en db.session
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        except Exception as e:
+            # Sin purga el filtro sigue siendo correcto; se reintenta en el siguiente rebuild
+            logger.warning('revoked_tokens_purge_failed', error=str(e))
+        self.bloom = BloomFilter(self.capacity)
+        self._recent = {}
+        self._load()
+
+
+# Instancia global del servicio
+revocation_service = RevocationService()
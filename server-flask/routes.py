@@ -1,86 +1,97 @@
 """
 Rutas adicionales para completar todos los casos de uso
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, abort
+from flask_jwt_extended import jwt_required
+from auth import current_user_id, role_required
 from models import db, User, Teacher, Student, Course, Subject, CourseSubject, Assignment, Question, QuestionOption, Submission, Answer, Notification
+from cache_service import cache_service
+from conditional import conditional_get, conditional_response, make_etag, table_version
+from serializers import serializer
+from db_routing import route_reads_to_replicas
+from instrumentation import query_budget
 from datetime import datetime
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import joinedload, selectinload
 
 # Crear blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
-
-
-def get_current_user():
-    """Helper para obtener el usuario actual"""
-    identity = get_jwt_identity()
-    return User.query.get(identity['user_id'])
-
-
-def role_required(role_name):
-    """Decorator para requerir rol específico"""
-    def decorator(fn):
-        from functools import wraps
-        @wraps(fn)
-        @jwt_required()
-        def wrapper(*args, **kwargs):
-            identity = get_jwt_identity()
-            if not identity:
-                return jsonify({'msg': 'missing identity'}), 401
-            if identity.get('role') != role_name and identity.get('role') != 'admin':
-                return jsonify({'msg': f'forbidden - role required: {role_name}'}), 403
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
+# Los GET de este blueprint leen de las réplicas si hay alguna configurada
+route_reads_to_replicas(api_bp)
+
+
+# ============= SERIALIZADORES =============
+
+subject_ref = serializer('id', 'name')
+subject_row = serializer('id', 'name', 'description')
+course_row = serializer('id', 'name', 'description', 'teacher_id', teacher_name='teacher.user.username')
+course_summary_row = serializer('id', 'name', 'description')
+student_course_row = serializer('id', 'name', 'description', teacher_name='teacher.user.username')
+assignment_row = serializer('id', 'title', 'description', 'due_date', 'type', 'course_subject_id', 'created_at',
+                            'questions_count', 'total_points')
+pending_assignment_row = serializer('id', 'title', 'description', 'type', 'due_date', 'questions_count', 'total_points')
+assignment_detail_row = serializer('id', 'title', 'description', 'due_date', 'type', 'file_url', 'created_at',
+                                   'questions_count', 'total_points')
+question_row = serializer('id', 'text', 'type', 'required', 'order_index', 'points')
+option_row = serializer('id', 'option_text', 'is_correct', 'order_index')
+scale_row = serializer(min='scale_min', max='scale_max', labels='scale_labels')
+teacher_submission_row = serializer('id', 'student_id', 'submission_date', 'status', 'ai_score', 'final_score',
+                                    assignment_title='assignment.title', assignment_type='assignment.type',
+                                    student_name='student.user.username')
+submission_detail_row = serializer('id', 'assignment_id', 'student_id', 'submission_date', 'file_url', 'ai_feedback',
+                                   'ai_score', 'final_score', 'status', assignment_title='assignment.title',
+                                   student_name='student.user.username')
+answer_row = serializer('id', 'question_id', 'selected_options', 'text_answer', 'numeric_answer', 'correct',
+                        'ai_comment')
+grade_row = serializer('id', 'submission_date', 'final_score', 'ai_score', assignment_title='assignment.title',
+                       assignment_type='assignment.type', feedback='ai_feedback')
+submission_grade_row = serializer('id', 'submission_date', 'status', 'final_score', 'ai_score', 'ai_feedback',
+                                  assignment_title='assignment.title',
+                                  assignment_description='assignment.description')
+
+
+def teacher_users_version():
+    """Versión de los usuarios profesores: los listados de cursos incluyen su username"""
+    return table_version(User, User.id.in_(select(Teacher.user_id)))
 
 
 # ============= ENDPOINTS PARA LISTAR (GET) =============
 
 @api_bp.route('/courses', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda: (table_version(Course), teacher_users_version()))
 def list_courses():
     """CU-02: Listar todos los cursos"""
     courses = Course.query.all()
-    result = []
-    for c in courses:
-        teacher_name = None
-        if c.teacher and c.teacher.user:
-            teacher_name = c.teacher.user.username
-        result.append({
-            'id': c.id,
-            'name': c.name,
-            'description': c.description,
-            'teacher_id': c.teacher_id,
-            'teacher_name': teacher_name
-        })
-    return jsonify(result), 200
+    return jsonify([course_row(c) for c in courses]), 200
 
 
 @api_bp.route('/subjects', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda: table_version(Subject))
 def list_subjects():
     """CU-02: Listar todas las asignaturas"""
     subjects = Subject.query.all()
-    result = [{'id': s.id, 'name': s.name, 'description': s.description} for s in subjects]
-    return jsonify(result), 200
+    return jsonify([subject_row(s) for s in subjects]), 200
 
 
 @api_bp.route('/teacher/<int:teacher_id>/courses', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda teacher_id: (table_version(Course, Course.teacher_id == teacher_id), table_version(CourseSubject), table_version(Subject)))
 def get_teacher_courses(teacher_id):
     """CU-02: Obtener cursos de un profesor específico"""
     courses = Course.query.filter_by(teacher_id=teacher_id).all()
     result = [{
-        'id': c.id,
-        'name': c.name,
-        'description': c.description,
-        'subjects': [{'id': cs.subject.id, 'name': cs.subject.name} for cs in c.course_subjects]
+        **course_summary_row(c),
+        'subjects': [subject_ref(cs.subject) for cs in c.course_subjects]
     } for c in courses]
     return jsonify(result), 200
 
 
 @api_bp.route('/assignments', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda: table_version(Assignment))
+@query_budget(2)
 def list_assignments():
     """CU-03.1: Listar tareas con filtros"""
     course_id = request.args.get('course_id', type=int)
@@ -104,99 +115,73 @@ def list_assignments():
     
     assignments = query.order_by(Assignment.created_at.desc()).all()
     
-    result = []
-    for a in assignments:
-        result.append({
-            'id': a.id,
-            'title': a.title,
-            'description': a.description,
-            'due_date': a.due_date.isoformat() if a.due_date else None,
-            'type': a.type,
-            'course_subject_id': a.course_subject_id,
-            'created_at': a.created_at.isoformat(),
-            'questions_count': len(a.questions)
-        })
-    
-    return jsonify(result), 200
+    return jsonify([assignment_row(a) for a in assignments]), 200
 
 
-@api_bp.route('/assignments/<int:assignment_id>', methods=['GET'])
-@jwt_required()
-def get_assignment_detail(assignment_id):
-    """Obtener detalle completo de una tarea"""
-    assignment = Assignment.query.get_or_404(assignment_id)
-    
+def load_assignment_detail(assignment_id):
+    """Cargar el árbol completo de una tarea en 3 consultas (tarea, preguntas+escala, opciones)"""
+    assignment = Assignment.query.options(
+        selectinload(Assignment.questions).joinedload(Question.scale),
+        selectinload(Assignment.questions).selectinload(Question.options),
+    ).filter_by(id=assignment_id).first()
+    if not assignment:
+        return None
+
     questions = []
-    for q in assignment.questions:
-        question_data = {
-            'id': q.id,
-            'text': q.text,
-            'type': q.type,
-            'required': q.required,
-            'order_index': q.order_index
-        }
+    for q in sorted(assignment.questions, key=lambda q: (q.order_index or 0, q.id)):
+        question_data = question_row(q)
         
         if q.options:
-            question_data['options'] = [{
-                'id': opt.id,
-                'option_text': opt.option_text,
-                'is_correct': opt.is_correct,
-                'order_index': opt.order_index
-            } for opt in q.options]
+            question_data['options'] = [option_row(opt) for opt in sorted(q.options, key=lambda o: (o.order_index or 0, o.id))]
         
         if q.scale:
-            question_data['scale'] = {
-                'min': q.scale.scale_min,
-                'max': q.scale.scale_max,
-                'labels': q.scale.scale_labels
-            }
+            question_data['scale'] = scale_row(q.scale)
         
         questions.append(question_data)
     
-    return jsonify({
-        'id': assignment.id,
-        'title': assignment.title,
-        'description': assignment.description,
-        'due_date': assignment.due_date.isoformat() if assignment.due_date else None,
-        'type': assignment.type,
-        'file_url': assignment.file_url,
-        'created_at': assignment.created_at.isoformat(),
-        'questions': questions
-    }), 200
+    return {**assignment_detail_row(assignment), 'questions': questions}
+
+
+@api_bp.route('/assignments/<int:assignment_id>', methods=['GET'])
+@jwt_required()
+@query_budget(6)
+def get_assignment_detail(assignment_id):
+    """Obtener detalle completo de una tarea (caché versionada + ETag por versión)"""
+    version = db.session.query(Assignment.version).filter_by(id=assignment_id).scalar()
+    if version is None:
+        abort(404)
+
+    def build():
+        payload = cache_service.get_or_load(
+            f'assignment_detail:{assignment_id}:v{version}',
+            lambda: load_assignment_detail(assignment_id)
+        )
+        if payload is None:
+            abort(404)
+        return jsonify(payload), 200
+
+    return conditional_response(make_etag(request.full_path, version), build)
 
 
 # ============= ENDPOINTS PARA PROFESORES =============
 
 @api_bp.route('/teacher/submissions', methods=['GET'])
-@role_required('teacher')
-def get_teacher_submissions():
+@role_required('teacher', inject_profile=True)
+def get_teacher_submissions(teacher_id):
     """CU-08: Revisar todas las entregas del profesor"""
-    identity = get_jwt_identity()
-    user = User.query.get(identity['user_id'])
-    teacher = user.teacher
-    
-    if not teacher:
+    if not teacher_id:
         return jsonify({'msg': 'teacher profile not found'}), 404
     
     # Obtener todas las entregas de cursos del profesor
     submissions = db.session.query(Submission).join(Assignment).join(CourseSubject).join(Course).filter(
-        Course.teacher_id == teacher.id
+        Course.teacher_id == teacher_id
     ).order_by(Submission.submission_date.desc()).all()
     
     result = []
     for sub in submissions:
-        student_name = sub.student.user.username if sub.student and sub.student.user else 'Unknown'
-        result.append({
-            'id': sub.id,
-            'assignment_title': sub.assignment.title,
-            'assignment_type': sub.assignment.type,
-            'student_name': student_name,
-            'student_id': sub.student_id,
-            'submission_date': sub.submission_date.isoformat(),
-            'status': sub.status,
-            'ai_score': float(sub.ai_score) if sub.ai_score else None,
-            'final_score': float(sub.final_score) if sub.final_score else None
-        })
+        row = teacher_submission_row(sub)
+        row['student_name'] = row['student_name'] or 'Unknown'
+        result.append(row)
     
     return jsonify(result), 200
 
@@ -211,80 +196,47 @@ def get_submission_detail(submission_id):
     answers_detail = []
     for answer in submission.answers:
         question = Question.query.get(answer.question_id)
-        answer_data = {
-            'id': answer.id,
-            'question_id': answer.question_id,
-            'question_text': question.text if question else None,
-            'question_type': question.type if question else None,
-            'selected_options': answer.selected_options,
-            'text_answer': answer.text_answer,
-            'numeric_answer': float(answer.numeric_answer) if answer.numeric_answer else None,
-            'correct': answer.correct,
-            'ai_comment': answer.ai_comment
-        }
+        answer_data = answer_row(answer)
+        answer_data['question_text'] = question.text if question else None
+        answer_data['question_type'] = question.type if question else None
         answers_detail.append(answer_data)
     
-    return jsonify({
-        'id': submission.id,
-        'assignment_id': submission.assignment_id,
-        'assignment_title': submission.assignment.title,
-        'student_id': submission.student_id,
-        'student_name': submission.student.user.username if submission.student and submission.student.user else None,
-        'submission_date': submission.submission_date.isoformat(),
-        'file_url': submission.file_url,
-        'ai_feedback': submission.ai_feedback,
-        'ai_score': float(submission.ai_score) if submission.ai_score else None,
-        'final_score': float(submission.final_score) if submission.final_score else None,
-        'status': submission.status,
-        'answers': answers_detail
-    }), 200
+    return jsonify({**submission_detail_row(submission), 'answers': answers_detail}), 200
 
 
 # ============= ENDPOINTS PARA ESTUDIANTES =============
 
 @api_bp.route('/student/courses', methods=['GET'])
-@role_required('student')
-def get_student_courses():
+@role_required('student', inject_profile=True)
+@conditional_get(lambda student_id: (student_id, table_version(Course), teacher_users_version(), table_version(CourseSubject), table_version(Subject)))
+def get_student_courses(student_id):
     """CU-12: Consultar materias asignadas del estudiante"""
-    identity = get_jwt_identity()
-    user = User.query.get(identity['user_id'])
-    student = user.student
-    
-    if not student:
+    if not student_id:
         return jsonify({'msg': 'student profile not found'}), 404
     
     # Por ahora, retornar todos los cursos (TODO: implementar matrícula)
     courses = Course.query.all()
     result = []
     for course in courses:
-        teacher_name = course.teacher.user.username if course.teacher and course.teacher.user else None
-        result.append({
-            'id': course.id,
-            'name': course.name,
-            'description': course.description,
-            'teacher_name': teacher_name,
-            'subjects': [{'id': cs.subject.id, 'name': cs.subject.name} for cs in course.course_subjects]
-        })
+        row = student_course_row(course)
+        row['subjects'] = [subject_ref(cs.subject) for cs in course.course_subjects]
+        result.append(row)
     
     return jsonify(result), 200
 
 
 @api_bp.route('/student/assignments/pending', methods=['GET'])
-@role_required('student')
-def get_student_pending_assignments():
+@role_required('student', inject_profile=True)
+def get_student_pending_assignments(student_id):
     """CU-13: Ver actividades pendientes del estudiante"""
-    identity = get_jwt_identity()
-    user = User.query.get(identity['user_id'])
-    student = user.student
-    
-    if not student:
+    if not student_id:
         return jsonify({'msg': 'student profile not found'}), 404
     
     # Filtros opcionales
     assignment_type = request.args.get('type')
     
     # Obtener IDs de tareas ya entregadas por el estudiante
-    submitted_ids = [s.assignment_id for s in Submission.query.filter_by(student_id=student.id).all()]
+    submitted_ids = [s.assignment_id for s in Submission.query.filter_by(student_id=student_id).all()]
     
     # Obtener tareas no entregadas
     query = Assignment.query.filter(~Assignment.id.in_(submitted_ids) if submitted_ids else True)
@@ -300,32 +252,28 @@ def get_student_pending_assignments():
         if a.due_date:
             days_until_due = (a.due_date - datetime.utcnow()).days
         
-        result.append({
-            'id': a.id,
-            'title': a.title,
-            'description': a.description,
-            'type': a.type,
-            'due_date': a.due_date.isoformat() if a.due_date else None,
-            'days_until_due': days_until_due,
-            'is_overdue': days_until_due < 0 if days_until_due is not None else False,
-            'questions_count': len(a.questions)
-        })
+        row = pending_assignment_row(a)
+        row['days_until_due'] = days_until_due
+        row['is_overdue'] = days_until_due < 0 if days_until_due is not None else False
+        result.append(row)
     
     return jsonify(result), 200
 
 
 @api_bp.route('/student/grades', methods=['GET'])
-@role_required('student')
-def get_student_grades():
+@role_required('student', inject_profile=True)
+@conditional_get(lambda student_id: (student_id, table_version(Submission, Submission.student_id == student_id)))
+@query_budget(3)
+def get_student_grades(student_id):
     """CU-14: Consultar todas las calificaciones del estudiante"""
-    identity = get_jwt_identity()
-    user = User.query.get(identity['user_id'])
-    student = user.student
-    
-    if not student:
+    if not student_id:
         return jsonify({'msg': 'student profile not found'}), 404
     
-    submissions = Submission.query.filter_by(student_id=student.id, status='graded').order_by(Submission.submission_date.desc()).all()
+    # La tarea de cada fila viene en el mismo SELECT (grade_row lee assignment.title/type)
+    submissions = Submission.query.options(joinedload(Submission.assignment)).filter_by(
+        student_id=student_id, status='graded'
+    ).order_by(Submission.submission_date.desc()).all()
+    pending = db.session.query(func.count(Submission.id)).filter_by(student_id=student_id, status='pending').scalar()
     
     result = []
     total_score = 0
@@ -336,15 +284,7 @@ def get_student_grades():
             total_score += float(sub.final_score)
             count += 1
         
-        result.append({
-            'id': sub.id,
-            'assignment_title': sub.assignment.title,
-            'assignment_type': sub.assignment.type,
-            'submission_date': sub.submission_date.isoformat(),
-            'final_score': float(sub.final_score) if sub.final_score else None,
-            'ai_score': float(sub.ai_score) if sub.ai_score else None,
-            'feedback': sub.ai_feedback
-        })
+        result.append(grade_row(sub))
     
     average = total_score / count if count > 0 else 0
     
@@ -353,32 +293,18 @@ def get_student_grades():
         'statistics': {
             'average': round(average, 2),
             'total_assignments': count,
-            'pending_assignments': len(Submission.query.filter_by(student_id=student.id, status='pending').all())
+            'pending_assignments': pending
         }
     }), 200
 
 
 @api_bp.route('/student/submissions/<int:submission_id>/grade', methods=['GET'])
-@role_required('student')
-def get_student_submission_grade(submission_id):
+@role_required('student', inject_profile=True)
+def get_student_submission_grade(submission_id, student_id):
     """CU-14: Ver calificación específica con feedback detallado"""
-    identity = get_jwt_identity()
-    user = User.query.get(identity['user_id'])
-    student = user.student
+    submission = Submission.query.filter_by(id=submission_id, student_id=student_id).first_or_404()
     
-    submission = Submission.query.filter_by(id=submission_id, student_id=student.id).first_or_404()
-    
-    return jsonify({
-        'id': submission.id,
-        'assignment_title': submission.assignment.title,
-        'assignment_description': submission.assignment.description,
-        'submission_date': submission.submission_date.isoformat(),
-        'status': submission.status,
-        'final_score': float(submission.final_score) if submission.final_score else None,
-        'ai_score': float(submission.ai_score) if submission.ai_score else None,
-        'ai_feedback': submission.ai_feedback,
-        'graded': submission.status == 'graded'
-    }), 200
+    return jsonify({**submission_grade_row(submission), 'graded': submission.status == 'graded'}), 200
 
 
 # ============= NOTIFICACIONES =============
@@ -405,10 +331,7 @@ def create_notification():
 @jwt_required()
 def mark_notification_read(notification_id):
     """CU-15: Marcar notificación como leída"""
-    identity = get_jwt_identity()
-    user_id = identity['user_id']
-    
-    notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first_or_404()
+    notification = Notification.query.filter_by(id=notification_id, user_id=current_user_id()).first_or_404()
     notification.read = True
     db.session.commit()
     
@@ -44,6 +44,9 @@ class UserLoginSchema(BaseModel):
     username: str
     password: str
 
+class RosterImportSchema(BaseModel):
+    users: List[UserRegisterSchema] = Field(..., min_length=1)
+
 # Course Schemas
 class CourseCreateSchema(BaseModel):
     name: str = Field(..., min_length=3, max_length=100)
@@ -74,6 +77,7 @@ class QuestionCreateSchema(BaseModel):
     type: QuestionType
     required: bool = True
     order_index: Optional[int] = 0
+    points: float = Field(1, ge=0)
     options: Optional[List[QuestionOptionSchema]] = None
     scale: Optional[QuestionScaleSchema] = None
 
@@ -101,6 +105,21 @@ class GradingSchema(BaseModel):
     final_score: float = Field(..., ge=0, le=100)
     ai_feedback: Optional[str] = None
 
+class GradeEntrySchema(GradingSchema):
+    submission_id: int
+
+class BulkGradingSchema(BaseModel):
+    grades: List[GradeEntrySchema] = Field(..., min_length=1, max_length=1000)
+
+# Batch Schemas
+class BatchItemSchema(BaseModel):
+    id: Optional[str] = Field(None, max_length=64)
+    path: str = Field(..., pattern=r'^/api/')
+    etag: Optional[str] = None
+
+class BatchRequestSchema(BaseModel):
+    requests: List[BatchItemSchema] = Field(..., min_length=1, max_length=20)
+
 # Notification Schemas
 class NotificationSchema(BaseModel):
     user_id: int
@@ -0,0 +1,297 @@
+"""
+Búsqueda de texto completo en cursos, asignaturas, tareas y preguntas
+
+En PostgreSQL se usan índices GIN sobre expresiones tsvector (migraciones
+d7a4f19e2b58 y b8e1c5a7d304): la BD los mantiene al día en cada escritura y la
+consulta repite la misma expresión para que el planificador los use. La
+configuración spanish_unaccent quita las tildes igual que tokenize(), así que
+los dos caminos encuentran 'álgebra' buscando 'algebra' y al revés.
+
+En otros motores (SQLite en desarrollo) se usa un índice invertido en memoria
+por proceso, construido en la primera búsqueda. Antes de cada búsqueda se lee
+un token de versión por tabla (filas y max(updated_at), como table_version):
+si cambió, solo se cargan las filas modificadas desde la versión anterior y,
+si el número de filas no cuadra, se comparan los ids para quitar las borradas
+y añadir las que falten. Así cada worker ve las escrituras de los demás sin
+reconstruir el índice completo.
+
+    GET /api/search?q=álgebra lin&type=assignment,question&page=1&per_page=20
+
+Todas las palabras deben aparecer (AND) y cada una se busca como prefijo.
+"""
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from datetime import timedelta
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, literal, literal_column, null, select, union_all
+
+from db_routing import route_reads_to_replicas
+from models import db, Course, Subject, Assignment, Question
+
+search_bp = Blueprint('search', __name__, url_prefix='/api')
+route_reads_to_replicas(search_bp)
+
+TS_CONFIG = "'spanish_unaccent'::regconfig"
+# Peso de cada campo: título 'A', descripción 'B' (mismos pesos por defecto que ts_rank)
+WEIGHTS = {'A': 1.0, 'B': 0.4}
+MAX_PER_PAGE = 100
+WORD_RE = re.compile(r'\w+')
+# Marcas diacríticas que quedan separadas tras la normalización NFKD
+ACCENT_RE = re.compile('[\u0300-\u036f]')
+# Las filas confirmadas tarde pueden traer un updated_at anterior a la última versión leída
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+# tipo -> (modelo, [(campo, peso)]); el primer campo es el título del resultado
+SEARCHABLE = {
+    'course': (Course, (('name', 'A'), ('description', 'B'))),
+    'subject': (Subject, (('name', 'A'), ('description', 'B'))),
+    'assignment': (Assignment, (('title', 'A'), ('description', 'B'))),
+    'question': (Question, (('text', 'A'),)),
+}
+
+
+def tsvector_sql(fields):
+    """Expresión tsvector de los índices GIN (debe coincidir con la de la migración)"""
+    return ' || '.join(
+        f"setweight(to_tsvector({TS_CONFIG}, coalesce({column}, '')), '{weight}')" for column, weight in fields
+    )
+
+
+def tokenize(text):
+    """Palabras en minúsculas y sin tildes"""
+    if not text:
+        return []
+    return WORD_RE.findall(ACCENT_RE.sub('', unicodedata.normalize('NFKD', text.lower())))
+
+
+def _assignment_id(kind, obj, default=None):
+    """Tarea a la que lleva el resultado (columna si obj es el modelo, valor si es una instancia)"""
+    if kind == 'question':
+        return obj.assignment_id
+    if kind == 'assignment':
+        return obj.id
+    return default
+
+
+class InvertedIndex:
+    """Índice invertido en memoria con búsqueda por prefijo y ranking tf-idf ponderado por campo"""
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.counts = {}
+        # tipo -> (filas, max(updated_at)) de la última sincronización con la BD
+        self.versions = {}
+        self._terms = None
+        self._lock = threading.RLock()
+
+    def add(self, kind, doc_id, values, assignment_id=None):
+        """values: textos de los campos en el orden de SEARCHABLE"""
+        with self._lock:
+            self.remove(kind, doc_id)
+            key = (kind, doc_id)
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            weights = {}
+            for (column, weight), text in zip(SEARCHABLE[kind][1], values):
+                for term in tokenize(text):
+                    weights[term] = weights.get(term, 0) + WEIGHTS[weight]
+            for term, weight in weights.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    self._terms = None
+                self.postings[term][key] = weight
+            self.docs[key] = {'title': values[0], 'assignment_id': assignment_id, 'terms': tuple(weights)}
+
+    def remove(self, kind, doc_id):
+        with self._lock:
+            doc = self.docs.pop((kind, doc_id), None)
+            if doc is None:
+                return
+            self.counts[kind] -= 1
+            for term in doc['terms']:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop((kind, doc_id), None)
+                    if not postings:
+                        del self.postings[term]
+                        self._terms = None
+
+    def ids(self, kind):
+        with self._lock:
+            return {doc_id for doc_kind, doc_id in self.docs if doc_kind == kind}
+
+    def _expand(self, prefix):
+        """Términos del índice que empiezan por prefix"""
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        start = bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, tokens, kinds):
+        """[(puntuación, (tipo, id))] de los documentos que contienen todos los prefijos"""
+        with self._lock:
+            total_docs = len(self.docs) or 1
+            scores = None
+            for token in tokens:
+                matches = {}
+                for term in self._expand(token):
+                    postings = self.postings[term]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for key, weight in postings.items():
+                        if key[0] in kinds:
+                            matches[key] = matches.get(key, 0) + weight * idf
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+                if not scores:
+                    return []
+            return sorted(((score, key) for key, score in (scores or {}).items()), key=lambda item: (-item[0], item[1]))
+
+
+class SearchService:
+    def __init__(self, app=None):
+        self.index = None
+        self._lock = threading.Lock()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """El índice en memoria se construye en la primera búsqueda"""
+        self.index = None
+
+    # --- Sincronización del índice en memoria ---
+
+    def versions(self):
+        """tipo -> (filas, max(updated_at)) de cada tabla buscable, en una sola consulta"""
+        rows = db.session.execute(union_all(*(
+            select(literal(kind).label('kind'), func.count(model.id), func.max(model.updated_at))
+            for kind, (model, _) in SEARCHABLE.items()
+        ))).all()
+        return {kind: (count, last_update) for kind, count, last_update in rows}
+
+    def _load(self, index, kind, *criteria):
+        model, fields = SEARCHABLE[kind]
+        columns = [getattr(model, column) for column, _ in fields]
+        rows = db.session.execute(select(model.id, _assignment_id(kind, model, null()), *columns).where(*criteria)).all()
+        for row in rows:
+            index.add(kind, row[0], list(row[2:]), row[1])
+
+    def refresh(self, index, versions):
+        """Lleva el índice a las versiones leídas cargando solo lo que cambió"""
+        for kind, version in versions.items():
+            seen = index.versions.get(kind)
+            if seen == version:
+                continue
+            model = SEARCHABLE[kind][0]
+            if seen is None or seen[1] is None:
+                self._load(index, kind)
+            else:
+                self._load(index, kind, model.updated_at >= seen[1] - REFRESH_OVERLAP)
+            if index.counts.get(kind, 0) != version[0]:
+                # Borrados (o filas sin updated_at): diferencia de ids
+                current = set(db.session.execute(select(model.id)).scalars())
+                known = index.ids(kind)
+                for doc_id in known - current:
+                    index.remove(kind, doc_id)
+                if current - known:
+                    self._load(index, kind, model.id.in_(current - known))
+            index.versions[kind] = version
+
+    def _memory_index(self):
+        versions = self.versions()
+        with self._lock:
+            if self.index is None:
+                self.index = InvertedIndex()
+            self.refresh(self.index, versions)
+            return self.index
+
+    # --- Búsqueda ---
+
+    def search(self, query, kinds=None, page=1, per_page=20):
+        """
+        Returns:
+            (total, [{'type', 'id', 'title', 'assignment_id', 'rank'}]) de la página pedida
+        """
+        tokens = tokenize(query)
+        kinds = [kind for kind in (kinds or SEARCHABLE) if kind in SEARCHABLE]
+        if not tokens or not kinds:
+            return 0, []
+        if db.engine.dialect.name == 'postgresql':
+            return self._search_postgres(tokens, kinds, page, per_page)
+        return self._search_memory(tokens, kinds, page, per_page)
+
+    def _search_postgres(self, tokens, kinds, page, per_page):
+        # Los tokens solo tienen caracteres \w, así que no pueden alterar la sintaxis de tsquery
+        tsquery = func.to_tsquery(literal_column(TS_CONFIG), ' & '.join(f'{token}:*' for token in tokens))
+        selects = []
+        for kind in kinds:
+            model, fields = SEARCHABLE[kind]
+            vector = literal_column(f'({tsvector_sql(fields)})')
+            selects.append(
+                select(
+                    literal(kind).label('type'),
+                    model.id.label('id'),
+                    getattr(model, fields[0][0]).label('title'),
+                    _assignment_id(kind, model, null()).label('assignment_id'),
+                    func.ts_rank(vector, tsquery).label('rank'),
+                ).where(vector.op('@@')(tsquery))
+            )
+        hits = union_all(*selects).subquery()
+        rows = db.session.execute(
+            select(hits, func.count().over().label('total'))
+            .order_by(hits.c.rank.desc(), hits.c.type, hits.c.id)
+            .limit(per_page).offset((page - 1) * per_page)
+        ).mappings().all()
+        if rows:
+            total = rows[0]['total']
+        else:
+            # Página fuera de rango: el total hay que contarlo aparte
+            total = db.session.execute(select(func.count()).select_from(hits)).scalar() if page > 1 else 0
+        return total, [{
+            'type': row['type'], 'id': row['id'], 'title': row['title'],
+            'assignment_id': row['assignment_id'], 'rank': round(float(row['rank']), 4)
+        } for row in rows]
+
+    def _search_memory(self, tokens, kinds, page, per_page):
+        index = self._memory_index()
+        hits = index.search(tokens, set(kinds))
+        results = []
+        for score, (kind, doc_id) in hits[(page - 1) * per_page:page * per_page]:
+            doc = index.docs[(kind, doc_id)]
+            results.append({
+                'type': kind, 'id': doc_id, 'title': doc['title'],
+                'assignment_id': doc['assignment_id'], 'rank': round(score, 4)
+            })
+        return len(hits), results
+
+
+# Instancia global del servicio
+search_service = SearchService()
+
+
+@search_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Buscar por texto: ?q=, ?type=course,subject,assignment,question, ?page=, ?per_page="""
+    query = (request.args.get('q') or '').strip()
+    if not tokenize(query):
+        return jsonify({'msg': 'q required'}), 400
+    kinds = [kind for kind in (request.args.get('type') or '').split(',') if kind] or list(SEARCHABLE)
+    unknown = [kind for kind in kinds if kind not in SEARCHABLE]
+    if unknown:
+        return jsonify({'msg': f'unknown type: {", ".join(unknown)}'}), 400
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(MAX_PER_PAGE, max(1, request.args.get('per_page', 20, type=int)))
+
+    total, results = search_service.search(query, kinds, page, per_page)
+    return jsonify({'query': query, 'total': total, 'page': page, 'per_page': per_page, 'results': results}), 200
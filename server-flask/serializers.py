@@ -0,0 +1,38 @@
+"""
+Serializadores fila -> dict generados una sola vez por forma de respuesta
+
+Los valores se devuelven sin convertir (datetime, Decimal); el proveedor JSON
+de la app (json_provider.py) se encarga de serializarlos.
+"""
+from operator import attrgetter
+
+
+def _getter(path):
+    """attrgetter que devuelve None si algún eslabón de la ruta es None"""
+    get = attrgetter(path)
+    if '.' not in path:
+        return get
+
+    def safe_get(obj):
+        try:
+            return get(obj)
+        except AttributeError:
+            return None
+    return safe_get
+
+
+def serializer(*fields, **aliases):
+    """
+    Crea una función obj -> dict.
+
+    Args:
+        fields: atributos que se exponen con el mismo nombre
+        aliases: clave='ruta.del.atributo' para relaciones o renombres
+    """
+    getters = tuple((name, _getter(name)) for name in fields) + \
+        tuple((key, _getter(path)) for key, path in aliases.items())
+
+    def serialize(obj):
+        return {key: get(obj) for key, get in getters}
+    return serialize
+
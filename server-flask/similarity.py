@@ -0,0 +1,325 @@
+"""
+Detección de respuestas casi duplicadas (posibles copias) con MinHash + LSH
+
+Cada respuesta de texto se reduce a shingles de SHINGLE_SIZE palabras y a una
+firma MinHash de NUM_PERM valores (one-permutation hashing con densificación
+por rotación: un solo hash por shingle). La firma se parte en BANDS bandas y
+cada banda se guarda como cubeta en answer_lsh_buckets; dos respuestas de la
+misma pregunta que comparten alguna cubeta son candidatas y se confirman
+comparando las firmas. Con 32 bandas de 4 filas, un par con similitud de
+Jaccard 0.6 coincide en alguna banda con probabilidad ~0.99 y uno con 0.3 con
+~0.23, así que se compara cada respuesta con unas pocas, no con todas.
+
+Las respuestas se indexan al entregar (job en segundo plano) y, si falta
+alguna, al pedir los grupos de la tarea.
+"""
+import hashlib
+import os
+import struct
+from itertools import groupby
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from auth import current_identity, role_required
+from models import (
+    db, User, Student, Course, CourseSubject, Assignment, Question, Submission, Answer, AnswerFingerprint,
+    AnswerLSHBucket
+)
+from reminder_service import reminder_service
+from search import tokenize
+
+similarity_bp = Blueprint('similarity', __name__, url_prefix='/api')
+
+# Cambiar cualquiera de estos valores invalida las firmas guardadas
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+BATCH_SIZE = 1000
+EXCERPT_CHARS = 200
+_MASK = (1 << 63) - 1
+_EMPTY = _MASK
+_ROTATION = 0x9E3779B97F4A7C15
+_PACK = struct.Struct(f'<{NUM_PERM}Q')
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def minhash(text, min_tokens=SHINGLE_SIZE):
+    """Firma MinHash del texto (tupla de NUM_PERM enteros) o None si tiene menos de min_tokens palabras"""
+    tokens = tokenize(text)
+    if len(tokens) < max(min_tokens, SHINGLE_SIZE):
+        return None
+    bins = [_EMPTY] * NUM_PERM
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        h = _hash64(' '.join(tokens[i:i + SHINGLE_SIZE]).encode())
+        j, value = h % NUM_PERM, h // NUM_PERM
+        if value < bins[j]:
+            bins[j] = value
+    # Densificación: una casilla vacía toma el valor de la siguiente llena, desplazado por la distancia
+    if _EMPTY in bins:
+        signature = list(bins)
+        for j in range(NUM_PERM):
+            if bins[j] == _EMPTY:
+                distance = next(k for k in range(1, NUM_PERM) if bins[(j + k) % NUM_PERM] != _EMPTY)
+                signature[j] = (bins[(j + distance) % NUM_PERM] + distance * _ROTATION) & _MASK
+        bins = signature
+    return tuple(bins)
+
+
+def band_buckets(signature):
+    """Una cubeta (entero de 63 bits) por banda"""
+    packed = _PACK.pack(*signature)
+    width = ROWS * 8
+    return [_hash64(packed[band * width:(band + 1) * width]) & _MASK for band in range(BANDS)]
+
+
+def estimate_similarity(a, b):
+    """Similitud de Jaccard estimada: fracción de posiciones iguales de las firmas"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class SimilarityService:
+    def __init__(self, app=None):
+        self.app = app
+        self.threshold = 0.6
+        self.min_tokens = 8
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el umbral de similitud y la longitud mínima comparable"""
+        self.app = app
+        app.config.setdefault('SIMILARITY_THRESHOLD', float(os.environ.get('SIMILARITY_THRESHOLD', 0.6)))
+        app.config.setdefault('SIMILARITY_MIN_TOKENS', int(os.environ.get('SIMILARITY_MIN_TOKENS', 8)))
+        self.threshold = app.config['SIMILARITY_THRESHOLD']
+        self.min_tokens = app.config['SIMILARITY_MIN_TOKENS']
+
+    # --- Indexado ---
+
+    def index_answers(self, rows):
+        """
+        Guarda firma y cubetas de cada (answer_id, question_id, texto) en la transacción actual (sin commit).
+
+        Returns:
+            Número de respuestas con firma (las cortas se marcan como indexadas sin firma)
+        """
+        fingerprints = []
+        buckets = []
+        for answer_id, question_id, text in rows:
+            signature = minhash(text, self.min_tokens)
+            fingerprints.append({
+                'answer_id': answer_id,
+                'question_id': question_id,
+                'signature': _PACK.pack(*signature) if signature else None
+            })
+            if signature:
+                buckets.extend({
+                    'question_id': question_id, 'band': band, 'bucket': bucket, 'answer_id': answer_id
+                } for band, bucket in enumerate(band_buckets(signature)))
+        # INSERT de Core (sin el procesado por fila del insert masivo del ORM): son BANDS filas por respuesta
+        for start in range(0, len(fingerprints), BATCH_SIZE):
+            db.session.execute(insert(AnswerFingerprint.__table__), fingerprints[start:start + BATCH_SIZE])
+        for start in range(0, len(buckets), BATCH_SIZE * BANDS):
+            db.session.execute(insert(AnswerLSHBucket.__table__), buckets[start:start + BATCH_SIZE * BANDS])
+        return len(buckets) // BANDS
+
+    def _index_where(self, *criteria):
+        """Indexa (con commit) las respuestas de texto sin firma que cumplen criteria"""
+        rows = db.session.execute(
+            select(Answer.id, Answer.question_id, Answer.text_answer)
+            .join(Question, Question.id == Answer.question_id)
+            .outerjoin(AnswerFingerprint, AnswerFingerprint.answer_id == Answer.id)
+            .where(Answer.text_answer.isnot(None), AnswerFingerprint.answer_id.is_(None), *criteria)
+        ).all()
+        if not rows:
+            return 0
+        try:
+            indexed = self.index_answers(rows)
+            db.session.commit()
+        except IntegrityError:
+            # Otro proceso indexó las mismas respuestas a la vez
+            db.session.rollback()
+            return 0
+        return indexed
+
+    def ensure_indexed(self, assignment_id):
+        return self._index_where(Question.assignment_id == assignment_id)
+
+    def index_submissions(self, submission_ids):
+        """Job: indexar las respuestas de texto de un lote de entregas"""
+        if not self.app:
+            return 0
+        with self.app.app_context():
+            try:
+                return self._index_where(Answer.submission_id.in_(submission_ids))
+            except Exception as e:
+                print(f"[SimilarityService] Error indexing submissions {submission_ids}: {e}")
+                db.session.rollback()
+                return 0
+
+    def schedule_submissions(self, submission_ids):
+        """Encolar el indexado de las entregas fuera del hilo que las registra"""
+        submission_ids = sorted(submission_ids)
+        reminder_service.scheduler.add_job(
+            func=self.index_submissions,
+            args=[submission_ids],
+            id=f'similarity_index_{submission_ids[0]}_{submission_ids[-1]}',
+            jobstore='memory',
+            replace_existing=True
+        )
+
+    # --- Grupos ---
+
+    def clusters(self, assignment_id, threshold=None):
+        """
+        Grupos de respuestas casi iguales por pregunta de la tarea.
+
+        Returns:
+            [{'question_id', 'answer_ids', 'similarity'}], de mayor a menor tamaño;
+            similarity es la menor similitud estimada entre pares confirmados del grupo
+        """
+        threshold = self.threshold if threshold is None else threshold
+        question_ids = select(Question.id).where(Question.assignment_id == assignment_id).scalar_subquery()
+        shared = select(AnswerLSHBucket.question_id, AnswerLSHBucket.band, AnswerLSHBucket.bucket).where(
+            AnswerLSHBucket.question_id.in_(question_ids)
+        ).group_by(
+            AnswerLSHBucket.question_id, AnswerLSHBucket.band, AnswerLSHBucket.bucket
+        ).having(func.count() > 1).subquery()
+        rows = db.session.execute(
+            select(AnswerLSHBucket.question_id, AnswerLSHBucket.band, AnswerLSHBucket.bucket, AnswerLSHBucket.answer_id)
+            .join(shared, and_(
+                AnswerLSHBucket.question_id == shared.c.question_id,
+                AnswerLSHBucket.band == shared.c.band,
+                AnswerLSHBucket.bucket == shared.c.bucket
+            ))
+            .order_by(AnswerLSHBucket.question_id, AnswerLSHBucket.band, AnswerLSHBucket.bucket, AnswerLSHBucket.answer_id)
+        ).all()
+        if not rows:
+            return []
+
+        candidates = sorted({row.answer_id for row in rows})
+        signatures = {}
+        for start in range(0, len(candidates), BATCH_SIZE):
+            signatures.update(
+                (answer_id, _PACK.unpack(signature)) for answer_id, signature in db.session.execute(
+                    select(AnswerFingerprint.answer_id, AnswerFingerprint.signature)
+                    .where(AnswerFingerprint.answer_id.in_(candidates[start:start + BATCH_SIZE]))
+                )
+            )
+
+        groups = _DisjointSet()
+        question_of = {}
+        checked = {}
+        for (question_id, _, _), members in groupby(rows, key=lambda row: (row.question_id, row.band, row.bucket)):
+            # Cada miembro se compara con los representantes ya vistos en la cubeta, no con todos
+            representatives = []
+            for row in members:
+                answer_id = row.answer_id
+                question_of[answer_id] = question_id
+                for representative in representatives:
+                    pair = (representative, answer_id)
+                    if pair not in checked:
+                        checked[pair] = estimate_similarity(signatures[representative], signatures[answer_id])
+                    if checked[pair] >= threshold:
+                        groups.union(representative, answer_id)
+                        break
+                else:
+                    representatives.append(answer_id)
+
+        members = {}
+        for (a, b), similarity in checked.items():
+            if similarity >= threshold:
+                root = groups.find(a)
+                entry = members.setdefault(root, {'answer_ids': set(), 'similarity': 1.0})
+                entry['answer_ids'].update((a, b))
+                entry['similarity'] = min(entry['similarity'], similarity)
+        result = [{
+            'question_id': question_of[root],
+            'answer_ids': sorted(entry['answer_ids']),
+            'similarity': round(entry['similarity'], 3)
+        } for root, entry in members.items()]
+        result.sort(key=lambda cluster: (-len(cluster['answer_ids']), -cluster['similarity'], cluster['answer_ids'][0]))
+        return result
+
+
+# Instancia global del servicio
+similarity_service = SimilarityService()
+
+
+def _teacher_owns_assignment(assignment_id):
+    identity = current_identity()
+    if identity.get('role') == 'admin':
+        return True
+    return db.session.query(Assignment.id).join(
+        CourseSubject, CourseSubject.id == Assignment.course_subject_id
+    ).join(Course, Course.id == CourseSubject.course_id).filter(
+        Assignment.id == assignment_id, Course.teacher_id == identity.get('teacher_id')
+    ).first() is not None
+
+
+@similarity_bp.route('/teacher/assignments/<int:assignment_id>/similar-answers', methods=['GET'])
+@role_required('teacher')
+def get_similar_answers(assignment_id):
+    """Grupos de respuestas de texto casi iguales (posibles copias); ?threshold= entre 0 y 1"""
+    if not db.session.get(Assignment, assignment_id):
+        return jsonify({'msg': 'assignment not found'}), 404
+    if not _teacher_owns_assignment(assignment_id):
+        return jsonify({'msg': 'forbidden - not your assignment'}), 403
+    threshold = request.args.get('threshold', type=float)
+    if threshold is not None and not 0 < threshold <= 1:
+        return jsonify({'msg': 'threshold must be between 0 and 1'}), 400
+
+    similarity_service.ensure_indexed(assignment_id)
+    clusters = similarity_service.clusters(assignment_id, threshold)
+
+    answer_ids = [answer_id for cluster in clusters for answer_id in cluster['answer_ids']]
+    details = {}
+    for start in range(0, len(answer_ids), BATCH_SIZE):
+        details.update((row.id, row) for row in db.session.execute(
+            select(Answer.id, Answer.submission_id, Submission.student_id, User.username, Answer.text_answer)
+            .join(Submission, Submission.id == Answer.submission_id)
+            .join(Student, Student.id == Submission.student_id)
+            .join(User, User.id == Student.user_id)
+            .where(Answer.id.in_(answer_ids[start:start + BATCH_SIZE]))
+        ))
+    questions = dict(db.session.execute(
+        select(Question.id, Question.text).where(Question.assignment_id == assignment_id)
+    ).all())
+
+    return jsonify([{
+        'question_id': cluster['question_id'],
+        'question_text': questions.get(cluster['question_id']),
+        'size': len(cluster['answer_ids']),
+        'similarity': cluster['similarity'],
+        'answers': [{
+            'answer_id': answer_id,
+            'submission_id': details[answer_id].submission_id,
+            'student_id': details[answer_id].student_id,
+            'student_name': details[answer_id].username,
+            'excerpt': (details[answer_id].text_answer or '')[:EXCERPT_CHARS]
+        } for answer_id in cluster['answer_ids'] if answer_id in details]
+    } for cluster in clusters]), 200
@@ -0,0 +1,107 @@
+import logging
+import os
+import sys
+
+import pytest
+import structlog
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'Passw0rd!'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Una sola app por sesión (los servicios globales solo admiten un init_app) sobre SQLite en disco"""
+    base = tmp_path_factory.mktemp('app')
+    os.environ['DATABASE_URL'] = f"sqlite:///{base / 'test.db'}"
+    os.environ['UPLOAD_DIR'] = str(base / 'uploads')
+    os.environ['OUTBOX_DISPATCHER_ENABLED'] = 'false'
+    os.environ['BCRYPT_ROUNDS'] = '4'
+    os.environ['SQL_QUERY_LOG_SAMPLE_RATE'] = '0'
+    # Los volcados de borradores los lanzan las pruebas, no el hilo periódico
+    os.environ['DRAFT_FLUSH_SECONDS'] = '3600'
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    from main import create_app
+    from models import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    from reminder_service import reminder_service
+
+    reminder_service.scheduler.remove_all_jobs()
+
+
+@pytest.fixture
+def client(app):
+    """Cliente de pruebas con las tablas vacías y el estado en proceso de los servicios reiniciado"""
+    from admission import limiter
+    from auth import identity_cache
+    from cache_service import cache_service
+    from drafts import draft_service
+    from models import db
+    from revocation_service import BloomFilter, revocation_service
+    from search import search_service
+
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    limiter.reset()
+    identity_cache.clear()
+    cache_service.local.clear()
+    draft_service.buffer.drain()
+    revocation_service.bloom = BloomFilter(revocation_service.capacity)
+    revocation_service._next_sync = revocation_service._next_rebuild = 0
+    search_service.index = None
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login(username, role) -> cabeceras Authorization de un usuario recién registrado"""
+    def login(username, role):
+        response = client.post('/api/auth/register', json={
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD, 'role': role
+        })
+        assert response.status_code == 201, response.get_json()
+        response = client.post('/api/auth/login', json={'username': username, 'password': PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    return login
+
+
+@pytest.fixture
+def course(app, client, login):
+    """Profesor, dos estudiantes y una tarea con dos preguntas en un curso"""
+    from models import Teacher
+
+    teacher = login('teacher', 'teacher')
+    student = login('student', 'student')
+    other = login('other', 'student')
+    with app.app_context():
+        teacher_id = Teacher.query.one().id
+    subject = client.post('/api/subjects', json={'name': 'Matemáticas'}, headers=teacher).get_json()
+    course = client.post('/api/courses', json={'name': 'Curso 1', 'teacher_id': teacher_id}, headers=teacher).get_json()
+    link = client.post('/api/course_subjects', json={'course_id': course['id'], 'subject_id': subject['id']},
+                       headers=teacher).get_json()
+    assignment = client.post('/api/assignments', json={
+        'course_subject_id': link['id'], 'title': 'Quiz 1', 'type': 'quiz'
+    }, headers=teacher).get_json()
+    questions = [
+        client.post(f"/api/assignments/{assignment['id']}/questions", json={
+            'text': '¿Cuánto es 2 + 2?', 'type': 'single_choice',
+            'options': [{'option_text': '4', 'is_correct': True}, {'option_text': '5'}]
+        }, headers=teacher).get_json()['id'],
+        client.post(f"/api/assignments/{assignment['id']}/questions", json={
+            'text': 'Explica la suma', 'type': 'long_answer'
+        }, headers=teacher).get_json()['id'],
+    ]
+    return {
+        'teacher': teacher, 'student': student, 'other': other, 'course_id': course['id'],
+        'course_subject_id': link['id'], 'assignment_id': assignment['id'], 'question_ids': questions,
+    }
@@ -0,0 +1,95 @@
+"""Control de admisión: cola por prioridad, límite por ruta y límites de tasa"""
+import threading
+
+import pytest
+
+from admission import AdmissionQueue, AdmissionRejected, admission_service
+from conftest import PASSWORD
+
+
+def test_high_priority_sheds_queued_low_priority():
+    queue = AdmissionQueue(capacity=1, queue_size=1)
+    queue.acquire('high', timeout=0)
+    outcome = {}
+
+    def low():
+        try:
+            queue.acquire('low', timeout=5)
+            outcome['low'] = 'admitted'
+        except AdmissionRejected as e:
+            outcome['low'] = e.reason
+
+    waiter = threading.Thread(target=low)
+    waiter.start()
+    while not queue._waiting:
+        pass
+    high = threading.Thread(target=queue.acquire, args=('high', 5))
+    high.start()
+    waiter.join(5)
+    assert outcome['low'] == 'shed'
+
+    queue.release()
+    high.join(5)
+    assert queue.active == 1
+
+
+def test_full_queue_rejects_equal_or_lower_priority():
+    queue = AdmissionQueue(capacity=1, queue_size=0)
+    queue.acquire('low', timeout=0)
+
+    with pytest.raises(AdmissionRejected, match='queue full'):
+        queue.acquire('high', timeout=0)
+
+
+def test_queue_timeout():
+    queue = AdmissionQueue(capacity=1, queue_size=1)
+    queue.acquire('high', timeout=0)
+
+    with pytest.raises(AdmissionRejected, match='queue timeout'):
+        queue.acquire('low', timeout=0.01)
+    assert not queue._waiting
+
+
+def test_busy_server_answers_503_with_retry_after(client, course, monkeypatch):
+    queue = AdmissionQueue(capacity=1, queue_size=0)
+    monkeypatch.setattr(admission_service, 'queue', queue)
+    queue.acquire('high', timeout=0)
+
+    response = client.get('/api/student/grades', headers=course['student'])
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    queue.release()
+    assert client.get('/api/student/grades', headers=course['student']).status_code == 200
+    assert queue.active == 0
+
+
+def test_route_concurrency_limit(client, course):
+    endpoint = 'exports.export_course_gradebook'
+    slots = admission_service._route_semaphore(endpoint, 2)
+    slots.acquire()
+    slots.acquire()
+    try:
+        response = client.get(f"/api/teacher/courses/{course['course_id']}/gradebook", headers=course['teacher'])
+    finally:
+        slots.release()
+        slots.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert client.get(f"/api/teacher/courses/{course['course_id']}/gradebook",
+                      headers=course['teacher']).status_code == 200
+
+
+def test_login_attempts_are_rate_limited(client, login):
+    # RATELIMIT_LOGIN = 10 por minuto; el fixture ya hizo un login
+    login('student', 'student')
+    statuses = [
+        client.post('/api/auth/login', json={'username': 'student', 'password': 'wrong'}).status_code
+        for _ in range(9)
+    ]
+
+    response = client.post('/api/auth/login', json={'username': 'student', 'password': PASSWORD})
+
+    assert statuses == [401] * 9
+    assert response.status_code == 429
@@ -0,0 +1,55 @@
+"""Tareas: contadores desnormalizados de preguntas y detalle en caché por versión"""
+
+
+def listed(client, course):
+    response = client.get(f"/api/assignments?course_subject_id={course['course_subject_id']}", headers=course['teacher'])
+    assert response.status_code == 200
+    return response.get_json()[0]
+
+
+def test_question_counters_follow_added_questions(client, course):
+    assignment = listed(client, course)
+    assert (assignment['questions_count'], assignment['total_points']) == (2, 2)
+
+    client.post(f"/api/assignments/{course['assignment_id']}/questions", json={
+        'text': 'Demuestra el teorema', 'type': 'long_answer', 'points': 3.5
+    }, headers=course['teacher'])
+
+    assignment = listed(client, course)
+    assert (assignment['questions_count'], assignment['total_points']) == (3, 5.5)
+
+
+def test_invalid_question_does_not_touch_counters(client, course):
+    response = client.post(f"/api/assignments/{course['assignment_id']}/questions", json={
+        'text': 'Sin puntos válidos', 'type': 'long_answer', 'points': -1
+    }, headers=course['teacher'])
+
+    assert response.status_code == 400
+    assert listed(client, course)['questions_count'] == 2
+
+
+def test_detail_is_cached_per_version(app, client, course, monkeypatch):
+    monkeypatch.setitem(app.config, 'SQL_QUERY_HEADERS', True)
+    url = f"/api/assignments/{course['assignment_id']}"
+
+    cold = client.get(url, headers=course['student'])
+    warm = client.get(url, headers=course['student'])
+
+    # Frío: versión + tarea, preguntas con escala y opciones; caliente: solo la versión
+    assert int(cold.headers['X-DB-Query-Count']) <= 4
+    assert int(warm.headers['X-DB-Query-Count']) == 1
+    assert warm.get_json() == cold.get_json()
+    assert [q['text'] for q in cold.get_json()['questions']] == ['¿Cuánto es 2 + 2?', 'Explica la suma']
+    assert [o['option_text'] for o in cold.get_json()['questions'][0]['options']] == ['4', '5']
+    assert client.get(url, headers={**course['student'], 'If-None-Match': warm.headers['ETag']}).status_code == 304
+
+
+def test_new_question_bumps_detail_version(client, course):
+    url = f"/api/assignments/{course['assignment_id']}"
+    etag = client.get(url, headers=course['student']).headers['ETag']
+
+    client.post(f"{url}/questions", json={'text': 'Nueva pregunta', 'type': 'long_answer'}, headers=course['teacher'])
+
+    response = client.get(url, headers={**course['student'], 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [q['text'] for q in response.get_json()['questions']][-1] == 'Nueva pregunta'
@@ -0,0 +1,41 @@
+"""Identidad en el JWT: ids de perfil en el token, role_required y tokens antiguos completados con la caché"""
+from flask_jwt_extended import create_access_token, decode_token
+
+from conftest import PASSWORD
+from instrumentation import count_queries
+from models import db, Student, User
+
+
+def test_login_token_carries_profile_ids(app, client, login):
+    login('student', 'student')
+    token = client.post('/api/auth/login', json={'username': 'student', 'password': PASSWORD}).get_json()['access_token']
+
+    with app.app_context():
+        student = Student.query.one()
+        identity = decode_token(token)['sub']
+    assert identity['student_id'] == student.id
+    assert identity['user_id'] == student.user_id
+    assert identity['role'] == 'student'
+
+
+def test_role_required(client, course, login):
+    admin = login('admin', 'admin')
+
+    assert client.get('/api/teacher/submissions', headers=course['student']).status_code == 403
+    assert client.get('/api/teacher/submissions', headers=course['teacher']).status_code == 200
+    # Los administradores pasan; sin perfil de profesor la vista responde 404
+    assert client.get('/api/teacher/submissions', headers=admin).status_code == 404
+
+
+def test_old_tokens_are_completed_once_from_the_cache(app, client, course):
+    with app.app_context():
+        user = User.query.filter_by(username='student').one()
+        old = {'Authorization': 'Bearer ' + create_access_token(identity={'user_id': user.id, 'role': 'student'})}
+
+    with app.app_context(), count_queries() as first:
+        assert client.get('/api/student/grades', headers=old).status_code == 200
+    with app.app_context(), count_queries() as second:
+        assert client.get('/api/student/grades', headers=old).status_code == 200
+
+    assert first.auth_count == 1
+    assert second.auth_count == 0
@@ -0,0 +1,67 @@
+"""POST /api/batch: cada subpetición pasa por la app completa y devuelve su propio estado"""
+from admission import AdmissionQueue, admission_service
+
+DASHBOARD = ['/api/student/courses', '/api/student/assignments/pending', '/api/student/grades', '/api/notifications']
+
+
+def batch(client, headers, *items):
+    return client.post('/api/batch', json={'requests': list(items)}, headers=headers)
+
+
+def test_batch_returns_the_same_bodies_as_separate_calls(client, course):
+    response = batch(client, course['student'], *({'path': path} for path in DASHBOARD))
+
+    assert response.status_code == 200
+    entries = response.get_json()['responses']
+    assert [entry['id'] for entry in entries] == DASHBOARD
+    for path, entry in zip(DASHBOARD, entries):
+        separate = client.get(path, headers=course['student'])
+        assert entry['status'] == separate.status_code == 200
+        assert entry['body'] == separate.get_json()
+
+
+def test_status_per_subrequest(client, course):
+    courses = client.get('/api/student/courses', headers=course['student'])
+
+    response = batch(
+        client, course['student'],
+        {'id': 'courses', 'path': '/api/student/courses', 'etag': courses.headers['ETag']},
+        {'id': 'teacher', 'path': '/api/teacher/submissions'},
+        {'id': 'missing', 'path': '/api/does-not-exist'},
+        {'id': 'grades', 'path': '/api/student/grades'},
+    )
+
+    entries = {entry['id']: entry for entry in response.get_json()['responses']}
+    assert (entries['courses']['status'], entries['courses']['body']) == (304, None)
+    assert entries['courses']['etag'] == courses.headers['ETag'].strip('"')
+    assert entries['teacher']['status'] == 403
+    assert entries['missing']['status'] == 404
+    assert entries['grades']['status'] == 200
+
+
+def test_batch_size_and_paths_are_validated(client, course):
+    too_many = batch(client, course['student'], *({'path': '/api/student/grades'} for _ in range(21)))
+    outside = batch(client, course['student'], {'path': '/metrics'})
+
+    assert too_many.status_code == 400
+    assert outside.status_code == 400
+    assert client.post('/api/batch', json={'requests': [{'path': '/api/student/grades'}]}).status_code == 401
+
+
+def test_subrequests_go_through_admission(client, course, monkeypatch):
+    queue = AdmissionQueue(capacity=1, queue_size=0)
+    monkeypatch.setattr(admission_service, 'queue', queue)
+
+    # Con la única plaza libre el lote no se bloquea esperándose a sí mismo
+    response = batch(client, course['student'], {'path': '/api/student/grades'}, {'path': '/api/notifications'})
+    assert [entry['status'] for entry in response.get_json()['responses']] == [200, 200]
+    assert queue.active == 0
+
+    # Con la plaza ocupada cada subpetición se rechaza como lo haría un GET suelto
+    queue.acquire('high', timeout=0)
+    response = batch(client, course['student'], {'path': '/api/student/grades'})
+    queue.release()
+
+    assert response.status_code == 200
+    entry = response.get_json()['responses'][0]
+    assert (entry['status'], entry['body']) == (503, {'msg': 'server busy, retry later'})
@@ -0,0 +1,30 @@
+"""Generador de datos de los benchmarks y comparación con la línea base"""
+from benchmarks.seed import SeedScale, seed
+from benchmarks.stats import compare, save_baseline, summarize
+from models import db, Assignment, Question, Submission, User
+
+SCALE = SeedScale(teachers=2, students=10, courses=2, subjects_per_course=1, assignments_per_subject=2,
+                  questions_per_assignment=3, submission_rate=0.5)
+
+
+def test_seed_matches_the_requested_scale(app, client):
+    with app.app_context():
+        result = seed(SCALE)
+
+        assert User.query.count() == 12
+        assert Assignment.query.count() == len(result.assignment_ids) == 4
+        assert Question.query.count() == 12
+        assert {a.questions_count for a in Assignment.query.all()} == {3}
+        assert Submission.query.count() == result.submissions
+        submitted = set(db.session.query(Submission.student_id, Submission.assignment_id).all())
+        assert submitted.isdisjoint(result.pending)
+        assert len(submitted) + len(result.pending) == 10 * 4
+
+
+def test_compare_flags_regressions(tmp_path):
+    path = tmp_path / 'baseline.json'
+    save_baseline(path, {'list': summarize([10.0] * 20), 'detail': summarize([20.0] * 20)})
+
+    rows = compare(path, {'list': summarize([13.0] * 20), 'detail': summarize([21.0] * 20), 'new': summarize([1.0])})
+
+    assert [(name, regression) for name, _, _, _, regression in rows] == [('list', True), ('detail', False)]
@@ -0,0 +1,43 @@
+"""GET condicionales: ETag, 304 y versiones de las tablas que aparecen en el cuerpo"""
+from models import db, User
+
+
+def test_unchanged_course_list_returns_304(client, course):
+    response = client.get('/api/courses', headers=course['teacher'])
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get('/api/courses', headers={**course['teacher'], 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_new_course_changes_etag(client, course):
+    etag = client.get('/api/courses', headers=course['teacher']).headers['ETag']
+    teacher_id = client.get('/api/courses', headers=course['teacher']).get_json()[0]['teacher_id']
+    client.post('/api/courses', json={'name': 'Curso 2', 'teacher_id': teacher_id}, headers=course['teacher'])
+
+    response = client.get('/api/courses', headers={**course['teacher'], 'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert [row['name'] for row in response.get_json()] == ['Curso 1', 'Curso 2']
+
+
+def test_teacher_rename_invalidates_course_lists(app, client, course):
+    courses = client.get('/api/courses', headers=course['teacher'])
+    student_courses = client.get('/api/student/courses', headers=course['student'])
+    assert courses.get_json()[0]['teacher_name'] == 'teacher'
+
+    with app.app_context():
+        User.query.filter_by(username='teacher').update({'username': 'profe'})
+        db.session.commit()
+
+    response = client.get('/api/courses', headers={**course['teacher'], 'If-None-Match': courses.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()[0]['teacher_name'] == 'profe'
+    response = client.get('/api/student/courses',
+                          headers={**course['student'], 'If-None-Match': student_courses.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()[0]['teacher_name'] == 'profe'
@@ -0,0 +1,104 @@
+"""ReplicaRouter con dos réplicas SQLite: round-robin, retraso, comprobaciones fuera del lock y una réplica por petición"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event
+
+import db_routing
+from db_routing import ReplicaRouter
+
+
+@pytest.fixture
+def engines():
+    engines = {'replica_0': create_engine('sqlite://'), 'replica_1': create_engine('sqlite://')}
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def test_round_robin_between_healthy_replicas(engines):
+    router = ReplicaRouter(list(engines), max_lag=5, check_seconds=60)
+
+    picks = [router.pick(engines) for _ in range(4)]
+
+    assert picks == [engines['replica_0'], engines['replica_1']] * 2
+
+
+def test_lagging_replica_is_skipped(engines, monkeypatch):
+    lag = {engines['replica_0']: 30.0, engines['replica_1']: 0.0}
+    monkeypatch.setattr(db_routing, 'replica_lag', lambda engine: lag[engine])
+    router = ReplicaRouter(list(engines), max_lag=5, check_seconds=60)
+
+    assert [router.pick(engines) for _ in range(3)] == [engines['replica_1']] * 3
+
+
+def test_all_replicas_down_falls_back_to_primary(engines, monkeypatch):
+    def unreachable(engine):
+        raise OSError('connection refused')
+
+    monkeypatch.setattr(db_routing, 'replica_lag', unreachable)
+    router = ReplicaRouter(list(engines), max_lag=5, check_seconds=60)
+
+    assert router.pick(engines) is None
+
+
+def test_slow_check_does_not_block_other_replica(engines, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def replica_lag(engine):
+        calls.append(engine)
+        if engine is engines['replica_0']:
+            started.set()
+            release.wait(5)
+        return 0.0
+
+    monkeypatch.setattr(db_routing, 'replica_lag', replica_lag)
+    router = ReplicaRouter(list(engines), max_lag=5, check_seconds=60)
+
+    # Un hilo se queda comprobando replica_0 (p. ej. red lenta)
+    result = {}
+    slow = threading.Thread(target=lambda: result.setdefault('engine', router.pick(engines)))
+    slow.start()
+    assert started.wait(5)
+
+    # Mientras tanto los demás siguen eligiendo replica_1 sin esperar ni repetir la comprobación
+    assert router.pick(engines) is engines['replica_1']
+    assert router.pick(engines) is engines['replica_1']
+    assert calls.count(engines['replica_0']) == 1
+
+    release.set()
+    slow.join(5)
+    assert result['engine'] is engines['replica_0']
+    assert calls.count(engines['replica_1']) == 1
+
+
+def test_conditional_get_reads_version_and_body_from_one_replica(app, client, course, monkeypatch):
+    from models import db
+
+    # Dos "réplicas" sobre la misma BD de pruebas; se anota qué motor ejecuta cada SELECT
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    replicas = {'replica_0': create_engine(url), 'replica_1': create_engine(url)}
+    served = []
+    for name, engine in replicas.items():
+        event.listen(engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args, name=name: served.append((name, statement)))
+    with app.app_context():
+        monkeypatch.setitem(db.engines, 'replica_0', replicas['replica_0'])
+        monkeypatch.setitem(db.engines, 'replica_1', replicas['replica_1'])
+    monkeypatch.setitem(app.extensions, 'replica_router', ReplicaRouter(list(replicas), max_lag=5, check_seconds=60))
+
+    for _ in range(2):
+        served.clear()
+        response = client.get('/api/courses', headers=course['teacher'])
+        assert response.status_code == 200
+        assert [row['name'] for row in response.get_json()] == ['Curso 1']
+        # Token de versión y cuerpo en el mismo motor aunque el round-robin alterne entre peticiones
+        assert len({name for name, _ in served}) == 1
+        assert len(served) >= 2
+
+    etag = response.headers['ETag']
+    response = client.get('/api/courses', headers={**course['teacher'], 'If-None-Match': etag})
+    assert response.status_code == 304
+    for engine in replicas.values():
+        engine.dispose()
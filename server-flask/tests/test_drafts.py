@@ -0,0 +1,94 @@
+"""Borradores: búfer con volcado por lotes, escritura directa con varios workers y entrega desde el borrador"""
+from structlog.testing import capture_logs
+
+from drafts import MemoryDraftBuffer, draft_service
+from models import db, Answer, Draft
+
+
+def save(client, course, *answers):
+    return client.patch(f"/api/assignments/{course['assignment_id']}/draft", json={'answers': list(answers)},
+                        headers=course['student'])
+
+
+def submit_from_draft(client, course, **body):
+    return client.post(f"/api/assignments/{course['assignment_id']}/submit", json={'from_draft': True, **body},
+                       headers=course['student'])
+
+
+def stored_answers(app, submission_id):
+    with app.app_context():
+        rows = Answer.query.filter_by(submission_id=submission_id).order_by(Answer.question_id).all()
+        return [(row.question_id, row.text_answer) for row in rows]
+
+
+def test_saves_are_buffered_and_flushed_in_one_write(app, client, course):
+    first, second = course['question_ids']
+    assert save(client, course, {'question_id': first, 'text_answer': 'tres'}).status_code == 202
+    assert save(client, course, {'question_id': first, 'text_answer': 'cuatro'},
+                {'question_id': second, 'text_answer': 'borrador'}).status_code == 202
+
+    with app.app_context():
+        assert Draft.query.count() == 0
+    response = client.get(f"/api/assignments/{course['assignment_id']}/draft", headers=course['student'])
+    assert [a['text_answer'] for a in response.get_json()['answers']] == ['cuatro', 'borrador']
+
+    with app.app_context():
+        assert draft_service.flush() == 1
+        assert Draft.query.one().answers == {
+            str(first): {'selected_options': None, 'text_answer': 'cuatro', 'numeric_answer': None},
+            str(second): {'selected_options': None, 'text_answer': 'borrador', 'numeric_answer': None},
+        }
+
+
+def test_submit_takes_flushed_and_buffered_answers(app, client, course):
+    first, second = course['question_ids']
+    save(client, course, {'question_id': first, 'text_answer': 'volcada'})
+    with app.app_context():
+        draft_service.flush()
+    save(client, course, {'question_id': second, 'text_answer': 'en el búfer'})
+
+    response = submit_from_draft(client, course, answers=[{'question_id': first, 'text_answer': 'del cuerpo'}])
+
+    assert response.status_code == 201
+    assert stored_answers(app, response.get_json()['submission_id']) == [(first, 'del cuerpo'), (second, 'en el búfer')]
+    with app.app_context():
+        assert Draft.query.count() == 0
+        assert draft_service.flush() == 0
+
+
+def test_write_through_is_visible_to_other_workers(app, client, course, monkeypatch):
+    first, _ = course['question_ids']
+    monkeypatch.setattr(draft_service, 'flush_seconds', 0)
+    save(client, course, {'question_id': first, 'text_answer': 'guardada'})
+    with app.app_context():
+        assert Draft.query.count() == 1
+
+    # La entrega llega a otro worker, con su propio búfer vacío
+    monkeypatch.setattr(draft_service, 'buffer', MemoryDraftBuffer())
+    response = submit_from_draft(client, course)
+
+    assert response.status_code == 201
+    assert stored_answers(app, response.get_json()['submission_id']) == [(first, 'guardada')]
+
+
+def test_save_after_submit_is_rejected(client, course):
+    first, _ = course['question_ids']
+    assert submit_from_draft(client, course).status_code == 201
+
+    response = save(client, course, {'question_id': first, 'text_answer': 'tarde'})
+
+    assert response.status_code == 409
+
+
+def test_flush_after_submit_logs_discarded_answers(app, client, course):
+    first, _ = course['question_ids']
+    save(client, course, {'question_id': first, 'text_answer': 'en otro worker'})
+    pending = draft_service.buffer.drain()
+    submit_from_draft(client, course)
+    draft_service.buffer.restore(pending)
+
+    with app.app_context(), capture_logs() as logs:
+        assert draft_service.flush() == 0
+        assert Draft.query.count() == 0
+    assert [log['event'] for log in logs] == ['draft_discarded_after_submit']
+    assert logs[0]['questions'] == 1
@@ -0,0 +1,50 @@
+"""Exportación del libro de calificaciones en streaming (CSV y NDJSON)"""
+import csv
+import io
+import json
+
+import pytest
+
+from exports import GRADEBOOK_COLUMNS
+
+
+@pytest.fixture
+def submission(client, course):
+    single, essay = course['question_ids']
+    return client.post(f"/api/assignments/{course['assignment_id']}/submit", json={'answers': [
+        {'question_id': single, 'selected_options': ['4']},
+        {'question_id': essay, 'text_answer': 'Se juntan cantidades'},
+    ]}, headers=course['student']).get_json()['submission_id']
+
+
+def test_csv_has_one_row_per_answer(client, course, submission):
+    response = client.get(f"/api/teacher/courses/{course['course_id']}/gradebook", headers=course['teacher'])
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == f"attachment; filename=gradebook_course_{course['course_id']}.csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert tuple(rows[0]) == GRADEBOOK_COLUMNS
+    assert [(row['submission_id'], row['question_id'], row['student_name']) for row in rows] == [
+        (str(submission), str(question_id), 'student') for question_id in course['question_ids']
+    ]
+    assert json.loads(rows[0]['selected_options']) == ['4']
+
+
+def test_ndjson_for_an_assignment(client, course, submission):
+    response = client.get(f"/api/teacher/assignments/{course['assignment_id']}/gradebook?format=ndjson",
+                          headers=course['teacher'])
+
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['question_id'] for row in rows] == course['question_ids']
+    assert rows[0]['selected_options'] == ['4']
+
+
+def test_export_is_limited_to_the_course_teacher(client, course, login):
+    url = f"/api/teacher/courses/{course['course_id']}/gradebook"
+
+    assert client.get(url, headers=login('intruder', 'teacher')).status_code == 403
+    assert client.get(url, headers=course['student']).status_code == 403
+    assert client.get(f'{url}?format=xml', headers=course['teacher']).status_code == 400
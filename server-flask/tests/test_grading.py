@@ -0,0 +1,69 @@
+"""Calificación masiva: un UPDATE por lote, todo o nada, avisos en el outbox"""
+import pytest
+
+from models import OutboxEvent, Submission
+
+
+@pytest.fixture
+def submissions(client, course):
+    """Entregas de los dos estudiantes del curso"""
+    return [
+        client.post(f"/api/assignments/{course['assignment_id']}/submit", json={'answers': []},
+                    headers=course[who]).get_json()['submission_id']
+        for who in ('student', 'other')
+    ]
+
+
+def grade(client, headers, *grades):
+    return client.post('/api/submissions/grades', json={'grades': list(grades)}, headers=headers)
+
+
+def scores(app):
+    with app.app_context():
+        return {s.id: (s.final_score, s.status, s.ai_feedback) for s in Submission.query.all()}
+
+
+def test_batch_is_applied_with_one_outbox_event_per_submission(app, client, course, submissions):
+    grades_before = client.get('/api/student/grades', headers=course['student'])
+    first, second = submissions
+
+    response = grade(client, course['teacher'],
+                     {'submission_id': first, 'final_score': 87.5, 'ai_feedback': 'Bien'},
+                     {'submission_id': second, 'final_score': 60})
+
+    assert response.status_code == 200
+    assert response.get_json() == {'graded': 2}
+    assert scores(app) == {first: (87.5, 'graded', 'Bien'), second: (60, 'graded', None)}
+    with app.app_context():
+        events = OutboxEvent.query.filter_by(topic='submission.graded').all()
+        assert sorted(event.payload['submission_id'] for event in events) == [first, second]
+    # La media se calcula al leer: el ETag de las notas del estudiante cambia
+    response = client.get('/api/student/grades',
+                          headers={**course['student'], 'If-None-Match': grades_before.headers['ETag']})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('grades, status', [
+    ([{'submission_id': 0, 'final_score': 50}], 404),
+    ([{'submission_id': 'first', 'final_score': 50}, {'submission_id': 'first', 'final_score': 70}], 400),
+    ([{'submission_id': 'first', 'final_score': 101}], 400),
+])
+def test_invalid_batch_changes_nothing(app, client, course, submissions, grades, status):
+    ids = {'first': submissions[0]}
+    grades = [{**g, 'submission_id': ids.get(g['submission_id'], g['submission_id'])} for g in grades]
+    before = scores(app)
+
+    response = grade(client, course['teacher'], {'submission_id': submissions[1], 'final_score': 90}, *grades)
+
+    assert response.status_code == status
+    assert scores(app) == before
+
+
+def test_teacher_cannot_grade_another_course(app, client, course, submissions, login):
+    intruder = login('intruder', 'teacher')
+
+    response = grade(client, intruder, {'submission_id': submissions[0], 'final_score': 90})
+
+    assert response.status_code == 403
+    assert response.get_json()['submission_ids'] == [submissions[0]]
+    assert scores(app)[submissions[0]][1] != 'graded'
@@ -0,0 +1,65 @@
+"""Importación masiva de rosters y de tareas con su banco de preguntas"""
+from conftest import PASSWORD
+from models import Question, QuestionOption, Student, Teacher, User
+
+
+def roster(*names):
+    return {'users': [
+        {'username': name, 'email': f'{name}@example.com', 'password': PASSWORD, 'role': role}
+        for name, role in names
+    ]}
+
+
+def test_roster_creates_users_with_profiles(app, client, login):
+    admin = login('admin', 'admin')
+
+    response = client.post('/api/users/import', json=roster(('ana', 'student'), ('luis', 'student'), ('eva', 'teacher')),
+                           headers=admin)
+
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 3, 'students': 2, 'teachers': 1}
+    with app.app_context():
+        assert Student.query.count() == 2
+        assert Teacher.query.count() == 1
+    assert client.post('/api/auth/login', json={'username': 'ana', 'password': PASSWORD}).status_code == 200
+
+
+def test_roster_conflicts_insert_nothing(app, client, login):
+    admin = login('admin', 'admin')
+
+    duplicated = client.post('/api/users/import', json=roster(('ana', 'student'), ('ana', 'teacher')), headers=admin)
+    existing = client.post('/api/users/import', json=roster(('luis', 'student'), ('admin', 'student')), headers=admin)
+
+    assert duplicated.status_code == existing.status_code == 409
+    assert existing.get_json()['msg'] == 'user exists: admin'
+    with app.app_context():
+        assert [user.username for user in User.query.all()] == ['admin']
+
+
+def test_assignment_import_with_question_bank(app, client, course):
+    response = client.post('/api/assignments/import', json={
+        'course_subject_id': course['course_subject_id'], 'title': 'Examen final', 'type': 'exam',
+        'questions': [
+            {'text': 'Capital de Francia', 'type': 'single_choice', 'points': 2,
+             'options': [{'option_text': 'París', 'is_correct': True}, {'option_text': 'Roma'}]},
+            {'text': 'Satisfacción', 'type': 'rating_scale', 'scale': {'scale_min': 1, 'scale_max': 5}},
+        ]
+    }, headers=course['teacher'])
+
+    assert response.status_code == 201
+    result = response.get_json()
+    assert (result['questions'], result['options'], result['scales']) == (2, 2, 1)
+    with app.app_context():
+        questions = Question.query.filter_by(assignment_id=result['assignment_id']).order_by(Question.order_index).all()
+        assert [q.text for q in questions] == ['Capital de Francia', 'Satisfacción']
+        assert QuestionOption.query.filter_by(question_id=questions[0].id, is_correct=True).one().option_text == 'París'
+    detail = client.get(f"/api/assignments/{result['assignment_id']}", headers=course['teacher']).get_json()
+    assert (detail['questions_count'], detail['total_points']) == (2, 3)
+
+
+def test_assignment_import_requires_existing_course_subject(client, course):
+    response = client.post('/api/assignments/import', json={
+        'course_subject_id': 0, 'title': 'Huérfana', 'type': 'quiz', 'questions': []
+    }, headers=course['teacher'])
+
+    assert response.status_code == 409
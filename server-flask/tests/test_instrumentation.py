@@ -0,0 +1,51 @@
+"""Presupuestos de consultas: fallo en modo estricto y exclusión de las consultas de autenticación"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from instrumentation import QueryBudgetExceeded, assert_max_queries, auth_queries
+from models import db, Student, User
+
+
+def test_budget_overrun_fails_in_strict_mode(app, client, course, monkeypatch):
+    view = app.view_functions['api.get_student_grades']
+    monkeypatch.setattr(view, 'query_budget', 1)
+
+    with pytest.raises(QueryBudgetExceeded, match='api.get_student_grades'):
+        client.get('/api/student/grades', headers=course['student'])
+
+
+def test_auth_queries_do_not_count_against_budget(app, client, course, monkeypatch):
+    monkeypatch.setitem(app.config, 'SQL_QUERY_HEADERS', True)
+    with app.app_context():
+        user = User.query.filter_by(username='student').one()
+        # Token sin claims de perfil: fuerza la consulta de la caché de identidad
+        token = create_access_token(identity={'user_id': user.id, 'role': 'student'})
+    # Primera petición del worker: reconstrucción del filtro de revocaciones
+    from revocation_service import revocation_service
+    revocation_service._next_sync = revocation_service._next_rebuild = 0
+
+    response = client.get('/api/student/grades', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    budget = app.view_functions['api.get_student_grades'].query_budget
+    assert int(response.headers['X-DB-Query-Count']) > budget
+
+
+def test_assert_max_queries_ignores_auth_block(app):
+    with app.app_context():
+        with assert_max_queries(1) as stats:
+            with auth_queries():
+                db.session.query(User).count()
+                db.session.query(Student).count()
+            db.session.query(User).count()
+        assert (stats.count, stats.auth_count) == (3, 2)
+
+        with pytest.raises(QueryBudgetExceeded):
+            with assert_max_queries(1):
+                db.session.query(User).count()
+                db.session.query(Student).count()
+
+
+def test_read_endpoints_stay_within_budget(client, course):
+    for path in ('/api/assignments', '/api/student/grades'):
+        assert client.get(path, headers=course['student']).status_code == 200
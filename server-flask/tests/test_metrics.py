@@ -0,0 +1,37 @@
+"""Métricas Prometheus: latencia por plantilla de ruta, pool de la BD y protección de /metrics"""
+from prometheus_client import REGISTRY
+
+
+def latency_count(route, status='200', method='GET'):
+    return REGISTRY.get_sample_value('http_request_duration_seconds_count',
+                                     {'method': method, 'route': route, 'status': status}) or 0
+
+
+def test_latency_is_labelled_by_route_template(client, course):
+    route = '/api/assignments/<int:assignment_id>'
+    before = latency_count(route)
+
+    client.get(f"/api/assignments/{course['assignment_id']}", headers=course['student'])
+    client.get('/api/assignments/0', headers=course['student'])
+
+    assert latency_count(route) == before + 1
+    assert latency_count(route, status='404') >= 1
+
+
+def test_metrics_exposes_pool_and_request_series(client, course):
+    checkouts = REGISTRY.get_sample_value('db_pool_checkouts_total', {'bind': 'default'})
+    client.get('/api/student/grades', headers=course['student'])
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_bucket' in text
+    assert REGISTRY.get_sample_value('db_pool_checkouts_total', {'bind': 'default'}) > checkouts
+
+
+def test_metrics_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secreto')
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
@@ -0,0 +1,119 @@
+"""Outbox: eventos en la transacción del cambio, reclamo con plazo, reintentos y entrega por tema"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Notification, OutboxEvent, Submission
+from outbox import analyze_submissions, outbox_service
+
+
+def events(app, topic=None):
+    with app.app_context():
+        query = OutboxEvent.query.order_by(OutboxEvent.id)
+        if topic:
+            query = query.filter_by(topic=topic)
+        return [(e.topic, e.payload) for e in query]
+
+
+def test_assignment_creation_enqueues_fan_out(app, client, course):
+    assert events(app, 'assignment.created') == [('assignment.created', {'assignment_id': course['assignment_id']})]
+    with app.app_context():
+        assert Notification.query.count() == 0
+
+        outbox_service.drain()
+        assert Notification.query.filter_by(kind='new_assignment').count() == 2
+
+        # Reentrega del mismo evento (p.ej. el plazo venció a mitad de lote): sin duplicados
+        OutboxEvent.query.update({'dispatched_at': None, 'available_at': datetime.utcnow()})
+        db.session.commit()
+        outbox_service.drain()
+        assert Notification.query.filter_by(kind='new_assignment').count() == 2
+
+
+def test_imported_assignment_enqueues_fan_out(app, client, course):
+    response = client.post('/api/assignments/import', json={
+        'course_subject_id': course['course_subject_id'], 'title': 'Importada', 'type': 'quiz',
+        'questions': [{'text': 'Pregunta', 'type': 'long_answer'}]
+    }, headers=course['teacher'])
+    assert response.status_code == 201
+
+    assert ('assignment.created', {'assignment_id': response.get_json()['assignment_id']}) in events(app)
+
+
+def test_submit_enqueues_received_event_once(app, client, course):
+    url = f"/api/assignments/{course['assignment_id']}/submit"
+    for _ in range(2):
+        client.post(url, json={'answers': []}, headers=course['student'])
+
+    assert len(events(app, 'submission.received')) == 1
+    assert events(app, 'submission.ai_analysis') == []
+    with app.app_context():
+        outbox_service.drain()
+        messages = [n.message for n in Notification.query.filter(Notification.kind.is_(None))]
+    assert sorted(messages) == ['Nueva entrega de student para "Quiz 1"',
+                                'Tu entrega para "Quiz 1" ha sido recibida exitosamente']
+
+
+def test_claim_leases_events_until_they_expire(app, client):
+    with app.app_context():
+        outbox_service.enqueue('test.topic', {'n': 1})
+        db.session.commit()
+
+        claimed = outbox_service._claim()
+        assert [e.attempts for e in claimed] == [1]
+        # Reclamado: otro worker no lo ve hasta que venza el plazo
+        assert outbox_service._claim() == []
+
+        OutboxEvent.query.update({'available_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        assert [e.attempts for e in outbox_service._claim()] == [2]
+
+
+def test_failed_delivery_is_retried_then_dead_lettered(app, client, monkeypatch):
+    monkeypatch.setitem(outbox_service.handlers, 'test.topic', lambda events: 1 / 0)
+    monkeypatch.setattr(outbox_service, 'max_attempts', 2)
+    with app.app_context():
+        outbox_service.enqueue('test.topic', {'n': 1})
+        db.session.commit()
+
+        assert outbox_service.dispatch() == (1, 0)
+        event = OutboxEvent.query.one()
+        assert event.dispatched_at is None
+        assert event.last_error.startswith('ZeroDivisionError')
+        assert event.available_at > datetime.utcnow()
+
+        event.available_at = datetime.utcnow()
+        db.session.commit()
+        assert outbox_service.dispatch() == (1, 0)
+        # Agotó los intentos: ya no se reclama
+        OutboxEvent.query.update({'available_at': datetime.utcnow()})
+        db.session.commit()
+        assert outbox_service.dispatch() == (0, 0)
+
+
+@pytest.fixture
+def ai_enabled(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'AI_AUTO_FEEDBACK', True)
+    jobs = []
+    monkeypatch.setattr('outbox.reminder_service.scheduler.add_job', lambda **job: jobs.append(job))
+    monkeypatch.setattr('outbox.gemini_service.analyze_submission', lambda data: {
+        'analysis_complete': True, 'feedback': f"{len(data['answers'])} respuestas", 'suggested_score': 80
+    })
+    return jobs
+
+
+def test_submit_enqueues_ai_analysis(app, client, course, ai_enabled):
+    response = client.post(f"/api/assignments/{course['assignment_id']}/submit", json={'answers': [
+        {'question_id': course['question_ids'][1], 'text_answer': 'Se juntan dos cantidades'}
+    ]}, headers=course['student'])
+    submission_id = response.get_json()['submission_id']
+    assert events(app, 'submission.ai_analysis') == [('submission.ai_analysis', {'submission_id': submission_id})]
+
+    with app.app_context():
+        outbox_service.drain()
+    assert [job['args'] for job in ai_enabled if job['func'] is analyze_submissions] == [[[submission_id]]]
+
+    analyze_submissions([submission_id])
+    with app.app_context():
+        submission = db.session.get(Submission, submission_id)
+        assert (submission.ai_feedback, float(submission.ai_score)) == ('1 respuestas', 80.0)
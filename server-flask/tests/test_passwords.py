@@ -0,0 +1,47 @@
+"""Hash de contraseñas: pool acotado, rechazo con 503 y actualización del costo al hacer login"""
+import threading
+
+from conftest import PASSWORD
+from models import db, User
+from password_service import password_service
+
+
+def stored_hash(app, username):
+    with app.app_context():
+        return db.session.query(User.password_hash).filter_by(username=username).scalar()
+
+
+def test_login_rehashes_with_the_configured_cost(app, client, login, monkeypatch):
+    login('student', 'student')
+    assert stored_hash(app, 'student').startswith('$2b$04$')
+    monkeypatch.setattr(password_service, 'rounds', 5)
+
+    response = client.post('/api/auth/login', json={'username': 'student', 'password': PASSWORD})
+
+    assert response.status_code == 200
+    assert stored_hash(app, 'student').startswith('$2b$05$')
+    assert client.post('/api/auth/login', json={'username': 'student', 'password': PASSWORD}).status_code == 200
+
+
+def test_saturated_pool_answers_503(client, monkeypatch):
+    monkeypatch.setattr(password_service, 'workers', 1)
+    monkeypatch.setattr(password_service, 'timeout', 0.01)
+    monkeypatch.setattr(password_service, '_slots', threading.BoundedSemaphore(1))
+    password_service._slots.acquire()
+
+    response = client.post('/api/auth/register', json={
+        'username': 'student', 'email': 'student@example.com', 'password': PASSWORD, 'role': 'student'
+    })
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_hash_many_keeps_order(monkeypatch):
+    monkeypatch.setattr(password_service, 'rounds', 4)
+    passwords = [f'clave-{i}' for i in range(9)]
+
+    hashes = password_service.hash_many(passwords)
+
+    assert [password_service.verify_and_update(p, h)[0] for p, h in zip(passwords, hashes)] == [True] * 9
+    assert not password_service.verify_and_update('clave-1', hashes[0])[0]
@@ -0,0 +1,50 @@
+"""Perfilado por muestreo: pilas plegadas de una petición disparada con X-Profile"""
+import time
+
+from profiling import profiling_service
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profile_request(app, path, token):
+    """Ejecuta los hooks de perfilado alrededor de trabajo en el hilo actual (los hooks solo se registran con token)"""
+    with app.test_request_context(path, headers={'X-Profile': token}):
+        profiling_service._start()
+        busy(0.1)
+        response = profiling_service._tag_response(app.response_class('ok'))
+        profiling_service._stop(None)
+    return response
+
+
+def test_profiled_request_is_listed_with_folded_stacks(app, client, login, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILING_TOKEN', 'perfil')
+    profiling_service.clear()
+    admin = login('admin', 'admin')
+
+    response = profile_request(app, '/api/student/grades', 'perfil')
+    profile_id = int(response.headers['X-Profile-Id'])
+
+    profiles = client.get('/api/admin/profiles', headers=admin).get_json()
+    assert [(p['id'], p['trigger'], p['status']) for p in profiles] == [(profile_id, 'header', 200)]
+    assert profiles[0]['samples'] > 0
+    folded = client.get(f'/api/admin/profiles/{profile_id}?format=folded', headers=admin).get_data(as_text=True)
+    assert 'busy (test_profiling.py' in folded
+    assert 'busy (test_profiling.py' in client.get('/api/admin/profiles/flamegraph', headers=admin).get_data(as_text=True)
+
+
+def test_wrong_token_is_not_profiled(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILING_TOKEN', 'perfil')
+    profiling_service.clear()
+
+    response = profile_request(app, '/api/student/grades', 'otro')
+
+    assert 'X-Profile-Id' not in response.headers
+    assert not profiling_service.profiles
+
+
+def test_profiles_are_admin_only(client, course):
+    assert client.get('/api/admin/profiles', headers=course['teacher']).status_code == 403
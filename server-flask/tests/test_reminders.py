@@ -0,0 +1,95 @@
+"""Avisos de nueva tarea por bloques de estudiantes y temporizadores de recordatorio por tarea"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import reminder_service as reminders
+from models import db, Assignment, Notification, Student, User
+from reminder_service import reminder_job_id, reminder_kind, reminder_service
+
+
+def notified(kind):
+    return sorted(user_id for user_id, in db.session.query(Notification.user_id).filter_by(kind=kind))
+
+
+def test_fan_out_covers_every_chunk(app, client, course, login, monkeypatch):
+    for i in range(3):
+        login(f'student{i}', 'student')
+    monkeypatch.setattr(reminders, 'FANOUT_CHUNK_SIZE', 2)
+
+    with app.app_context():
+        created = reminder_service.insert_assignment_notifications(course['assignment_id'])
+        db.session.commit()
+
+        students = sorted(user_id for user_id, in db.session.query(Student.user_id))
+        assert created == len(students) == 5
+        assert notified('new_assignment') == students
+        assert reminder_service.insert_assignment_notifications(course['assignment_id']) == 0
+
+
+def test_fan_out_to_selected_students(app, client, course):
+    with app.app_context():
+        student = Student.query.join(Student.user).filter_by(username='other').one()
+
+        assert reminder_service.insert_assignment_notifications(course['assignment_id'], [student.id]) == 1
+        db.session.commit()
+        assert notified('new_assignment') == [student.user_id]
+        assert reminder_service.insert_assignment_notifications(0) == 0
+
+
+@pytest.fixture
+def scheduler():
+    """Scheduler en pausa (los jobs no se disparan durante la prueba) y sin temporizadores al terminar"""
+    reminder_service.scheduler.pause()
+    yield reminder_service.scheduler
+    reminder_service.scheduler.remove_all_jobs(jobstore='default')
+    reminder_service.scheduler.resume()
+
+
+def timers(scheduler, assignment_id):
+    return {
+        job.id: job.next_run_time.astimezone(timezone.utc).replace(tzinfo=None)
+        for job in scheduler.get_jobs(jobstore='default') if job.args[0] == assignment_id
+    }
+
+
+def test_timers_follow_due_date(client, course, scheduler):
+    assignment_id = course['assignment_id']
+    due = datetime.utcnow().replace(microsecond=0) + timedelta(hours=48)
+
+    reminder_service.schedule_reminders(assignment_id, due)
+    jobs = timers(scheduler, assignment_id)
+    assert set(jobs) == {reminder_job_id(assignment_id, 24), reminder_job_id(assignment_id, 1)}
+    assert jobs[reminder_job_id(assignment_id, 24)] == due - timedelta(hours=24)
+
+    # A 30 minutos del vencimiento solo queda el recordatorio más cercano, inmediato
+    reminder_service.schedule_reminders(assignment_id, datetime.utcnow() + timedelta(minutes=30))
+    jobs = timers(scheduler, assignment_id)
+    assert set(jobs) == {reminder_job_id(assignment_id, 1)}
+    assert jobs[reminder_job_id(assignment_id, 1)] <= datetime.utcnow()
+
+    reminder_service.schedule_reminders(assignment_id, None)
+    assert timers(scheduler, assignment_id) == {}
+
+
+def test_due_date_update_reschedules(client, course, scheduler):
+    due = (datetime.utcnow() + timedelta(days=3)).replace(microsecond=0)
+
+    response = client.patch(f"/api/assignments/{course['assignment_id']}", json={'due_date': due.isoformat()},
+                          headers=course['teacher'])
+
+    assert response.status_code == 200
+    assert timers(scheduler, course['assignment_id'])[reminder_job_id(course['assignment_id'], 1)] == due - timedelta(hours=1)
+
+
+def test_reminder_skips_students_who_submitted(app, client, course):
+    client.post(f"/api/assignments/{course['assignment_id']}/submit", json={'answers': []}, headers=course['student'])
+    with app.app_context():
+        db.session.query(Assignment).filter_by(id=course['assignment_id']).update(
+            {'due_date': datetime.utcnow() + timedelta(minutes=30)})
+        db.session.commit()
+        other = db.session.query(User.id).filter_by(username='other').scalar()
+
+        assert reminder_service.send_reminder(course['assignment_id'], 1) == 1
+        assert reminder_service.send_reminder(course['assignment_id'], 1) == 0
+        assert notified(reminder_kind(1)) == [other]
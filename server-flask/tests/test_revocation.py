@@ -0,0 +1,54 @@
+"""Revocación de tokens: logout, sincronización entre workers y revocaciones repetidas"""
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import decode_token
+
+from models import db, RevokedToken
+from revocation_service import revocation_service
+
+
+def test_logout_revokes_token(client, login):
+    headers = login('student', 'student')
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/notifications', headers=headers).status_code == 401
+
+
+def test_revoke_twice_is_idempotent(app, client, login):
+    headers = login('student', 'student')
+    with app.app_context():
+        payload = decode_token(headers['Authorization'].split()[1])
+        # Dos workers procesando el mismo logout a la vez
+        revocation_service.revoke(payload)
+        revocation_service.revoke(payload)
+        assert RevokedToken.query.filter_by(jti=payload['jti']).count() == 1
+
+
+def test_sync_picks_up_revocation_committed_after_higher_id(app, client):
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    with app.app_context():
+        revocation_service.is_revoked('warmup')
+        db.session.add(RevokedToken(id=100, jti='committed-first', token_type='access', expires_at=expires_at))
+        db.session.commit()
+        revocation_service._next_sync = 0
+        assert revocation_service.is_revoked('committed-first')
+
+        # Id asignado antes que el anterior, commit después de la última lectura de este worker
+        db.session.add(RevokedToken(id=50, jti='committed-late', token_type='access', expires_at=expires_at,
+                                    revoked_at=datetime.utcnow() - timedelta(seconds=10)))
+        db.session.commit()
+        revocation_service._next_sync = 0
+        assert revocation_service.is_revoked('committed-late')
+
+
+def test_sync_skips_jti_already_seen_in_overlap(app, client):
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    with app.app_context():
+        db.session.add(RevokedToken(jti='seen', token_type='access', expires_at=expires_at))
+        db.session.commit()
+        revocation_service.is_revoked('warmup')
+        assert 'seen' in revocation_service._recent
+
+        revocation_service._next_sync = 0
+        revocation_service.is_revoked('warmup')
+        assert list(revocation_service._recent) == ['seen']
@@ -0,0 +1,59 @@
+"""Índice de búsqueda en memoria: actualización incremental y escrituras de otros workers"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+from models import db, Assignment, Course, Question, Subject
+from search import InvertedIndex
+
+
+def titles(client, headers, q, kind=None):
+    url = f'/api/search?q={q}' + (f'&type={kind}' if kind else '')
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return [result['title'] for result in response.get_json()['results']]
+
+
+def test_search_is_accent_insensitive_prefix_match(client, course):
+    assert titles(client, course['student'], 'matemat') == ['Matemáticas']
+    assert titles(client, course['student'], 'cuanto', 'question') == ['¿Cuánto es 2 + 2?']
+
+
+def test_new_question_is_indexed_without_rebuild(app, client, course, monkeypatch):
+    # Filas antiguas: la primera pregunta queda fuera de la ventana de solape de la carga incremental
+    first_question = course['question_ids'][0]
+    with app.app_context(), db.engine.begin() as conn:
+        for model in (Course, Subject, Assignment, Question):
+            conn.execute(update(model).values(updated_at=datetime.utcnow() - timedelta(hours=2)))
+        conn.execute(update(Question).where(Question.id == first_question)
+                     .values(updated_at=datetime.utcnow() - timedelta(hours=3)))
+    assert titles(client, course['student'], 'fotosintesis') == []
+    added = []
+    original_add = InvertedIndex.add
+    monkeypatch.setattr(InvertedIndex, 'add', lambda self, kind, doc_id, *args: (
+        added.append((kind, doc_id)), original_add(self, kind, doc_id, *args)
+    ))
+
+    response = client.post(f"/api/assignments/{course['assignment_id']}/questions", json={
+        'text': 'Describe la fotosíntesis', 'type': 'long_answer'
+    }, headers=course['teacher'])
+
+    assert titles(client, course['student'], 'fotosintesis') == ['Describe la fotosíntesis']
+    # Solo se recargan la pregunta nueva, la tarea cuyos contadores cambiaron y lo que cae en el solape
+    assert ('question', response.get_json()['id']) in added
+    assert ('assignment', course['assignment_id']) in added
+    assert ('question', first_question) not in added
+    assert not [kind for kind, _ in added if kind in ('course', 'subject')]
+
+
+def test_writes_from_another_worker_are_picked_up(app, client, course):
+    assert titles(client, course['student'], 'curso', 'course') == ['Curso 1']
+
+    # Otro proceso: conexión propia, sin pasar por la sesión de este worker
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(update(Course).values(name='Álgebra lineal', updated_at=datetime.utcnow()))
+        conn.execute(delete(Question).where(Question.text == 'Explica la suma'))
+
+    assert titles(client, course['student'], 'curso', 'course') == []
+    assert titles(client, course['student'], 'algebra', 'course') == ['Álgebra lineal']
+    assert titles(client, course['student'], 'explica', 'question') == []
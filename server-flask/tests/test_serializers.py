@@ -0,0 +1,34 @@
+"""Serializadores por forma de fila y proveedor JSON (orjson o json estándar)"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+import json_provider
+from serializers import serializer
+
+
+def test_serializer_follows_relationships_and_tolerates_missing_links():
+    row = serializer('id', 'title', teacher_name='teacher.user.username')
+
+    with_teacher = SimpleNamespace(id=1, title='Curso', teacher=SimpleNamespace(user=SimpleNamespace(username='ana')))
+    without_teacher = SimpleNamespace(id=2, title='Libre', teacher=None)
+
+    assert row(with_teacher) == {'id': 1, 'title': 'Curso', 'teacher_name': 'ana'}
+    assert row(without_teacher) == {'id': 2, 'title': 'Libre', 'teacher_name': None}
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_provider_serializes_datetimes_and_decimals(app, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip('orjson no está instalado')
+    payload = {'when': datetime(2026, 3, 1, 12, 30), 'score': Decimal('87.5'), 'missing': None}
+
+    with app.test_request_context():
+        body = json.loads(app.json.response(payload).get_data())
+
+    assert body == {'when': '2026-03-01T12:30:00', 'score': 87.5, 'missing': None}
@@ -0,0 +1,40 @@
+"""Respuestas casi duplicadas: firmas MinHash, cubetas LSH y grupos por pregunta"""
+from similarity import estimate_similarity, minhash
+
+ESSAY = ('la suma junta dos cantidades en una sola y el resultado no depende del orden en que se sumen '
+         'porque la operación es conmutativa y asociativa en los números naturales')
+COPY = ESSAY.replace('en los números naturales', 'en los números enteros')
+OTHER = ('para sumar contamos primero los elementos de un grupo y seguimos contando los del otro grupo '
+         'hasta terminar con todos ellos sin saltarnos ninguno por el camino')
+
+
+def test_signatures_estimate_jaccard_similarity():
+    assert estimate_similarity(minhash(ESSAY), minhash(ESSAY)) == 1
+    assert estimate_similarity(minhash(ESSAY), minhash(COPY)) > 0.7
+    assert estimate_similarity(minhash(ESSAY), minhash(OTHER)) < 0.2
+    assert minhash('demasiado corta', min_tokens=8) is None
+
+
+def test_copied_answers_are_grouped(client, course, login):
+    essay_question = course['question_ids'][1]
+    third = login('third', 'student')
+    for headers, text in ((course['student'], ESSAY), (course['other'], COPY), (third, OTHER)):
+        response = client.post(f"/api/assignments/{course['assignment_id']}/submit",
+                               json={'answers': [{'question_id': essay_question, 'text_answer': text}]}, headers=headers)
+        assert response.status_code == 201
+
+    response = client.get(f"/api/teacher/assignments/{course['assignment_id']}/similar-answers", headers=course['teacher'])
+
+    assert response.status_code == 200
+    clusters = response.get_json()
+    assert [(c['question_id'], c['size']) for c in clusters] == [(essay_question, 2)]
+    assert sorted(a['student_name'] for a in clusters[0]['answers']) == ['other', 'student']
+    assert clusters[0]['similarity'] > 0.7
+
+
+def test_similar_answers_access_and_threshold(client, course, login):
+    url = f"/api/teacher/assignments/{course['assignment_id']}/similar-answers"
+
+    assert client.get(url, headers=login('intruder', 'teacher')).status_code == 403
+    assert client.get(f'{url}?threshold=1.5', headers=course['teacher']).status_code == 400
+    assert client.get(url, headers=course['teacher']).get_json() == []
@@ -0,0 +1,47 @@
+"""Entregas idempotentes: Idempotency-Key, doble clic y una sola entrega por estudiante y tarea"""
+from models import OutboxEvent, Submission
+
+
+def submit(client, course, headers=None, assignment_id=None, **body):
+    return client.post(f"/api/assignments/{assignment_id or course['assignment_id']}/submit",
+                       json={'answers': [{'question_id': course['question_ids'][1], 'text_answer': 'cuatro'}], **body},
+                       headers={**course['student'], **(headers or {})})
+
+
+def test_retry_with_idempotency_key_replays_receipt(app, client, course):
+    first = submit(client, course, {'Idempotency-Key': 'abc'})
+    retry = submit(client, course, {'Idempotency-Key': 'abc'})
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json()['submission_id'] == first.get_json()['submission_id']
+    with app.app_context():
+        assert Submission.query.count() == 1
+        assert OutboxEvent.query.filter_by(topic='submission.received').count() == 1
+
+
+def test_double_click_without_key_returns_original_submission(app, client, course):
+    first = submit(client, course)
+    second = submit(client, course, answers=[{'question_id': course['question_ids'][1], 'text_answer': 'cinco'}])
+
+    assert second.status_code == 200
+    assert second.get_json()['submission_id'] == first.get_json()['submission_id']
+    with app.app_context():
+        answers = Submission.query.one().answers
+        assert [answer.text_answer for answer in answers] == ['cuatro']
+
+
+def test_key_reused_for_another_assignment_is_rejected(client, course):
+    other = client.post('/api/assignments', json={
+        'course_subject_id': course['course_subject_id'], 'title': 'Quiz 2', 'type': 'quiz'
+    }, headers=course['teacher']).get_json()
+    assert submit(client, course, {'Idempotency-Key': 'abc'}).status_code == 201
+
+    response = submit(client, course, {'Idempotency-Key': 'abc'}, assignment_id=other['id'])
+
+    assert response.status_code == 422
+
+
+def test_idempotency_key_length_is_limited(client, course):
+    assert submit(client, course, {'Idempotency-Key': 'x' * 65}).status_code == 400
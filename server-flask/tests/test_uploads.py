@@ -0,0 +1,105 @@
+"""Subidas reanudables: bloques con compare-and-set, contenido deduplicado, descarga con Range y permisos de lectura"""
+import hashlib
+import os
+
+import pytest
+
+CONTENT = b'0123456789' * 100
+
+
+def upload_file(client, headers, content=CONTENT, chunk=400):
+    upload = client.post('/api/uploads', json={'filename': 'ensayo.txt', 'size': len(content)}, headers=headers).get_json()
+    for offset in range(0, len(content), chunk):
+        response = client.patch(f"/api/uploads/{upload['id']}", data=content[offset:offset + chunk],
+                                headers={**headers, 'Upload-Offset': str(offset)})
+        assert response.status_code in (200, 202), response.get_json()
+    return response.get_json()
+
+
+def test_chunks_resume_from_offset_and_reject_stale_offset(client, login):
+    headers = login('student', 'student')
+    upload = client.post('/api/uploads', json={'filename': 'ensayo.txt', 'size': len(CONTENT)}, headers=headers).get_json()
+    url = f"/api/uploads/{upload['id']}"
+
+    response = client.patch(url, data=CONTENT[:600], headers={**headers, 'Upload-Offset': '0'})
+    assert response.status_code == 202
+    # Reintento del mismo bloque (p.ej. otra pestaña): pierde el compare-and-set
+    response = client.patch(url, data=CONTENT[:600], headers={**headers, 'Upload-Offset': '0'})
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 600
+    assert client.head(url, headers=headers).headers['Upload-Offset'] == '600'
+
+    response = client.patch(url, data=CONTENT[600:], headers={**headers, 'Upload-Offset': '600'})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'complete'
+    assert client.get(f'{url}/content', headers=headers).data == CONTENT
+
+
+def test_chunk_larger_than_declared_size_is_rejected(client, login):
+    headers = login('student', 'student')
+    upload = client.post('/api/uploads', json={'filename': 'a.txt', 'size': 10}, headers=headers).get_json()
+
+    response = client.patch(f"/api/uploads/{upload['id']}", data=b'x' * 11, headers={**headers, 'Upload-Offset': '0'})
+
+    assert response.status_code == 413
+    assert response.get_json()['offset'] == 0
+
+
+def test_same_content_is_stored_once(app, client, login):
+    from models import StoredFile
+    from uploads import upload_storage
+
+    first = upload_file(client, login('student', 'student'))
+    second = upload_file(client, login('other', 'student'), chunk=300)
+
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert first['sha256'] == second['sha256'] == sha256
+    assert first['id'] != second['id']
+    with app.app_context():
+        assert [stored.sha256 for stored in StoredFile.query.all()] == [sha256]
+    objects = os.path.join(upload_storage.root, 'objects')
+    assert [name for _, _, names in os.walk(objects) for name in names].count(sha256) == 1
+
+
+def test_download_supports_range_and_etag(client, login):
+    headers = login('student', 'student')
+    upload = upload_file(client, headers)
+    url = upload['content_url']
+
+    response = client.get(url, headers={**headers, 'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[10:20]
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(CONTENT)}'
+
+    etag = client.get(url, headers=headers).headers['ETag']
+    assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+
+@pytest.fixture
+def submitted_upload(client, course):
+    upload = upload_file(client, course['student'])
+    response = client.post(f"/api/assignments/{course['assignment_id']}/submit",
+                           json={'answers': [], 'file_url': upload['content_url']}, headers=course['student'])
+    assert response.status_code == 201
+    return upload
+
+
+def test_course_teacher_and_admin_can_read_submitted_upload(client, login, course, submitted_upload):
+    admin = login('admin', 'admin')
+
+    for headers in (course['teacher'], admin):
+        assert client.get(submitted_upload['content_url'], headers=headers).data == CONTENT
+
+
+def test_other_users_cannot_read_upload(client, login, course, submitted_upload):
+    other_teacher = login('teacher2', 'teacher')
+
+    for headers in (other_teacher, course['other']):
+        assert client.get(f"/api/uploads/{submitted_upload['id']}", headers=headers).status_code == 404
+        assert client.get(submitted_upload['content_url'], headers=headers).status_code == 404
+
+
+def test_teacher_cannot_read_upload_not_used_in_a_submission(client, course):
+    upload = upload_file(client, course['student'])
+
+    assert client.get(upload['content_url'], headers=course['teacher']).status_code == 404
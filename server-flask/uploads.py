@@ -0,0 +1,333 @@
+"""
+Subida de archivos en streaming, reanudable y con almacenamiento deduplicado por contenido
+
+Protocolo (similar a tus.io):
+    POST  /api/uploads                 {filename, size, content_type} -> {id, offset}
+    PATCH /api/uploads/<id>            cabecera Upload-Offset + bytes del bloque
+    HEAD  /api/uploads/<id>            Upload-Offset / Upload-Length para reanudar
+    GET   /api/uploads/<id>/content    descarga con Range (send_file)
+
+Los bloques se copian del cuerpo de la petición al disco en trozos de
+UPLOAD_CHUNK_SIZE, sin cargar el archivo en memoria. Cada PATCH escribe primero
+en un segmento propio; solo la petición que gana el compare-and-set de
+Upload.received lo añade al archivo parcial, mientras la fila sigue bloqueada,
+así que dos bloques con el mismo offset no se mezclan. Al completarse, el
+archivo se guarda una sola vez bajo objects/<sha256[:2]>/<sha256>.
+
+Solo el autor modifica una subida. Pueden leerla el autor, los admin y el
+profesor del curso de una entrega del autor cuyo file_url apunta a ella.
+"""
+import hashlib
+import mimetypes
+import os
+import shutil
+import uuid
+
+from flask import Blueprint, jsonify, request, send_file
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
+
+from auth import current_identity, current_user_id
+from cache_service import LRUCache
+from models import db, Assignment, Course, CourseSubject, StoredFile, Student, Submission, Upload
+
+try:
+    import magic
+except ImportError:  # python-magic necesita libmagic en el sistema
+    magic = None
+
+uploads_bp = Blueprint('uploads', __name__, url_prefix='/api')
+
+SNIFF_BYTES = 2048
+
+
+class UploadStorage:
+    def __init__(self, app=None):
+        self.root = None
+        self.chunk_size = 1024 * 1024
+        self.max_bytes = 500 * 1024 * 1024
+        # Estado de SHA-256 de las subidas en curso en este proceso (si falta, se recalcula al final)
+        self._hashers = LRUCache(maxsize=256)
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el directorio de almacenamiento y los límites"""
+        app.config.setdefault('UPLOAD_DIR', os.environ.get('UPLOAD_DIR') or os.path.join(app.instance_path, 'uploads'))
+        app.config.setdefault('UPLOAD_MAX_BYTES', int(os.environ.get('UPLOAD_MAX_BYTES', 500 * 1024 * 1024)))
+        app.config.setdefault('UPLOAD_CHUNK_SIZE', int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024)))
+
+        self.root = app.config['UPLOAD_DIR']
+        self.max_bytes = app.config['UPLOAD_MAX_BYTES']
+        self.chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+
+    def temp_path(self, upload_id):
+        return os.path.join(self.root, 'tmp', f'{upload_id}.part')
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256)
+
+    def segment_path(self, upload_id):
+        return os.path.join(self.root, 'tmp', f'{upload_id}.{uuid.uuid4().hex}.seg')
+
+    def write_segment(self, upload_id, offset, stream, limit):
+        """
+        Copia hasta limit bytes del stream a un segmento de esta petición, sin tocar el archivo parcial.
+
+        Returns:
+            (ruta del segmento, bytes escritos, SHA-256 acumulado o None, True si el stream traía más de limit bytes)
+        """
+        segment = self.segment_path(upload_id)
+        entry = self._hashers.get(upload_id)
+        # Copia del estado cacheado: una petición que pierde el CAS no lo altera
+        hasher = entry[1].copy() if entry and entry[0] == offset else (hashlib.sha256() if offset == 0 else None)
+
+        written = 0
+        with open(segment, 'wb') as f:
+            while written < limit:
+                chunk = stream.read(min(self.chunk_size, limit - written))
+                if not chunk:
+                    break
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                written += len(chunk)
+        overflow = written == limit and bool(stream.read(1))
+        return segment, written, hasher, overflow
+
+    def append_segment(self, upload_id, offset, segment, written, hasher):
+        """Añade el segmento al archivo parcial en offset; solo tras ganar el CAS y antes del commit"""
+        path = self.temp_path(upload_id)
+        try:
+            if offset == 0:
+                os.replace(segment, path)
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+            else:
+                with open(path, 'r+b') as f, open(segment, 'rb') as src:
+                    f.seek(offset)
+                    f.truncate()
+                    shutil.copyfileobj(src, f, self.chunk_size)
+                    f.flush()
+                    os.fsync(f.fileno())
+        finally:
+            self.discard_segment(segment)
+
+        if hasher is not None:
+            self._hashers.set(upload_id, (offset + written, hasher))
+
+    def discard_segment(self, segment):
+        try:
+            os.remove(segment)
+        except FileNotFoundError:
+            pass
+
+    def finalize(self, upload):
+        """Mueve el archivo completo a su ruta por contenido (o lo descarta si ya existía)"""
+        path = self.temp_path(upload.id)
+        entry = self._hashers.get(upload.id)
+        if entry and entry[0] == upload.size:
+            sha256 = entry[1].hexdigest()
+        else:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    hasher.update(chunk)
+            sha256 = hasher.hexdigest()
+        self._hashers.delete_prefix(upload.id)
+
+        stored = db.session.get(StoredFile, sha256)
+        if stored is None:
+            with open(path, 'rb') as f:
+                content_type = sniff_content_type(f.read(SNIFF_BYTES), upload.filename, upload.content_type)
+            target = self.object_path(sha256)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+            stored = StoredFile(sha256=sha256, size=upload.size, content_type=content_type)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(stored)
+            except IntegrityError:
+                # Otra subida con el mismo contenido terminó a la vez
+                stored = db.session.get(StoredFile, sha256)
+        else:
+            os.remove(path)
+        return stored
+
+
+def sniff_content_type(head, filename, declared=None):
+    """Tipo MIME por contenido (python-magic), nombre o el declarado por el cliente"""
+    if magic is not None and head:
+        try:
+            return magic.from_buffer(head, mime=True)
+        except Exception:
+            pass
+    return mimetypes.guess_type(filename)[0] or declared or 'application/octet-stream'
+
+
+# Instancia global del servicio
+upload_storage = UploadStorage()
+
+
+def content_url(upload_id):
+    """URL de descarga; es la que se guarda como file_url de una entrega"""
+    return f'/api/uploads/{upload_id}/content'
+
+
+def upload_row(upload):
+    return {
+        'id': upload.id,
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.received,
+        'status': upload.status,
+        'sha256': upload.sha256,
+        'content_type': upload.stored_file.content_type if upload.stored_file else upload.content_type,
+        'content_url': content_url(upload.id) if upload.status == 'complete' else None,
+    }
+
+
+def _upload_headers(upload):
+    return {'Upload-Offset': str(upload.received), 'Upload-Length': str(upload.size), 'Cache-Control': 'no-store'}
+
+
+def _submitted_to_teacher(upload, teacher_id):
+    """True si una entrega del autor de la subida, en un curso del profesor, la usa como file_url"""
+    if not teacher_id:
+        return False
+    return db.session.query(db.exists().where(
+        Submission.file_url.like(f'%{content_url(upload.id)}%'),
+        Submission.student_id == Student.id,
+        Student.user_id == upload.user_id,
+        Submission.assignment_id == Assignment.id,
+        Assignment.course_subject_id == CourseSubject.id,
+        CourseSubject.course_id == Course.id,
+        Course.teacher_id == teacher_id
+    )).scalar()
+
+
+def _get_upload(upload_id, for_read=False):
+    """Subida del usuario actual; para leer también admin y el profesor que recibió la entrega"""
+    upload = db.session.get(Upload, upload_id)
+    if upload is None:
+        return None
+    if upload.user_id == current_user_id():
+        return upload
+    if not for_read:
+        return None
+    identity = current_identity()
+    if identity.get('role') == 'admin':
+        return upload
+    if identity.get('role') == 'teacher' and _submitted_to_teacher(upload, identity.get('teacher_id')):
+        return upload
+    return None
+
+
+@uploads_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """Iniciar una subida: {filename, size, content_type}"""
+    data = request.get_json() or {}
+    filename = os.path.basename(str(data.get('filename') or ''))[:255]
+    size = data.get('size')
+    if not filename or not isinstance(size, int) or size <= 0:
+        return jsonify({'msg': 'filename and positive integer size required'}), 400
+    if size > upload_storage.max_bytes:
+        return jsonify({'msg': f'file too large (max {upload_storage.max_bytes} bytes)'}), 413
+
+    upload = Upload(
+        id=uuid.uuid4().hex,
+        user_id=current_user_id(),
+        filename=filename,
+        content_type=data.get('content_type'),
+        size=size
+    )
+    db.session.add(upload)
+    db.session.commit()
+    return jsonify(upload_row(upload)), 201, {**_upload_headers(upload), 'Location': f'/api/uploads/{upload.id}'}
+
+
+@uploads_bp.route('/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """Estado de la subida (HEAD devuelve solo Upload-Offset / Upload-Length)"""
+    upload = _get_upload(upload_id, for_read=True)
+    if not upload:
+        return jsonify({'msg': 'upload not found'}), 404
+    return jsonify(upload_row(upload)), 200, _upload_headers(upload)
+
+
+@uploads_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+@jwt_required()
+def append_upload(upload_id):
+    """Añadir un bloque en Upload-Offset; si el offset no coincide responde 409 con el offset actual"""
+    upload = _get_upload(upload_id)
+    if not upload:
+        return jsonify({'msg': 'upload not found'}), 404
+    if upload.status == 'complete':
+        return jsonify(upload_row(upload)), 200, _upload_headers(upload)
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({'msg': 'Upload-Offset header required'}), 400
+    if offset != upload.received:
+        return jsonify({'msg': 'offset mismatch', 'offset': upload.received}), 409, _upload_headers(upload)
+    if offset and not os.path.exists(upload_storage.temp_path(upload.id)):
+        # El archivo parcial se perdió (p.ej. otro disco): la subida vuelve a empezar
+        upload.received = 0
+        db.session.commit()
+        return jsonify({'msg': 'partial upload lost, restart from 0', 'offset': 0}), 409, _upload_headers(upload)
+
+    segment, written, hasher, overflow = upload_storage.write_segment(upload.id, offset, request.stream, upload.size - offset)
+    if overflow:
+        upload_storage.discard_segment(segment)
+        return jsonify({'msg': 'chunk exceeds declared size', 'offset': upload.received}), 413, _upload_headers(upload)
+
+    # Compare-and-set: otra petición concurrente con el mismo offset pierde. El UPDATE
+    # bloquea la fila hasta el commit, así que solo el ganador escribe en el archivo parcial
+    updated = db.session.execute(
+        db.update(Upload)
+        .where(Upload.id == upload.id, Upload.received == offset)
+        .values(received=offset + written)
+    ).rowcount
+    if not updated:
+        upload_storage.discard_segment(segment)
+        db.session.rollback()
+        db.session.refresh(upload)
+        return jsonify({'msg': 'offset mismatch', 'offset': upload.received}), 409, _upload_headers(upload)
+    try:
+        upload_storage.append_segment(upload.id, offset, segment, written, hasher)
+    except OSError:
+        db.session.rollback()
+        raise
+    db.session.refresh(upload)
+
+    if upload.received == upload.size:
+        stored = upload_storage.finalize(upload)
+        upload.sha256 = stored.sha256
+        upload.status = 'complete'
+    db.session.commit()
+
+    status = 200 if upload.status == 'complete' else 202
+    return jsonify(upload_row(upload)), status, _upload_headers(upload)
+
+
+@uploads_bp.route('/uploads/<upload_id>/content', methods=['GET'])
+@jwt_required()
+def download_upload(upload_id):
+    """Descarga con soporte de Range/If-None-Match; USE_X_SENDFILE delega el envío al servidor web"""
+    upload = _get_upload(upload_id, for_read=True)
+    if not upload or upload.status != 'complete':
+        return jsonify({'msg': 'upload not found'}), 404
+    return send_file(
+        upload_storage.object_path(upload.sha256),
+        mimetype=upload.stored_file.content_type,
+        as_attachment=request.args.get('download') == '1',
+        download_name=upload.filename,
+        conditional=True,
+        etag=upload.sha256
+    )